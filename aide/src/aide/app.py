@@ -4,13 +4,13 @@ import json
 import os
 import re
 import subprocess
-import difflib
 import argparse
 from datetime import datetime, timezone
 from rich import print
 import requests
 from aide.graph import create_graph, AppState
-from aide.utils import log_event as log_event_util
+from aide.openapi_diff import compare as compare_openapi, load_project_schema, resolve_refs
+from aide.utils import log_event as log_event_util, start_input_reader
 
 def get_project_path(user_request: str) -> str:
     """Creates a sanitized and truncated directory name from the user request."""
@@ -137,29 +137,22 @@ def validate_api_schema_tool(remote_schema_url):
     try:
         response = requests.get(remote_schema_url)
         response.raise_for_status()
-        remote_schema = response.json()
+        remote_schema = resolve_refs(response.json())
     except requests.exceptions.RequestException as e:
         return f"Error fetching remote API schema: {e}"
 
     try:
-        with open("api_schema.json", "r") as f:
-            local_schema = json.load(f)
+        local_schema = load_project_schema("api_schema.json")
     except FileNotFoundError:
         return "Could not find local API schema file: api_schema.json"
     except json.JSONDecodeError:
         return "Could not decode local API schema file: api_schema.json"
 
-    diff = list(difflib.unified_diff(
-        json.dumps(local_schema, indent=2).splitlines(keepends=True),
-        json.dumps(remote_schema, indent=2).splitlines(keepends=True),
-        fromfile='local_schema.json',
-        tofile='remote_schema.json',
-    ))
-
-    if not diff:
+    incompatibilities = compare_openapi(local_schema, remote_schema)
+    if not any(i["severity"] == "error" for i in incompatibilities):
         return "API schema validation successful."
     else:
-        return "API schema validation failed.\n" + "".join(diff)
+        return "API schema validation failed.\n" + json.dumps(incompatibilities, indent=2)
 
 def get_project_path(user_request: str) -> str:
     """Creates a sanitized and truncated directory name from the user request."""
@@ -174,6 +167,9 @@ def main():
     parser.add_argument('--new', action='store_true', help='Start a new project in a new directory.')
     parser.add_argument('--max-iterations', type=int, default=10, help='Set the maximum number of iterations.')
     parser.add_argument('--no-performance-test', action='store_true', help='Skip the performance test.')
+    parser.add_argument('--router-threshold', type=float, default=0.8, help='Minimum confidence for routing a request locally instead of asking the LLM router (above 1 always uses the LLM).')
+    parser.add_argument('--input-timeout', type=float, default=30.0, help='Seconds to wait for user feedback between iterations before continuing (0 = never wait).')
+    parser.add_argument('--candidates', type=int, default=1, help='Number of implementer candidates to run in parallel per iteration; the one with the best test results is kept.')
     parser.add_argument('user_request', nargs='+', help='The user request for the agent.')
     
     args = parser.parse_args()
@@ -189,6 +185,7 @@ def main():
         os.chdir(project_path)
     
     log_event("session_start", {"user_request": user_request})
+    start_input_reader()
 
     app = create_graph()
     
@@ -200,6 +197,9 @@ def main():
         "iteration_count": 0,
         "max_iterations": args.max_iterations,
         "run_performance_test": not args.no_performance_test,
+        "user_input_timeout": args.input_timeout,
+        "router_confidence_threshold": args.router_threshold,
+        "candidates": args.candidates,
     }
 
     final_state = app.invoke(initial_state)
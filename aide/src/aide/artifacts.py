@@ -0,0 +1,118 @@
+"""Content-addressed store for the documents agents produce.
+
+Specs, plans, code maps, API schemas and test reports are written once as
+`objects/<sha256>.json` under `.aide/artifacts/`, and `index.json` records every
+version of each kind with the iteration that produced it. The graph state only
+carries small references (`{"$artifact": kind, "sha256": ..., "iteration": ...}`),
+so LangGraph copies and streams a few bytes per step however large the project
+grows, and every past iteration's documents stay inspectable.
+
+Nodes load what they need with `load_artifact`, or take the stored JSON text
+directly with `artifact_text` when it only goes into a prompt. Both also accept
+plain values, so state built by hand (tests, older sessions) keeps working.
+"""
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from .workspace import get_workspace_root
+
+ARTIFACT_DIR = os.path.join(".aide", "artifacts")
+CACHE_SIZE = 64
+
+def is_artifact(value):
+    return isinstance(value, dict) and "$artifact" in value and "sha256" in value
+
+class ArtifactStore:
+    def __init__(self, root="."):
+        self.root = os.path.abspath(root)
+        self.directory = os.path.join(self.root, ARTIFACT_DIR)
+        self.object_dir = os.path.join(self.directory, "objects")
+        self.index_path = os.path.join(self.directory, "index.json")
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f:
+                self.index = json.load(f)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def _remember(self, digest, text):
+        self._cache[digest] = text
+        self._cache.move_to_end(digest)
+        while len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def put(self, kind, value, iteration=0):
+        """Stores `value` (if this content is new) as a version of `kind` and returns its reference."""
+        text = json.dumps(value, indent=4)
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        with self._lock:
+            path = os.path.join(self.object_dir, f"{digest}.json")
+            if not os.path.exists(path):
+                self._write(path, text)
+            self._remember(digest, text)
+            versions = self.index.setdefault(kind, [])
+            if not versions or (versions[-1]["sha256"], versions[-1]["iteration"]) != (digest, iteration):
+                versions.append({
+                    "sha256": digest,
+                    "iteration": iteration,
+                    "size": len(text),
+                    "created": datetime.datetime.utcnow().isoformat(),
+                })
+                self._write(self.index_path, json.dumps(self.index, indent=4))
+        return {"$artifact": kind, "sha256": digest, "iteration": iteration}
+
+    def text(self, ref):
+        """The stored JSON text of `ref`."""
+        digest = ref["sha256"]
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return self._cache[digest]
+        with open(os.path.join(self.object_dir, f"{digest}.json"), "r") as f:
+            text = f.read()
+        with self._lock:
+            self._remember(digest, text)
+        return text
+
+    def get(self, ref):
+        """A fresh copy of the value `ref` points to."""
+        return json.loads(self.text(ref))
+
+    def history(self, kind):
+        """Every stored version of `kind`, oldest first."""
+        return list(self.index.get(kind, []))
+
+_stores = {}
+
+def get_artifact_store(root=None):
+    """Returns the artifact store for `root` (the current workspace root by default)."""
+    root = os.path.abspath(root or get_workspace_root())
+    if root not in _stores:
+        _stores[root] = ArtifactStore(root)
+    return _stores[root]
+
+def store_artifact(kind, value, iteration=0):
+    """Stores `value` in the current workspace's store; None is kept as is."""
+    if value is None:
+        return None
+    return get_artifact_store().put(kind, value, iteration)
+
+def load_artifact(value):
+    """Resolves an artifact reference; any other value is returned unchanged."""
+    return get_artifact_store().get(value) if is_artifact(value) else value
+
+def artifact_text(value):
+    """The JSON text of an artifact reference or plain value, as it goes into prompts."""
+    return get_artifact_store().text(value) if is_artifact(value) else json.dumps(value, indent=4)
@@ -0,0 +1,102 @@
+"""Best-of-N implementer candidates.
+
+Each candidate runs the implementer against the same plan in its own copy of
+the workspace (tools resolve paths through the context's workspace root), then
+the project's tests run in that copy. Candidates run concurrently, so one round
+costs about as much wall-clock time as a single iteration. The candidate with the
+best pass rate wins, ties going to the smallest diff; its changes are promoted
+into the main workspace through the journal, so the usual regression check and
+rollback apply to them.
+"""
+import contextvars
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from rich import print
+from .pytest_runner import run_pytest
+from .workspace import get_journal, release_journal, reset_workspace_root, set_workspace_root
+from .utils import log_event
+
+IGNORED = shutil.ignore_patterns(".aide", ".git", "__pycache__", ".pytest_cache", ".venv", "venv", "node_modules")
+CANDIDATE_DIR = os.path.join(tempfile.gettempdir(), "aide-candidates")
+
+def create_candidate_workspace(source, index):
+    """Copies `source` (without VCS, caches and the journal) into a fresh temporary directory."""
+    os.makedirs(CANDIDATE_DIR, exist_ok=True)
+    root = tempfile.mkdtemp(prefix=f"{index}-", dir=CANDIDATE_DIR)
+    shutil.copytree(source, root, ignore=IGNORED, symlinks=True, dirs_exist_ok=True)
+    return root
+
+def pass_rate(pytest_report):
+    summary = pytest_report["report"]["summary"]
+    return summary.get("passed", 0) / summary["total"] if summary.get("total") else 0.0
+
+def run_candidate(index, root, iteration, implement):
+    """Runs `implement(index)` with tools working in `root`, then runs the tests there; its return value is kept as `result`."""
+    token = set_workspace_root(root)
+    try:
+        journal = get_journal(root)
+        journal.begin(iteration)
+        result = implement(index)
+        pytest_report = run_pytest("tests" if os.path.isdir(os.path.join(root, "tests")) else ".", cwd=root)
+        return {
+            "index": index,
+            "root": root,
+            "result": result,
+            "pytest_report": pytest_report,
+            "pass_rate": pass_rate(pytest_report),
+            "diff_size": journal.diff_size(iteration),
+            "changed_files": sorted(journal.changed_files(iteration)),
+        }
+    except Exception as e:
+        print(f"[bold red]Candidate {index} failed: {e}[/bold red]")
+        return {"index": index, "root": root, "error": str(e), "pass_rate": -1.0, "diff_size": 0, "changed_files": []}
+    finally:
+        reset_workspace_root(token)
+
+def select_best(candidates):
+    """Highest pass rate wins; ties go to the smallest diff, then to the lowest index."""
+    return max(candidates, key=lambda c: (c["pass_rate"], -c["diff_size"], -c["index"]))
+
+def promote(candidate, iteration, root="."):
+    """Copies the candidate's changed files into `root`, recording them in `root`'s journal."""
+    journal = get_journal(root)
+    journal.begin(iteration)
+    promoted = []
+    for path in candidate["changed_files"]:
+        source, target = os.path.join(candidate["root"], path), os.path.join(os.path.abspath(root), path)
+        journal.capture(target)
+        if os.path.exists(source):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+            promoted.append(target)
+        elif os.path.exists(target):
+            os.remove(target)
+        journal.record(target)
+    return promoted
+
+def run_candidates(count, implement, iteration, root="."):
+    """Runs `count` candidates concurrently and promotes the best one into `root`.
+
+    `implement(index)` runs one implementer attempt. Returns the winning candidate
+    (with the paths it wrote in `promoted`) and the summaries of all candidates.
+    """
+    print(f"[bold blue]Running {count} implementer candidates in parallel...[/bold blue]")
+    roots = [create_candidate_workspace(root, index) for index in range(count)]
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, run_candidate, index, candidate_root, iteration, implement)
+            for index, candidate_root in enumerate(roots)
+        ]
+        candidates = [future.result() for future in futures]
+    winner = select_best(candidates)
+    summaries = [{k: c[k] for k in ("index", "pass_rate", "diff_size", "changed_files")} for c in candidates]
+    print(f"[bold green]Candidate {winner['index']} selected (pass rate {winner['pass_rate']:.0%}, {winner['diff_size']} changed lines).[/bold green]")
+    log_event("candidates_selected", {"iteration": iteration, "winner": winner["index"], "candidates": summaries})
+    winner["promoted"] = promote(winner, iteration, root)
+    for candidate_root in roots:
+        release_journal(candidate_root)
+        shutil.rmtree(candidate_root, ignore_errors=True)
+    return winner, summaries
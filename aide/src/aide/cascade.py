@@ -0,0 +1,125 @@
+"""Model cascade between a fast and a strong model tier.
+
+A `ModelCascade` holds the tiers in order of cost (e.g. flash, then pro) and
+decides, per node, which tier an agent turn starts with: the cheapest tier whose
+running success rate at that node is above the threshold (or a stronger one that
+has proven faster there). A turn escalates to the
+next tier when the answer is not valid JSON or reports a low `confidence`, after
+the files the failed turn wrote are restored (a turn that ran commands or
+services can't be undone, so it is not escalated); nodes can also ask to start
+at the strongest tier (e.g. after repeated test failures).
+Every few calls a node that has moved up is given one turn on the tier below it,
+so a model that was only briefly unreliable can win the node back.
+
+Statistics are kept per node and model as exponentially weighted averages of
+success and latency, and optionally persisted as JSON so they survive restarts.
+"""
+import json
+import os
+import threading
+import time
+
+class ModelStats:
+    def __init__(self, path=None, alpha=0.2):
+        self.path = path
+        self.alpha = alpha
+        self.lock = threading.Lock()
+        self.data = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.data = {}
+
+    def get(self, node, model):
+        return self.data.get(node, {}).get(model)
+
+    def record(self, node, model, success, latency=None):
+        """Updates the running success rate (and latency, in seconds) of `model` at `node`."""
+        with self.lock:
+            entry = self.data.setdefault(node, {}).setdefault(
+                model, {"calls": 0, "successes": 0, "success_rate": None, "latency": None})
+            entry["calls"] += 1
+            entry["successes"] += int(success)
+            # Start optimistic, so one bad answer does not take a model off a node.
+            previous = 1.0 if entry["success_rate"] is None else entry["success_rate"]
+            entry["success_rate"] = (1 - self.alpha) * previous + self.alpha * float(success)
+            if latency is not None:
+                entry["latency"] = latency if entry["latency"] is None else (1 - self.alpha) * entry["latency"] + self.alpha * latency
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(self.data, f, indent=4)
+        except OSError:
+            pass
+
+class TimedModel:
+    """Wraps a chat model and accumulates the time spent in `invoke`."""
+    def __init__(self, llm):
+        self.llm = llm
+        self.elapsed = 0.0
+
+    def invoke(self, messages):
+        start = time.perf_counter()
+        try:
+            return self.llm.invoke(messages)
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+class ModelCascade:
+    def __init__(self, tiers, stats=None, threshold=0.6, min_confidence=0.5, explore_every=10, priors=None):
+        """`tiers` is a list of (model_name, model) from cheapest to strongest.
+
+        `priors` maps model names to the success rate assumed before a node has used them (1.0 by default).
+        """
+        self.tiers = list(tiers)
+        self.stats = stats or ModelStats()
+        self.threshold = threshold
+        self.min_confidence = min_confidence
+        self.explore_every = explore_every
+        self.priors = priors or {}
+        self.calls = {}
+
+    def _success_rate(self, node, model):
+        entry = self.stats.get(node, model)
+        if not entry or entry["success_rate"] is None:
+            return self.priors.get(model, 1.0)
+        return entry["success_rate"]
+
+    def _latency(self, node, index):
+        return (self.stats.get(node, self.tiers[index][0]) or {}).get("latency")
+
+    def plan(self, node, escalate=False):
+        """Returns the tiers to try for one turn at `node`, in order."""
+        if escalate:
+            return self.tiers[-1:]
+        eligible = [i for i, (model, _) in enumerate(self.tiers) if self._success_rate(node, model) >= self.threshold]
+        start = eligible[0] if eligible else len(self.tiers) - 1
+        for i in eligible[1:]:
+            # A stronger tier only takes over if it has been measured to be clearly faster at this node:
+            # timings of a few calls differ by noise, which must not flip the routing back and forth.
+            latency, start_latency = self._latency(node, i), self._latency(node, start)
+            if latency is not None and start_latency is not None and latency < 0.8 * start_latency:
+                start = i
+        self.calls[node] = self.calls.get(node, 0) + 1
+        if start > 0 and self.calls[node] % self.explore_every == 0:
+            start -= 1
+        return self.tiers[start:]
+
+    def record(self, node, model, success, latency=None):
+        self.stats.record(node, model, success, latency)
+
+    def report_outcome(self, turn, success):
+        """Records a later verdict (e.g. the test run after an implementer turn) on `turn`, the (node, model) an agent ran."""
+        node, model = turn
+        self.stats.record(node, model, success)
+
+    def confident(self, result):
+        confidence = result.get("confidence") if isinstance(result, dict) else None
+        return not isinstance(confidence, (int, float)) or confidence >= self.min_confidence
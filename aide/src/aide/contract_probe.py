@@ -0,0 +1,230 @@
+"""Contract probes generated from the project's OpenAPI schema.
+
+One probe is built per path and method: path and query parameters and request
+bodies are filled with example values derived from their schemas, and the
+documented responses become the expectation. Probes run over a pooled
+`requests.Session`: the safe methods concurrently, the mutating ones one at a
+time around them, in create, read, update, delete order, so that a read never
+races a delete of the same resource. Each result records the status code,
+whether the response body has the documented shape, and the request latency.
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .openapi_diff import operations, schema_of_content
+
+STRING_FORMATS = {
+    "date-time": "2024-01-01T00:00:00Z",
+    "date": "2024-01-01",
+    "email": "user@example.com",
+    "uuid": "00000000-0000-4000-8000-000000000000",
+    "uri": "http://example.com",
+}
+
+# Phase of each method: creates, then the reads (the only phase run concurrently), then updates, then deletes.
+METHOD_PHASES = {"POST": 0, "GET": 1, "HEAD": 1, "OPTIONS": 1, "PUT": 2, "PATCH": 2, "DELETE": 3}
+READ_PHASE = 1
+
+# --- Example values ---
+
+def example_for(schema, name=None, depth=0):
+    """Returns a value that satisfies `schema` (a resolved JSON schema)."""
+    schema = schema or {}
+    for key in ("example", "default", "const"):
+        if key in schema:
+            return schema[key]
+    if schema.get("examples"):
+        examples = schema["examples"]
+        return examples[0] if isinstance(examples, list) else next(iter(examples.values()), None)
+    if schema.get("enum"):
+        return schema["enum"][0]
+    if schema.get("allOf"):
+        merged = {}
+        for part in schema["allOf"]:
+            value = example_for(part, name, depth + 1)
+            if isinstance(value, dict):
+                merged.update(value)
+        return merged
+    for combinator in ("oneOf", "anyOf"):
+        variants = [v for v in schema.get(combinator) or [] if v.get("type") != "null"]
+        if variants:
+            return example_for(variants[0], name, depth + 1)
+    kind = schema.get("type") or ("object" if "properties" in schema else "string")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "string")
+    if kind == "object":
+        if depth > 5 or "$circular" in schema:
+            return {}
+        return {prop: example_for(sub, prop, depth + 1) for prop, sub in (schema.get("properties") or {}).items()}
+    if kind == "array":
+        return [example_for(schema.get("items"), name, depth + 1)] * max(schema.get("minItems", 1), 1)
+    if kind == "integer":
+        return schema.get("minimum", min(schema.get("maximum", 1), 1))
+    if kind == "number":
+        return float(schema.get("minimum", 1.0))
+    if kind == "boolean":
+        return True
+    value = STRING_FORMATS.get(schema.get("format"), name or "example")
+    return value.ljust(schema.get("minLength", 0), "x")
+
+# --- Response shape ---
+
+def check_shape(schema, value, location="body"):
+    """Yields a description of every place where `value` does not match `schema`."""
+    if not schema or "$circular" in schema:
+        return
+    if schema.get("nullable") and value is None:
+        return
+    for combinator in ("oneOf", "anyOf"):
+        if schema.get(combinator):
+            if not any(not list(check_shape(v, value, location)) for v in schema[combinator]):
+                yield f"{location}: matches none of the {combinator} variants"
+            return
+    for part in schema.get("allOf") or []:
+        yield from check_shape(part, value, location)
+    kind = schema.get("type") or ("object" if "properties" in schema else None)
+    kinds = kind if isinstance(kind, list) else [kind] if kind else []
+    if kinds and not any(_is_type(value, k) for k in kinds):
+        yield f"{location}: expected {'/'.join(kinds)}, got {type(value).__name__}"
+        return
+    if schema.get("enum") and value not in schema["enum"]:
+        yield f"{location}: {value!r} is not one of {schema['enum']}"
+    if isinstance(value, dict):
+        for prop in schema.get("required") or []:
+            if prop not in value:
+                yield f"{location}.{prop}: required field missing"
+        for prop, sub in (schema.get("properties") or {}).items():
+            if prop in value:
+                yield from check_shape(sub, value[prop], f"{location}.{prop}")
+    if isinstance(value, list) and schema.get("items"):
+        for index, item in enumerate(value[:20]):
+            yield from check_shape(schema["items"], item, f"{location}[{index}]")
+
+def _is_type(value, kind):
+    if kind == "null":
+        return value is None
+    if kind == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if kind == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, {"string": str, "boolean": bool, "array": list, "object": dict}.get(kind, object))
+
+# --- Probes ---
+
+def build_probes(schema):
+    """Builds one probe per operation of a resolved OpenAPI document."""
+    probes = []
+    for (path, method), (path_item, operation) in sorted(operations(schema).items()):
+        url_path, query = path, {}
+        for param in (path_item.get("parameters") or []) + (operation.get("parameters") or []):
+            value = param.get("example", example_for(param.get("schema"), param.get("name")))
+            if param.get("in") == "path":
+                url_path = url_path.replace("{" + param["name"] + "}", quote(str(value), safe=""))
+            elif param.get("in") == "query" and param.get("required"):
+                query[param["name"]] = value
+        body_schema = schema_of_content((operation.get("requestBody") or {}).get("content"))
+        responses = operation.get("responses") or {}
+        probes.append({
+            "method": method.upper(),
+            "path": path,
+            "url_path": url_path,
+            "params": query,
+            "json": example_for(body_schema) if body_schema is not None else None,
+            "expected_status": sorted(responses),
+            "responses": {status: schema_of_content((r or {}).get("content")) for status, r in responses.items()},
+        })
+    return probes
+
+def _status_documented(status_code, documented):
+    code = str(status_code)
+    if code in documented or f"{code[0]}XX" in documented:
+        return True
+    return "default" in documented and status_code < 500
+
+def make_session(pool_size=10):
+    """A `requests.Session` whose connection pool is large enough for `pool_size` concurrent probes."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def _response_problems(probe, response):
+    problems = []
+    if not _status_documented(response.status_code, probe["expected_status"]):
+        problems.append(f"status {response.status_code} is not documented (expected one of {probe['expected_status']})")
+    response_schema = probe["responses"].get(str(response.status_code))
+    if response_schema is not None:
+        try:
+            body = response.json()
+        except ValueError:
+            problems.append("response body is not JSON")
+        else:
+            problems.extend(check_shape(response_schema, body))
+    return problems
+
+def run_probe(session, base_url, probe, timeout=10, repeat=1):
+    """Fires `probe` `repeat` times and returns its result; every response is checked."""
+    result = {"method": probe["method"], "path": probe["path"], "expected_status": probe["expected_status"],
+              "status_code": None, "passed": False, "problems": [], "latency_ms": None}
+    latencies = []
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        try:
+            response = session.request(probe["method"], base_url.rstrip("/") + probe["url_path"],
+                                       params=probe["params"], json=probe["json"], timeout=timeout)
+        except requests.RequestException as e:
+            result["problems"] = [f"request failed: {e}"]
+            return result
+        latencies.append((time.perf_counter() - start) * 1000)
+        problems = _response_problems(probe, response)
+        if problems:
+            result["failed_requests"] = result.get("failed_requests", 0) + 1
+        # The first failing response is reported: an endpoint that fails only sometimes still fails.
+        if not result["problems"]:
+            result["status_code"], result["problems"] = response.status_code, problems
+    result["latency_ms"] = {"median": round(statistics.median(latencies), 2), "max": round(max(latencies), 2)}
+    result["passed"] = not result["problems"]
+    return result
+
+def run_probes(schema, base_url, concurrency=8, timeout=10, repeat=1, session=None):
+    """
+    Runs a probe for every operation in `schema` and summarizes the results: safe methods concurrently,
+    mutating ones sequentially in create, update, delete order around them.
+    """
+    probes = build_probes(schema)
+    owned = session is None
+    session = session or make_session(concurrency)
+    start = time.perf_counter()
+    results = [None] * len(probes)
+
+    def probe(index):
+        return run_probe(session, base_url, probes[index], timeout, repeat)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+            for phase in sorted(set(METHOD_PHASES.values())):
+                indices = [i for i, p in enumerate(probes) if METHOD_PHASES.get(p["method"], 2) == phase]
+                for index, result in zip(indices, (pool.map if phase == READ_PHASE else map)(probe, indices)):
+                    results[index] = result
+    finally:
+        if owned:
+            session.close()
+    failed = [r for r in results if not r["passed"]]
+    latencies = sorted(r["latency_ms"]["median"] for r in results if r["latency_ms"])
+    return {
+        "status": "failed" if failed else "passed",
+        "passed": len(results) - len(failed),
+        "failed": len(failed),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+        "latency_ms": {
+            "p50": latencies[len(latencies) // 2] if latencies else None,
+            "max": latencies[-1] if latencies else None,
+        },
+        "endpoints": results,
+    }
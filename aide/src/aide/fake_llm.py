@@ -0,0 +1,63 @@
+"""A scripted chat model for running agents and the graph offline.
+
+`FakeChatModel` implements the two methods the agents use, `bind_tools` and
+`invoke`. Its script is a list of `(pattern, responses)` pairs: the first pattern
+(a regex) found in the conversation's opening prompt selects the responses, and
+the number of model turns already in the conversation selects the response
+within them, so a ReAct loop can be scripted as "call these tools, then answer".
+The last response repeats if the conversation goes on longer.
+
+A response is a string (the message content), a dict with `content` and
+`tool_calls` (each `{"name": ..., "args": ...}`), or a callable taking the
+messages and returning either.
+"""
+import itertools
+import json
+import re
+import threading
+import time
+
+from langchain_core.messages import AIMessage
+
+class FakeChatModel:
+    def __init__(self, script, default="{}", latency=0.0):
+        self.script = [(re.compile(pattern), responses if isinstance(responses, list) else [responses])
+                       for pattern, responses in script]
+        self.default = default
+        self.latency = latency
+        self.tools = []
+        self.calls = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def bind_tools(self, tools, **kwargs):
+        self.tools = list(tools)
+        return self
+
+    def invoke(self, messages):
+        prompt = str(messages[0].content) if messages else ""
+        turn = sum(isinstance(m, AIMessage) for m in messages)
+        pattern, response = None, self.default
+        for candidate, responses in self.script:
+            if candidate.search(prompt):
+                pattern, response = candidate.pattern, responses[min(turn, len(responses) - 1)]
+                break
+        with self._lock:
+            self.calls.append({"pattern": pattern, "turn": turn})
+        if self.latency:
+            time.sleep(self.latency)
+        if callable(response):
+            response = response(messages)
+        return self._message(response)
+
+    def _message(self, response):
+        if isinstance(response, str):
+            return AIMessage(content=response)
+        content = response.get("content", "")
+        if not isinstance(content, str):
+            content = json.dumps(content)
+        tool_calls = [
+            {"name": call["name"], "args": call.get("args", {}), "id": call.get("id") or f"call_{next(self._ids)}"}
+            for call in response.get("tool_calls", [])
+        ]
+        return AIMessage(content=content, tool_calls=tool_calls)
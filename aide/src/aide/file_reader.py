@@ -0,0 +1,123 @@
+"""Cached, ranged file reads for `read_file_tool`.
+
+Agents often read the same file several times in a turn, and only need a slice
+of large generated or log files. `FileReader` keeps small files' bytes in an LRU
+cache bounded by `max_bytes`, and memory-maps files above `mmap_threshold`
+instead of reading them whole. For each file it builds, once, an index of the
+byte offsets where lines start, so a line range is a single slice however deep
+into the file it is.
+
+Entries are keyed by the file's `(st_mtime_ns, st_size)` and dropped when either
+changes; tools that write files also call `invalidate`, which covers rewrites
+within the filesystem's timestamp granularity.
+"""
+import contextlib
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+
+MMAP_THRESHOLD = 4 * 1024 * 1024
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+
+def _decode(data):
+    """Decodes like a text-mode read: UTF-8 with universal newlines."""
+    return data.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+
+def line_starts(buffer):
+    """Byte offsets at which each line of `buffer` starts."""
+    starts = array("q", [0])
+    position = buffer.find(b"\n")
+    while position != -1:
+        starts.append(position + 1)
+        position = buffer.find(b"\n", position + 1)
+    return starts
+
+class FileReader:
+    def __init__(self, max_bytes=MAX_CACHE_BYTES, mmap_threshold=MMAP_THRESHOLD):
+        self.max_bytes = max_bytes
+        self.mmap_threshold = mmap_threshold
+        self._entries = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, path):
+        with self._lock:
+            self._drop(os.path.abspath(path))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._cached_bytes = 0
+
+    def _drop(self, path):
+        entry = self._entries.pop(path, None)
+        if entry and entry["data"] is not None:
+            self._cached_bytes -= len(entry["data"])
+
+    def _entry(self, path):
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry["key"] == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+            self._drop(path)
+            self.misses += 1
+        data = None
+        if stat.st_size <= self.mmap_threshold:
+            with open(path, "rb") as f:
+                data = f.read()
+        entry = {"key": key, "size": stat.st_size, "data": data, "lines": None}
+        with self._lock:
+            self._entries[path] = entry
+            if data is not None:
+                self._cached_bytes += len(data)
+            while self._cached_bytes > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+        return entry
+
+    @contextlib.contextmanager
+    def _buffer(self, path, entry):
+        if entry["data"] is not None:
+            yield entry["data"]
+            return
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+    def read(self, path, start_line=None, end_line=None, offset=None, length=None):
+        """
+        Reads `path` whole, by 1-based inclusive line range, or by byte `offset` and `length`.
+        Ranged reads start with a header giving the range and the file's size.
+        """
+        path = os.path.abspath(path)
+        entry = self._entry(path)
+        with self._buffer(path, entry) as buffer:
+            if offset is not None or length is not None:
+                start = min(max(offset or 0, 0), entry["size"])
+                end = entry["size"] if length is None else min(start + max(length, 0), entry["size"])
+                header = f"[Bytes {start}-{end} of {entry['size']}]\n"
+                return header + buffer[start:end].decode("utf-8", errors="replace")
+            if start_line is None and end_line is None:
+                return _decode(buffer[:])
+            if entry["lines"] is None:
+                entry["lines"] = line_starts(buffer)
+            starts = entry["lines"]
+            total = len(starts) - 1 if starts[-1] == entry["size"] else len(starts)
+            first = max(start_line or 1, 1)
+            last = min(end_line or total, total)
+            header = f"[Lines {first}-{last} of {total}]\n"
+            if first > last:
+                return header
+            end = starts[last] if last < len(starts) else entry["size"]
+            return header + _decode(buffer[starts[first - 1]:end])
+
+_reader = FileReader()
+
+def get_file_reader():
+    return _reader
@@ -1,4 +1,6 @@
 import os
+import re
+import uuid
 from typing import TypedDict, List, Annotated
 import json
 from langgraph.graph import StateGraph, END, START
@@ -15,14 +17,27 @@ from .models import (
 )
 from .tools import (
     build_code_map_tool,
+    code_map_files,
     load_schema_tool,
+    pop_written_files,
+    profile_tool,
+    WRITTEN_FILES,
 )
-from .utils import check_for_user_input
+from .candidates import CANDIDATE_DIR, run_candidates
+from .microbench import benchmark_iteration, find_benchmarks
+from .prefetch import collect_prefetch, file_fingerprint, start_prefetch
+from .pytest_runner import run_pytest
+from .workspace import get_journal
+from .artifacts import artifact_text, load_artifact, store_artifact
+from .static_check import check_files, problems_to_feedback
+from .router_classifier import classify as classify_request
+from .utils import ask_user, check_for_user_input, log_event
 
 # --- Graph State ---
 
 class AppState(TypedDict):
     user_request: str
+    run_id: str
     app_root: str
     policy: str
     spec: dict
@@ -31,27 +46,62 @@ class AppState(TypedDict):
     api_schema: dict
     critic_feedback: Annotated[List[dict], lambda _, y: y]
     user_feedback_queue: List[str]
+    user_input_timeout: float
+    router_confidence_threshold: float
+    candidates: int
+    candidate_pytest_report: dict
+    implementer_turn: tuple
     iteration_count: int
     max_iterations: int
     run_performance_test: bool
     test_report: dict
+    static_check_failures: List[dict]
+    test_failure_streak: int
     performance_report: dict
+    profile_report: dict
+    benchmark_report: dict
     final_summary: str
 
+# Workspace context the implementer needs regardless of the plan: loaded in the background
+# from the start of the run (see prefetch.py) and collected by context_node, which every
+# policy that reaches the implementer passes through before its first use.
+CONTEXT_TASKS = {
+    "code_map": (lambda: build_code_map_tool.invoke({}), lambda: file_fingerprint(code_map_files())),
+    "api_schema": (lambda: load_schema_tool.invoke({}), lambda: file_fingerprint(["api_schema.json"])),
+}
+
 # --- Agent Nodes ---
 
 def router_node(state: AppState):
-    print("--- Calling Router Agent ---")
-    router_agent = Agent(llm_default, default_tools_map, "aide/prompts/router_prompt.txt", app_root=state["app_root"])
-    result = router_agent.run(user_input=state["user_request"])
-    policy = result.get("policy", "implement") if result else "implement"
-    return {"policy": policy, "iteration_count": 0}
+    run_id = state.get("run_id") or uuid.uuid4().hex[:12]
+    get_journal().start_run(run_id)
+    start_prefetch(CONTEXT_TASKS)
+    threshold = state.get("router_confidence_threshold", 0.8)
+    local_policy, confidence, source = classify_request(state["user_request"])
+    if local_policy and confidence >= threshold:
+        print(f"--- Routed locally: {local_policy} (confidence {confidence}, {source}) ---")
+        policy = local_policy
+    else:
+        print("--- Calling Router Agent ---")
+        router_agent = Agent(llm_default, default_tools_map, "aide/prompts/router_prompt.txt", app_root=state["app_root"])
+        result = router_agent.run(user_input=state["user_request"])
+        policy = result.get("policy", "implement") if result else "implement"
+        source = "llm"
+    log_event("routing_decision", {
+        "user_request": state["user_request"],
+        "policy": policy,
+        "source": source,
+        "local_policy": local_policy,
+        "local_confidence": confidence,
+        "threshold": threshold,
+    })
+    return {"policy": policy, "iteration_count": 0, "run_id": run_id}
 
 def spec_node(state: AppState):
     print("--- Calling Spec Agent ---")
     spec_agent = Agent(llm_default, default_tools_map, "aide/prompts/spec_prompt.txt", "spec.json", app_root=state["app_root"])
     spec = spec_agent.run(user_input=state["user_request"])
-    return {"spec": spec}
+    return {"spec": store_artifact("spec", spec, state.get("iteration_count", 0))}
 
 def generate_plan_prompt():
     return """You are a senior software developer acting as a planner. Your job is to take a technical specification and produce a concrete, step-by-step plan for implementation.
@@ -95,70 +145,82 @@ def plan_node(state: AppState):
     with open(full_prompt_path, "w") as f:
         f.write(prompt_content)
     plan_agent = Agent(llm_default, default_tools_map, prompt_path, "plan.json", app_root=state["app_root"])
-    plan = plan_agent.run(spec=json.dumps(state["spec"], indent=4))
-    return {"plan": plan}
+    plan = plan_agent.run(spec=artifact_text(state["spec"]))
+    return {"plan": store_artifact("plan", plan, state.get("iteration_count", 0))}
 
 def research_node(state: AppState):
     print("--- Calling Research Agent ---")
     research_agent = Agent(llm_default, default_tools_map, "aide/prompts/research_prompt.txt", "spec.json", app_root=state["app_root"])
-    spec = research_agent.run(user_input=state["user_request"], plan=json.dumps(state["plan"], indent=4))
-    return {"spec": spec}
+    spec = research_agent.run(user_input=state["user_request"], plan=artifact_text(state["plan"]))
+    return {"spec": store_artifact("spec", spec, state.get("iteration_count", 0))}
+
+# The debug policy has no plan step: it fixes what the test report shows.
+DEBUG_PLAN = {"fix": "Analyze the test report and fix the code based on the errors."}
 
 def debug_node(state: AppState):
     print("--- Calling Debug Implementer ---")
-    debug_agent = Agent(llm_implementer, implementer_tools_map, "aide/prompts/debug_implementer_prompt.txt", app_root=state["app_root"])
+    get_journal().begin(state["iteration_count"] + 1)
+    debug_agent = Agent(llm_implementer, implementer_tools_map, "aide/prompts/debug_implementer_prompt.txt", app_root=state["app_root"],
+                        escalate=needs_stronger_model(state))
     debug_agent.run(
-        spec=json.dumps(state["spec"], indent=4),
-        plan=json.dumps({"fix": "Analyze the test report and fix the code based on the errors."}, indent=4),
-        code_map=json.dumps(state["code_map"], indent=4),
-        api_schema=json.dumps(state["api_schema"], indent=4),
+        spec=artifact_text(state["spec"]),
+        plan=json.dumps(DEBUG_PLAN, indent=4),
+        code_map=artifact_text(state["code_map"]),
+        api_schema=artifact_text(state["api_schema"]),
         critic_feedback=state.get("critic_feedback", ""),
         user_feedback="\n".join(state.get("user_feedback_queue", [])),
-        test_report=json.dumps(state.get("test_report", {}), indent=4)
+        test_report=artifact_text(state.get("test_report", {}))
     )
-    return {"iteration_count": state["iteration_count"] + 1}
+    return {"iteration_count": state["iteration_count"] + 1, "implementer_turn": debug_agent.turn}
 
 def refactor_node(state: AppState):
     print("--- Calling Refactor Implementer ---")
     refactor_agent = Agent(llm_refactor, implementer_tools_map, "aide/prompts/refactor_implementer_prompt.txt", app_root=state["app_root"])
     plan_agent = Agent(llm_default, default_tools_map, "aide/prompts/plan_prompt.txt", "plan.json", app_root=state["app_root"])
-    plan = plan_agent.run(spec=json.dumps(state["spec"], indent=4))
+    plan = plan_agent.run(spec=artifact_text(state["spec"]))
     if not plan:
         return {"plan": {"error": "Failed to generate a refactoring plan."}}
+    get_journal().begin(state["iteration_count"] + 1)
     refactor_agent.run(
-        spec=json.dumps(state["spec"], indent=4),
+        spec=artifact_text(state["spec"]),
         plan=json.dumps(plan, indent=4),
-        code_map=json.dumps(state["code_map"], indent=4),
-        api_schema=json.dumps(state["api_schema"], indent=4),
+        code_map=artifact_text(state["code_map"]),
+        api_schema=artifact_text(state["api_schema"]),
         user_feedback="\n".join(state.get("user_feedback_queue", [])),
     )
-    return {"plan": plan, "iteration_count": state["iteration_count"] + 1}
+    return {"plan": store_artifact("plan", plan, state["iteration_count"] + 1), "iteration_count": state["iteration_count"] + 1,
+            "implementer_turn": refactor_agent.turn}
 
 def generate_implementer_prompt():
     return """You are an expert software developer. Your task is to implement the software described in the specification, following the provided plan.
 
 You have access to the following tools:
 - `write_file_tool(path, content)`: Writes content to a file.
-- `read_file_tool(path)`: Reads the content of a file.
+- `apply_patch_tool(patch)`: Applies a unified diff or SEARCH/REPLACE blocks to one or more existing files, atomically.
+- `read_file_tool(path, start_line, end_line, offset, length)`: Reads a file, or only a range of its lines or bytes.
+- `read_observation_tool(observation_id, offset, limit, column)`: Pages through a long tool output that was shortened to an excerpt.
+- `lookup_symbol_tool(name)`: Returns the location, signature, docstring and source of a function, class or method (e.g. `add`, `Cart.total`).
+- `search_code_tool(query)`: Returns the snippets of the functions and classes most related to a query.
 - `command_runner_tool(command)`: Executes a shell command.
 - `web_search_tool(query)`: Searches the web for information.
 - `websocket_test_tool(uri, message)`: Connects to a WebSocket, sends a message, and returns the response.
-- `docker_compose_up_tool(compose_file)`: Starts services using Docker Compose.
-- `docker_compose_down_tool(compose_file)`: Stops services using Docker Compose.
+- `service_start_tool(name, command, ready_url, ready_port, watch, timeout)`: Starts a long-lived service (a dev server, or `docker compose up` without `-d`) and waits until it is ready; a running service is reused, and restarted only when its watched files change.
+- `service_logs_tool(name, lines, offset)`: Tails a service's log.
 
 **Instructions:**
 1.  **Strictly Adhere to the API Schema:** The provided API Schema is the source of truth. Your implementation **must** match the endpoints, data models, and status codes defined in it. Any deviation is a failure.
-2.  Consult the **Code Map** to understand existing code and avoid duplication.
+2.  Consult the **Code Map** to understand existing code and avoid duplication. To see existing code, prefer `lookup_symbol_tool` and `search_code_tool` over reading whole files.
 3.  Follow the plan step by step. Your job is to **write the code**.
 4.  **Do not run any tests or build any images.** That is the Tester agent's job.
 5.  If the plan includes a `Dockerfile`, create it. Otherwise, you can skip it.
 6.  If you encounter an error, an unknown library, or an ambiguous requirement, use the `web_search_tool` to find information before proceeding.
-7.  If you receive feedback from the critic, address it carefully.
-8.  When you have finished writing all the code, you must respond with a JSON object containing a list of tool calls that will create the files.
+7.  If you receive feedback from the critic, address it carefully. If there is a **Profile Report**, optimize the functions it lists as hot and the allocation sites it lists, starting with the largest; don't guess at other bottlenecks.
+8.  **To change an existing file, use `apply_patch_tool` with only the lines that change** instead of rewriting the whole file with `write_file_tool`. Use `write_file_tool` for new files.
+9.  When you have finished writing all the code, you must respond with a JSON object containing a list of tool calls that will create or patch the files.
 
 **Expected Output Format:**
 
-You must respond with a single JSON object. This object should contain a key "tool_calls", which is a list of dictionaries. Each dictionary represents a single tool call.
+You must respond with a single JSON object. This object should contain a key "tool_calls", which is a list of dictionaries. Each dictionary represents a single tool call. Add a "confidence" key (0 to 1) saying how sure you are that the changes satisfy the plan.
 
 ```json
 {{
@@ -176,6 +238,12 @@ You must respond with a single JSON object. This object should contain a key "to
         "path": "tests/test_calculator.py",
         "content": "import calculator\n\ndef test_add():\n    assert calculator.add(2, 3) == 5\n"
       }}
+    }},
+    {{
+      "tool_name": "apply_patch_tool",
+      "args": {{
+        "patch": "utils.py\n<<<<<<< SEARCH\n    return round(value)\n=======\n    return round(value, 2)\n>>>>>>> REPLACE\n"
+      }}
     }}
   ]
 }}
@@ -196,10 +264,24 @@ You must respond with a single JSON object. This object should contain a key "to
 **Critic Feedback:**
 {critic_feedback}
 
+**Profile Report:**
+{profile_report}
+
 **User Feedback:**
 {user_feedback}
 """
 
+def drain_user_feedback(state: AppState):
+    """Returns the feedback queue with anything the user typed since the last check, without blocking."""
+    new_feedback = check_for_user_input()
+    for line in new_feedback:
+        print(f"[bold green]Feedback received:[/bold green] {line}")
+    return state.get("user_feedback_queue", []) + new_feedback
+
+def needs_stronger_model(state: AppState):
+    """The implementer goes straight to the strongest model after repeated test failures."""
+    return (state.get("test_failure_streak") or 0) >= 2
+
 def implementer_node(state: AppState):
     policy = state["policy"]
     print(f"--- Calling Implementer Agent (Policy: {policy}, Iteration: {state['iteration_count'] + 1}) ---")
@@ -209,47 +291,181 @@ def implementer_node(state: AppState):
     os.makedirs(os.path.dirname(full_prompt_path), exist_ok=True)
     with open(full_prompt_path, "w") as f:
         f.write(prompt_content)
-    implementer_agent = Agent(llm_implementer, implementer_tools_map, prompt_path, app_root=state["app_root"])
+    get_journal().begin(state["iteration_count"] + 1)
+    user_feedback_queue = drain_user_feedback(state)
     agent_args = {
-        "spec": json.dumps(state["spec"], indent=4),
-        "plan": json.dumps(state["plan"], indent=4),
-        "code_map": json.dumps(state["code_map"], indent=4),
-        "api_schema": json.dumps(state["api_schema"], indent=4),
+        "spec": artifact_text(state["spec"]),
+        "plan": artifact_text(state["plan"]),
+        "code_map": artifact_text(state["code_map"]),
+        "api_schema": artifact_text(state["api_schema"]),
         "critic_feedback": state.get("critic_feedback", ""),
-        "user_feedback": "\n".join(state.get("user_feedback_queue", [])),
+        "profile_report": artifact_text(state.get("profile_report")),
+        "user_feedback": "\n".join(user_feedback_queue),
+    }
+
+    def implement(_=None):
+        """Runs one implementer turn; returns the (node, model) that produced the answer."""
+        implementer_agent = Agent(llm_implementer, implementer_tools_map, prompt_path, app_root=state["app_root"],
+                                  escalate=needs_stronger_model(state))
+        implementer_agent.run(**agent_args)
+        return implementer_agent.turn
+
+    candidate_pytest_report = None
+    if (state.get("candidates") or 1) > 1:
+        winner, _ = run_candidates(state["candidates"], implement, state["iteration_count"] + 1)
+        pop_written_files(CANDIDATE_DIR)  # writes inside the discarded copies
+        WRITTEN_FILES.update(winner["promoted"])
+        candidate_pytest_report = winner.get("pytest_report")
+        turn = winner.get("result")
+    else:
+        turn = implement()
+    return {
+        "iteration_count": state["iteration_count"] + 1,
+        "user_feedback_queue": user_feedback_queue,
+        "candidate_pytest_report": candidate_pytest_report,
+        "implementer_turn": turn,
     }
-    implementer_agent.run(**agent_args)
-    return {"iteration_count": state["iteration_count"] + 1}
 
 
+def static_check_node(state: AppState):
+    print("--- Running Static Checks ---")
+    changed_files = pop_written_files()
+    problems = check_files(changed_files, load_artifact(state.get("code_map")))
+    for warning in (p for p in problems if p["severity"] == "warning"):
+        print(f"[yellow]{warning['file']}:{warning['line']}: {warning['message']}[/yellow]")
+    problems = [p for p in problems if p["severity"] == "error"]
+    if not problems:
+        print(f"[bold green]Static checks passed ({len(changed_files)} files).[/bold green]")
+        return {"static_check_failures": []}
+    print(f"[bold red]Static checks failed with {len(problems)} problem(s). Returning to the implementer.[/bold red]")
+    for problem in problems:
+        print(f"[red]{problem['file']}:{problem['line']}: {problem['message']}[/red]")
+    log_event("static_check_failed", {"files": changed_files, "problems": problems})
+    get_journal().abandon(state["iteration_count"])
+    return {"static_check_failures": problems, "critic_feedback": problems_to_feedback(problems)}
+
+def check_for_regression(iteration: int, pytest_report: dict):
+    """Commits `iteration` if it did not break previously passing tests, otherwise rolls it back.
+
+    Returns the comparison with the last committed iteration, or None if there is none.
+    """
+    journal = get_journal()
+    journal.record_outcome(iteration, pytest_report)
+    previous = journal.last_committed(iteration)
+    comparison = journal.compare(previous, iteration) if previous is not None else None
+    if comparison and comparison["regressed"] and comparison["passed"][1] < comparison["passed"][0]:
+        restored = journal.rollback(iteration)
+        comparison["rolled_back"] = restored
+        print(f"[bold red]Iteration {iteration} broke {len(comparison['regressed'])} passing test(s); rolled back {len(restored)} file(s) to iteration {previous}.[/bold red]")
+        log_event("iteration_rolled_back", comparison)
+    else:
+        journal.commit(iteration)
+    return comparison
+
 def tester_node(state: AppState):
-    print("--- Calling Tester Agent ---")
+    print("--- Running Tests ---")
+    # With implementer candidates, the winner's tests already ran on exactly the promoted files.
+    pytest_report = state.get("candidate_pytest_report") or run_pytest("tests" if os.path.isdir("tests") else ".")
+    report = pytest_report["report"]
+    comparison = check_for_regression(state["iteration_count"], pytest_report)
+    if comparison:
+        report["comparison_with_previous_iteration"] = comparison
+    rolled_back = comparison is not None and "rolled_back" in comparison
+    # The attempt's own result decides the cascade feedback and the failure streak, even when it is rolled back.
+    attempt_passed = report["overall_status"] == "passed" and not rolled_back
+    if state.get("implementer_turn"):
+        # Every cascade records into the shared model_stats, so this covers debug and refactor turns too.
+        llm_implementer.report_outcome(state["implementer_turn"], attempt_passed)
+    streak = 0 if attempt_passed else (state.get("test_failure_streak") or 0) + 1
+    # The turn is reported once. The profile and benchmarks describe the code they measured, so they
+    # are dropped until profile_node and benchmark_node measure this iteration's passing code again.
+    outcome = {"test_failure_streak": streak, "implementer_turn": None, "profile_report": None, "benchmark_report": None}
+    if rolled_back:
+        # The tree is back at the previous iteration: report its outcome, with why the attempt was discarded.
+        previous_report = get_journal().outcome(comparison["iterations"][0])
+        pytest_report = {"report": dict(previous_report["report"], rejected_attempt=report)}
+        report = pytest_report["report"]
+    passed = report["overall_status"] == "passed"
+    if passed:
+        print(f"[bold green]All {report['summary']['total']} tests passed in {report['duration']}s. Skipping the tester agent.[/bold green]")
+        with open("test_report.json", "w") as f:
+            json.dump(pytest_report, f, indent=4)
+        return {"test_report": store_artifact("test_report", pytest_report, state["iteration_count"]), **outcome}
+
+    print(f"--- Calling Tester Agent (pytest status: {report['overall_status']}) ---")
     tester_agent = Agent(llm_tester, tester_tools_map, "aide/prompts/tester_prompt.txt", "test_report.json", app_root=state["app_root"])
-    test_report = tester_agent.run(spec=json.dumps(state["spec"], indent=4))
-    return {"test_report": test_report}
+    test_report = tester_agent.run(spec=artifact_text(state["spec"]), pytest_report=json.dumps(pytest_report, indent=4))
+    if not isinstance(test_report, dict):
+        return {"test_report": store_artifact("test_report", pytest_report, state["iteration_count"]), **outcome}
+    test_report["pytest"] = report
+    return {"test_report": store_artifact("test_report", test_report, state["iteration_count"]), **outcome}
+
+PERFORMANCE_GOAL = re.compile(
+    r"\b(latency|throughput|performance|faster|fastest|too slow|efficient(ly)?|requests per second|rps|p9\d|"
+    r"(memory|cpu) (usage|use|footprint|consumption|limit)|(low|lower|less|minimal|bounded|constant) memory|"
+    r"under \d+\s*(ms|s|seconds|mb)|within \d+\s*(ms|s|seconds)|\d+\s*ms\b|o\(n( log n)?\))",
+    re.IGNORECASE,
+)
+
+def has_performance_goals(spec):
+    """Whether the spec's acceptance criteria (or description) state performance goals."""
+    spec = load_artifact(spec)
+    if not isinstance(spec, dict):
+        return False
+    criteria = spec.get("acceptance_criteria") or []
+    text = " ".join([str(spec.get("description", ""))] + [str(c) for c in criteria])
+    return bool(PERFORMANCE_GOAL.search(text))
+
+def profile_node(state: AppState):
+    print("--- Profiling the Tests ---")
+    profile_report = profile_tool.invoke({"target": "tests" if os.path.isdir("tests") else "."})
+    if profile_report.get("hot_functions"):
+        top = profile_report["hot_functions"][0]
+        print(f"[bold blue]Hottest function: {top['function']} ({top['cumulative_time']}s cumulative)[/bold blue]")
+    return {"profile_report": store_artifact("profile_report", profile_report, state["iteration_count"])}
+
+def benchmark_node(state: AppState):
+    print("--- Running Microbenchmarks ---")
+    benchmark_report = benchmark_iteration(".", state["iteration_count"], run_id=state.get("run_id"))
+    for regression in benchmark_report.get("regressions", []):
+        print(f"[bold red]Benchmark regression in {regression['benchmark']}: {regression['ratio']}x slower than iteration "
+              f"{benchmark_report['compared_with_iteration']} (p={regression['p_value']})[/bold red]")
+    if benchmark_report.get("regressions"):
+        log_event("benchmark_regression", {"iteration": state["iteration_count"], "regressions": benchmark_report["regressions"]})
+    return {"benchmark_report": store_artifact("benchmark_report", benchmark_report, state["iteration_count"])}
 
 def critic_node(state: AppState):
     print("--- Calling Critic Agent ---")
     critic_agent = Agent(llm_default, default_tools_map, "aide/prompts/critic_prompt.txt", app_root=state["app_root"])
     code_for_critic = ""
-    if state["code_map"]:
-        for file_path in state["code_map"].keys():
+    code_map = load_artifact(state["code_map"])
+    if code_map:
+        for file_path in code_map.keys():
             try:
                 with open(file_path, "r") as f:
                     code_for_critic += f"---\n{file_path} ---\n{f.read()}\n\n"
             except FileNotFoundError:
                 pass
+    user_feedback_queue = drain_user_feedback(state)
     critic_feedback = critic_agent.run(
-        spec=json.dumps(state["spec"], indent=4),
-        plan=json.dumps(state["plan"], indent=4),
-        code_map=json.dumps(state["code_map"], indent=4),
-        api_schema=json.dumps(state["api_schema"], indent=4),
-        test_report=json.dumps(state["test_report"], indent=4),
-        performance_report=json.dumps(state.get("performance_report", {}), indent=4),
-        user_feedback="\n".join(state["user_feedback_queue"]),
+        spec=artifact_text(state["spec"]),
+        plan=artifact_text(state["plan"]),
+        code_map=artifact_text(code_map),
+        api_schema=artifact_text(state["api_schema"]),
+        test_report=artifact_text(state["test_report"]),
+        performance_report=artifact_text(state.get("performance_report", {})),
+        profile_report=artifact_text(state.get("profile_report")),
+        benchmark_report=artifact_text(state.get("benchmark_report")),
+        user_feedback="\n".join(user_feedback_queue),
         code=code_for_critic
     )
-    return {"critic_feedback": critic_feedback}
+    return {"critic_feedback": critic_feedback, "user_feedback_queue": user_feedback_queue}
+
+def performance_node(state: AppState):
+    print("--- Calling Performance Agent ---")
+    performance_agent = Agent(llm_tester, tester_tools_map, "aide/prompts/performance_prompt.txt", "performance_report.json", app_root=state["app_root"])
+    performance_report = performance_agent.run(spec=artifact_text(state["spec"]))
+    return {"performance_report": store_artifact("performance_report", performance_report, state["iteration_count"])}
 
 def reset_state_node(state: AppState):
     print("--- Resetting State ---")
@@ -258,27 +474,30 @@ def reset_state_node(state: AppState):
         "critic_feedback": None,
     }
 
-def code_map_node(state: AppState):
-    print("--- Building Code Map ---")
-    code_map = build_code_map_tool.invoke({})
-    return {"code_map": code_map}
-
-def schema_load_node(state: AppState):
-    print("--- Loading API Schema ---")
-    api_schema = load_schema_tool.invoke({})
-    return {"api_schema": api_schema}
+def context_node(state: AppState):
+    print("--- Collecting Code Map and API Schema ---")
+    context = collect_prefetch(CONTEXT_TASKS)
+    iteration = state.get("iteration_count", 0)
+    update = {
+        "code_map": store_artifact("code_map", context["code_map"], iteration),
+        "api_schema": store_artifact("api_schema", context["api_schema"], iteration),
+    }
+    if state["policy"] == "debug" and not state.get("plan"):
+        update["plan"] = store_artifact("plan", DEBUG_PLAN, iteration)
+    return update
 
 def plan_approval_node(state: AppState):
     print("[bold blue]Generated Plan:[/bold blue]")
-    print(json.dumps(state["plan"], indent=4))
+    print(artifact_text(state["plan"]))
     print("Do you approve this plan? [y/n]")
-    user_approval = input().lower()
+    user_approval = ask_user("Do you approve this plan? [y/n]").lower()
     if user_approval != 'y':
         print("Plan rejected. Exiting.")
         return {"final_summary": "Plan rejected by user."}
     return {}
 
 def user_input_node(state: AppState):
+    timeout = state.get("user_input_timeout")
     critic_feedback = state.get("critic_feedback")
     if critic_feedback and isinstance(critic_feedback, list) and critic_feedback:
         print("[bold yellow]--- Critic Feedback ---[/bold yellow]")
@@ -287,7 +506,11 @@ def user_input_node(state: AppState):
             print(f"[bold]{i + 1}. [{severity}] {item.get('description')}[/bold]")
 
         print("\n[bold yellow]Please select the feedback items to address (e.g., '1,3', 'critical', 'all'), or press Enter to finish.[/bold yellow]")
-        selection = input().lower().strip()
+        selection = ask_user("Select the feedback items to address (e.g., '1,3', 'critical', 'all'), or send an empty reply to finish.", timeout=timeout)
+        if selection is None:
+            print(f"[bold yellow]No selection within {timeout}s. Continuing with all feedback.[/bold yellow]")
+            return {"critic_feedback": critic_feedback, "user_feedback_queue": drain_user_feedback(state)}
+        selection = selection.lower().strip()
 
         if not selection:
             return {"critic_feedback": []}
@@ -310,13 +533,15 @@ def user_input_node(state: AppState):
         
         return {"critic_feedback": selected_feedback}
 
-    print("\n[bold yellow]Awaiting user input... (Press Enter to continue without feedback)[/bold yellow]")
-    user_input = check_for_user_input()
+    if timeout is None:
+        print("\n[bold yellow]Awaiting user input... (Press Enter to continue without feedback)[/bold yellow]")
+    else:
+        print(f"\n[bold yellow]Awaiting user input for up to {timeout}s... (feedback typed at any time is picked up by the next step)[/bold yellow]")
+    user_input = check_for_user_input(timeout=timeout)
     if user_input:
-        print(f"[bold green]Feedback received:[/bold green] {user_input}")
-        current_queue = state.get("user_feedback_queue", [])
-        current_queue.append(user_input)
-        return {"user_feedback_queue": current_queue}
+        for line in user_input:
+            print(f"[bold green]Feedback received:[/bold green] {line}")
+        return {"user_feedback_queue": state.get("user_feedback_queue", []) + user_input}
     
     return {}
 
@@ -335,10 +560,8 @@ def route_after_router(state: AppState):
 
 def route_after_spec(state: AppState):
     policy = state["policy"]
-    if policy == "debug":
-        return "tester_node"
-    elif policy == "refactor":
-        return "refactor_node"
+    if policy in ("debug", "refactor"):
+        return "context_node"  # both read the code map before any plan is approved
     return "plan_node"
 
 def route_after_plan(state: AppState):
@@ -350,7 +573,36 @@ def route_after_plan(state: AppState):
 def route_after_approval(state: AppState):
     if state.get("final_summary"):
         return END
-    return ["code_map_node", "schema_load_node"]
+    return "context_node"
+
+def route_after_context(state: AppState):
+    policy = state["policy"]
+    if policy == "debug" and not state.get("test_report"):
+        return "tester_node"
+    elif policy == "refactor" and not state.get("plan"):
+        return "refactor_node"
+    return "reset_state_node"
+
+def route_after_static_check(state: AppState):
+    if not state.get("static_check_failures"):
+        return "tester_node"
+    if state["iteration_count"] >= state["max_iterations"]:
+        print("[bold red]Max iterations reached. Ending run.[/bold red]")
+        return END
+    return "implementer_node"
+
+def route_after_tester(state: AppState):
+    """Benchmarks and profiles passing code, so the critic reviews measurements."""
+    if state.get("test_failure_streak") != 0:
+        return "critic_node"
+    if find_benchmarks():
+        return "benchmark_node"
+    return route_after_benchmark(state)
+
+def route_after_benchmark(state: AppState):
+    if has_performance_goals(state.get("spec")):
+        return "profile_node"
+    return "critic_node"
 
 def route_after_critic(state: AppState):
     if state["iteration_count"] >= state["max_iterations"]:
@@ -387,11 +639,13 @@ def create_graph():
     workflow.add_node("research_node", research_node)
     workflow.add_node("debug_node", debug_node)
     workflow.add_node("refactor_node", refactor_node)
-    workflow.add_node("code_map_node", code_map_node)
-    workflow.add_node("schema_load_node", schema_load_node)
+    workflow.add_node("context_node", context_node)
     workflow.add_node("reset_state_node", reset_state_node)
     workflow.add_node("implementer_node", implementer_node)
+    workflow.add_node("static_check_node", static_check_node)
     workflow.add_node("tester_node", tester_node)
+    workflow.add_node("benchmark_node", benchmark_node)
+    workflow.add_node("profile_node", profile_node)
     workflow.add_node("critic_node", critic_node)
     workflow.add_node("performance_node", performance_node)
     workflow.add_node("user_input_node", user_input_node)
@@ -405,11 +659,44 @@ def create_graph():
     workflow.add_edge("research_node", "plan_approval_node")
     workflow.add_edge("refactor_node", "plan_approval_node")
     workflow.add_edge("debug_node", "reset_state_node")
-    workflow.add_edge("code_map_node", "schema_load_node")
-    workflow.add_edge("schema_load_node", "reset_state_node")
+    workflow.add_conditional_edges(
+        "context_node",
+        route_after_context,
+        {
+            "tester_node": "tester_node",
+            "refactor_node": "refactor_node",
+            "reset_state_node": "reset_state_node",
+        }
+    )
     workflow.add_edge("reset_state_node", "implementer_node")
-    workflow.add_edge("implementer_node", "tester_node")
-    workflow.add_edge("tester_node", "critic_node")
+    workflow.add_edge("implementer_node", "static_check_node")
+    workflow.add_conditional_edges(
+        "static_check_node",
+        route_after_static_check,
+        {
+            "implementer_node": "implementer_node",
+            "tester_node": "tester_node",
+            END: END
+        }
+    )
+    workflow.add_conditional_edges(
+        "tester_node",
+        route_after_tester,
+        {
+            "benchmark_node": "benchmark_node",
+            "profile_node": "profile_node",
+            "critic_node": "critic_node",
+        }
+    )
+    workflow.add_conditional_edges(
+        "benchmark_node",
+        route_after_benchmark,
+        {
+            "profile_node": "profile_node",
+            "critic_node": "critic_node",
+        }
+    )
+    workflow.add_edge("profile_node", "critic_node")
 
     workflow.add_conditional_edges(
         "critic_node",
@@ -2,7 +2,7 @@
 import sys
 import os
 from .app import create_graph, AppState, get_project_path
-from .utils import log_event
+from .utils import ask_user, log_event, start_input_reader
 
 def main():
     if len(sys.argv) < 2:
@@ -30,6 +30,7 @@ def main():
         os.chdir(project_path)
     
     log_event("session_start", {"user_request": user_request})
+    start_input_reader()
 
     app = create_graph()
     
@@ -47,7 +48,8 @@ def main():
         for node, output in event.items():
             print(f"--- Node: {node} ---")
             print(output)
-            input("Press Enter to continue...")
+            print("Press Enter to continue...")
+            ask_user("Press Enter to continue...")
 
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""Tolerant extraction of the JSON value in a model's answer.
+
+Models wrap their JSON in prose and code fences, leave trailing commas, put raw
+newlines inside strings, write Python's `True`/`None`, or stop mid-object when
+they hit the output limit. `extract_json` finds the top-level JSON values in
+the text (preferring the contents of a fenced block) with a string-aware pass
+that tracks nesting, so each value ends at its matching bracket whatever
+follows it, and keeps the one the caller's check accepts, or else the largest.
+It repairs those defects on the way:
+
+- trailing commas before `}` or `]` are dropped;
+- newlines, carriage returns and tabs inside strings are escaped;
+- `True`, `False` and `None` outside strings become `true`, `false` and `null`;
+- a truncated value is cut back to its last complete element and closed: the
+  innermost array loses its incomplete element, a `tool_calls` element still
+  open at the cut is always dropped rather than run, and neither a string nor
+  a number or literal cut off mid-way is ever kept.
+
+It returns the value and the list of repairs made, so callers can log them, or
+raises `JSONExtractionError` when there is no usable value.
+"""
+import json
+import re
+
+FENCE = re.compile(r"```([a-zA-Z0-9_-]*)[ \t]*\n(.*?)(?:```|\Z)", re.DOTALL)
+STRING_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+LITERALS = {"True": "true", "False": "false", "None": "null"}
+CLOSERS = {"{": "}", "[": "]"}
+JSON_FENCES = ("", "json", "json5", "jsonc")
+MAX_START_ATTEMPTS = 50
+
+class JSONExtractionError(ValueError):
+    pass
+
+def _text(output):
+    """Model content as text; some providers return a list of content parts."""
+    if isinstance(output, str):
+        return output
+    if isinstance(output, list):
+        return "".join(part if isinstance(part, str) else str(part.get("text", "")) for part in output if isinstance(part, (str, dict)))
+    raise JSONExtractionError(f"Expected text, got {type(output).__name__}.")
+
+def _close(chars, stack):
+    text = "".join(chars).rstrip()
+    if text.endswith(","):
+        text = text[:-1].rstrip()
+    return text + "".join(CLOSERS[opener] for opener in reversed(stack))
+
+def _key_before(chars):
+    """The object key just before the container opening at the end of `chars`, or None."""
+    match = re.search(r'"((?:[^"\\]|\\.)*)"\s*:\s*[\[{]$', "".join(chars[-200:]))
+    return match.group(1) if match else None
+
+def _scan(text, start):
+    """
+    Rewrites the value starting at `text[start]` into valid JSON as far as possible.
+    Returns (candidates, repairs, end): the rewritten value, or for a truncated value the
+    ways of closing it, best first, and where the value ends in `text`.
+    """
+    chars, stack, repairs = [], [], []
+    cuts = []  # per open container: [length of chars at its opening or last comma, its key]
+    in_string = escaped = False
+    string_start = None
+    i = start
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            elif ch in STRING_ESCAPES:
+                ch = STRING_ESCAPES[ch]
+                if "escaped control characters in strings" not in repairs:
+                    repairs.append("escaped control characters in strings")
+            chars.append(ch)
+            i += 1
+            continue
+        if ch == '"':
+            in_string, string_start = True, len(chars)
+        elif ch in "{[":
+            stack.append(ch)
+            chars.append(ch)
+            cuts.append([len(chars), _key_before(chars)])
+            i += 1
+            continue
+        elif ch in "}]":
+            stripped = "".join(chars).rstrip()
+            if stripped.endswith(","):
+                chars = list(stripped[:-1])
+                if "removed trailing commas" not in repairs:
+                    repairs.append("removed trailing commas")
+            if not stack:
+                break
+            ch = CLOSERS[stack.pop()]
+            cuts.pop()
+            chars.append(ch)
+            if not stack:
+                return ["".join(chars)], repairs, i + 1
+            i += 1
+            continue
+        elif ch == "," and cuts:
+            cuts[-1][0] = len(chars)
+        elif ch in "TFN":
+            word = re.match(r"\w+", text[i:]).group(0)
+            if word in LITERALS:
+                chars.append(LITERALS[word])
+                if "converted Python literals" not in repairs:
+                    repairs.append("converted Python literals")
+                i += len(word)
+                continue
+        chars.append(ch)
+        i += 1
+
+    # The text ended inside the value. A tool call still open at the cut is always dropped, and
+    # dropping the incomplete element of the innermost array is preferred over keeping part of it.
+    repairs.append("closed a truncated value")
+    tool_calls = [depth for depth, (_, key) in enumerate(cuts) if key == "tool_calls" and stack[depth] == "["]
+    if tool_calls:
+        depth = tool_calls[0]
+        if "".join(chars[cuts[depth][0]:]).strip(", \n\r\t"):
+            repairs.append("dropped a truncated tool call")
+        chars, stack, cuts, in_string = chars[:cuts[depth][0]], stack[:depth + 1], cuts[:depth + 1], False
+    candidates = []
+    arrays = [depth for depth, opener in enumerate(stack) if opener == "["]
+    if arrays:
+        candidates.append(_close(chars[:cuts[arrays[-1]][0]], stack[:arrays[-1] + 1]))
+    if in_string:
+        candidates.append(_close(chars[:string_start], stack))
+    elif "".join(chars).rstrip()[-1:] in ('"', "}", "]", "{", "[", ","):
+        candidates.append(_close(chars, stack))  # a number or literal at the cut may itself be cut short
+    for depth in reversed(range(len(stack))):
+        candidates.append(_close(chars[:cuts[depth][0]], stack[:depth + 1]))
+    return candidates, repairs, len(text)
+
+def _best_value(text, accept=None):
+    """
+    (value, repairs) for the best top-level JSON value that can be recovered from `text`, or None:
+    the first one `accept` approves, else the largest, so a bracket pair in the prose
+    ("if empty, return []") doesn't win over the answer that follows it.
+    """
+    found, position, attempts = [], 0, 0
+    for match in re.finditer(r"[\[{]", text):
+        if match.start() < position:  # nested in a value already recovered
+            continue
+        attempts += 1
+        if attempts > MAX_START_ATTEMPTS:
+            break
+        candidates, repairs, end = _scan(text, match.start())
+        for candidate in candidates:
+            try:
+                value = json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+            if value or "closed a truncated value" not in repairs:  # a lone `{` recovers nothing
+                if accept is not None and accept(value):
+                    return value, repairs
+                found.append((len(candidate), -len(found), value, repairs))
+                position = end
+                break
+    if not found:
+        return None
+    return max(found, key=lambda f: f[:2])[2:]
+
+def extract_json(output, accept=None):
+    """
+    Returns (value, repairs) for the JSON value in `output`, preferring values `accept(value)` approves
+    (e.g. ones matching the expected schema). Raises JSONExtractionError if there is none.
+    """
+    text = _text(output).strip()
+    if not text:
+        raise JSONExtractionError("The output is empty.")
+    try:
+        return json.loads(text), []
+    except json.JSONDecodeError:
+        pass
+    blocks = [block for language, block in FENCE.findall(text) if language.lower() in JSON_FENCES]
+    for block in blocks:
+        found = _best_value(block, accept)
+        if found is not None:
+            return found[0], ["extracted from a code fence"] + found[1]
+    # Braces in fenced code of another language (`python`, `bash`) are not the answer.
+    found = (_best_value(FENCE.sub(lambda m: "" if m.group(1).lower() not in JSON_FENCES else m.group(0), text), accept)
+             or _best_value(text, accept))
+    if found is not None:
+        return found
+    raise JSONExtractionError("No JSON object or array found in the output.")
@@ -0,0 +1,235 @@
+"""Shared, rate-limited access to the LLM providers.
+
+Every model call goes through a `ClientPool` (one per model), which combines:
+
+- token buckets for requests and tokens per minute,
+- a semaphore bounding concurrent calls,
+- retries with jittered exponential backoff on 429, 5xx and connection errors
+  (honouring `Retry-After` when the error carries a response),
+- a circuit breaker that fails fast after repeated 5xx or connection failures
+  and lets a single probe call through once it has cooled down,
+- counters and latency totals, available from `metrics()`.
+
+`LimitedModel` wraps a (tool-bound) chat model so agents use it unchanged.
+"""
+import random
+import threading
+import time
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+_pools = {}
+_pools_lock = threading.Lock()
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+class TokenBucket:
+    def __init__(self, per_minute, capacity=None, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        """Blocks until `amount` tokens are available and takes them. Returns the time waited."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self.clock() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self):
+        """
+        Whether a call may go through; in half-open state only one probe call is allowed at a time,
+        and "probe" is returned for it. The caller must then call `end_probe` whatever the outcome.
+        """
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.probing:
+                self.probing = True
+                return "probe"
+            return False
+
+    def end_probe(self):
+        """Lets another probe through after one that ended without a verdict (e.g. it was throttled)."""
+        with self.lock:
+            self.probing = False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self.probing = False
+
+def error_status(error):
+    """The HTTP status carried by a provider or `requests` error, if any."""
+    for candidate in (getattr(error, "status_code", None), getattr(error, "code", None),
+                      getattr(getattr(error, "response", None), "status_code", None)):
+        if isinstance(candidate, int):
+            return candidate
+    text = str(error)
+    if "429" in text or "RESOURCE_EXHAUSTED" in text:
+        return 429
+    return None
+
+def is_retryable(error):
+    status = error_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return isinstance(error, (ConnectionError, TimeoutError)) or type(error).__name__ in ("ConnectionError", "Timeout", "ReadTimeout")
+
+def retry_after(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+def estimate_tokens(messages):
+    """Rough prompt size: about four characters per token."""
+    return max(1, sum(len(str(getattr(m, "content", m))) for m in messages) // 4)
+
+class ClientPool:
+    def __init__(self, name, requests_per_minute=60, tokens_per_minute=1_000_000, max_concurrency=4,
+                 max_retries=5, backoff_base=1.0, backoff_max=60.0, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lock = threading.Lock()
+        self.counters = {"calls": 0, "successes": 0, "failures": 0, "retries": 0, "throttled": 0,
+                         "rejected": 0, "in_flight": 0, "latency": 0.0, "queued": 0.0}
+
+    def _count(self, **deltas):
+        with self.lock:
+            for key, delta in deltas.items():
+                self.counters[key] += delta
+
+    def backoff(self, attempt, error=None):
+        """Full-jitter exponential backoff, or the server's Retry-After if it asked for longer."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return max(delay, min(retry_after(error) or 0.0, self.backoff_max))
+
+    def call(self, fn, tokens=1):
+        """Runs `fn()` within the pool's limits, retrying transient failures."""
+        self._count(calls=1)
+        for attempt in range(self.max_retries + 1):
+            allowed = self.breaker.allow()
+            if not allowed:
+                self._count(rejected=1, failures=1)
+                raise CircuitOpenError(f"{self.name}: circuit open after repeated failures; retry in {self.breaker.reset_timeout}s.")
+            try:
+                error, result = self._attempt(fn, tokens)
+            finally:
+                if allowed == "probe":
+                    # A probe that raised something unexpected or was throttled (429) says nothing about
+                    # the provider's health: leave the circuit half-open for the next probe.
+                    self.breaker.end_probe()
+            if error is None:
+                return result
+            if attempt == self.max_retries:
+                self._count(failures=1)
+                raise error
+            self._count(retries=1)
+            time.sleep(self.backoff(attempt, error))
+
+    def _attempt(self, fn, tokens):
+        """Runs `fn()` once and records the outcome; returns (retryable error, result) or raises a final error."""
+        queued = self.requests.acquire() + self.tokens.acquire(tokens)
+        wait_start = time.perf_counter()
+        with self.semaphore:
+            self._count(in_flight=1, queued=queued + time.perf_counter() - wait_start)
+            start = time.perf_counter()
+            try:
+                result = fn()
+            except Exception as e:
+                error = e
+            else:
+                error = None
+            finally:
+                self._count(in_flight=-1, latency=time.perf_counter() - start)
+        if error is None:
+            self.breaker.record_success()
+            self._count(successes=1)
+            return None, result
+        if not is_retryable(error):
+            # The provider answered (e.g. 400); that says nothing about its health.
+            self.breaker.record_success()
+            self._count(failures=1)
+            raise error
+        if error_status(error) == 429:
+            self._count(throttled=1)  # throttling is back-pressure, not an outage: it does not trip the breaker
+        else:
+            self.breaker.record_failure()
+        return error, None
+
+    def metrics(self):
+        with self.lock:
+            metrics = dict(self.counters)
+        attempts = metrics["calls"] + metrics["retries"] - metrics["rejected"]
+        metrics["latency_avg"] = round(metrics["latency"] / attempts, 4) if attempts else None
+        metrics["latency"] = round(metrics["latency"], 4)
+        metrics["queued"] = round(metrics["queued"], 4)
+        metrics["circuit"] = self.breaker.state
+        return metrics
+
+class LimitedModel:
+    """A chat model whose `invoke` goes through a `ClientPool`."""
+    def __init__(self, llm, pool):
+        self.llm = llm
+        self.pool = pool
+
+    def invoke(self, messages):
+        return self.pool.call(lambda: self.llm.invoke(messages), estimate_tokens(messages))
+
+def get_pool(name, **limits):
+    """Returns the shared pool for `name`, creating it with `limits` on first use."""
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = ClientPool(name, **limits)
+        return _pools[name]
+
+def all_metrics():
+    return {name: pool.metrics() for name, pool in _pools.items()}
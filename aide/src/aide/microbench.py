@@ -0,0 +1,240 @@
+"""Function-level microbenchmarks for generated libraries.
+
+`run_benchmark_tool` measures HTTP endpoints; most generated projects are
+libraries whose hot paths are plain functions. This harness finds every
+module-level `bench_*` function (no arguments) in the Python files under
+`tests/` and times it in a child interpreter, the way `timeit` does:
+
+1. warmup: call it for at least `warmup` seconds, so caches and lazy imports
+   are settled before timing;
+2. calibration: double the loop count until one sample takes `min_sample`
+   seconds, so timer resolution and call overhead don't dominate;
+3. `repeat` samples of that many loops with the garbage collector off, each
+   stored as the time per call.
+
+Each benchmark is summarized by robust statistics (median, IQR and a
+distribution-free 95% confidence interval of the median), and the raw samples
+are stored per run and iteration in `.aide/benchmarks/<run_id>/iteration_<n>.json`,
+so the next iteration of the same run can be compared sample by sample: a benchmark regressed when a
+Mann-Whitney U test finds its samples significantly slower (p < `alpha`) and its
+median is more than `min_effect` slower, which ignores differences too small to
+matter even when they are consistent.
+"""
+import glob
+import json
+import math
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from .pytest_runner import project_python
+
+BENCH_DIR = os.path.join(".aide", "benchmarks")
+BENCH_FUNCTION = re.compile(r"^def (bench_\w+)\s*\(\s*\)", re.MULTILINE)
+
+DRIVER = r'''
+import gc, importlib.util, json, os, sys, time, traceback
+
+files, warmup, min_sample, repeat, out_path = json.loads(sys.argv[1]), float(sys.argv[2]), float(sys.argv[3]), int(sys.argv[4]), sys.argv[5]
+sys.path.insert(0, os.getcwd())
+timer = time.perf_counter
+results, errors = {}, {}
+
+def measure(function, loops):
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = timer()
+        for _ in range(loops):
+            function()
+        return timer() - start
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+for path, names in files.items():
+    directory = os.path.dirname(os.path.abspath(path))
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    module_name = "aide_bench_" + os.path.splitext(path)[0].replace(os.sep, "_").replace(".", "_")
+    try:
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    except BaseException:
+        for name in names:
+            errors[f"{path}::{name}"] = traceback.format_exc(limit=3)
+        continue
+    for name in names:
+        key = f"{path}::{name}"
+        try:
+            function = getattr(module, name)
+            deadline = timer() + warmup
+            function()
+            while timer() < deadline:
+                function()
+            loops = 1
+            while measure(function, loops) < min_sample and loops < 1 << 30:
+                loops *= 2
+            samples = [measure(function, loops) / loops for _ in range(repeat)]
+            results[key] = {"loops": loops, "samples": samples}
+        except BaseException:
+            errors[key] = traceback.format_exc(limit=3)
+
+with open(out_path, "w") as f:
+    json.dump({"results": results, "errors": errors}, f)
+'''
+
+def find_benchmarks(root=".", directory="tests"):
+    """{relative path: [bench function names]} for the Python files under `directory`."""
+    found = {}
+    for path in sorted(glob.glob(os.path.join(root, directory, "**", "*.py"), recursive=True)):
+        try:
+            with open(path, "r") as f:
+                names = BENCH_FUNCTION.findall(f.read())
+        except (OSError, UnicodeDecodeError):
+            continue
+        if names:
+            found[os.path.relpath(path, root)] = names
+    return found
+
+def median_confidence_interval(samples, z=1.96):
+    """Distribution-free confidence interval of the median, from the order statistics."""
+    ordered = sorted(samples)
+    n = len(ordered)
+    low = max(int(math.floor((n - z * math.sqrt(n)) / 2)), 0)
+    return ordered[low], ordered[n - 1 - low]
+
+def summarize(samples):
+    quartiles = statistics.quantiles(samples, n=4) if len(samples) > 1 else [samples[0]] * 3
+    low, high = median_confidence_interval(samples)
+    return {
+        "median": statistics.median(samples),
+        "iqr": quartiles[2] - quartiles[0],
+        "ci95": [low, high],
+        "min": min(samples),
+        "samples": len(samples),
+    }
+
+def mann_whitney_u(a, b):
+    """Two-sided Mann-Whitney U test (normal approximation with tie correction); returns (U of `b`, p-value)."""
+    combined = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+    ranks = [0.0] * len(combined)
+    ties = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        t = j - i + 1
+        ties += t ** 3 - t
+        i = j + 1
+    n1, n2 = len(a), len(b)
+    rank_sum_b = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 1)
+    u = rank_sum_b - n2 * (n2 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.0
+    z = (u - n1 * n2 / 2) / math.sqrt(variance)
+    return u, math.erfc(abs(z) / math.sqrt(2))
+
+def run_microbenchmarks(root=".", directory="tests", warmup=0.05, min_sample=0.01, repeat=15, timeout=600):
+    """Runs every `bench_*` function under `directory` in a subprocess; returns per-benchmark samples and statistics."""
+    files = find_benchmarks(root, directory)
+    if not files:
+        return {"status": "no_benchmarks", "benchmarks": {}, "errors": {}}
+    fd, out_path = tempfile.mkstemp(suffix=".json", prefix="aide_bench_")
+    os.close(fd)
+    driver_fd, driver_path = tempfile.mkstemp(suffix=".py", prefix="aide_bench_driver_")
+    with os.fdopen(driver_fd, "w") as f:
+        f.write(DRIVER)
+    try:
+        result = subprocess.run(
+            [project_python(root) or sys.executable, driver_path, json.dumps(files), str(warmup), str(min_sample), str(repeat), out_path],
+            capture_output=True, text=True, timeout=timeout, cwd=root,
+        )
+        with open(out_path, "r") as f:
+            raw = json.load(f) if os.path.getsize(out_path) else None
+    except subprocess.TimeoutExpired:
+        return {"status": "error", "benchmarks": {}, "errors": {}, "message": f"Benchmarks timed out after {timeout}s."}
+    finally:
+        os.remove(out_path)
+        os.remove(driver_path)
+    if raw is None:
+        return {"status": "error", "benchmarks": {}, "errors": {}, "message": result.stderr[-2000:]}
+    benchmarks = {
+        name: dict(summarize(r["samples"]), loops=r["loops"], raw_samples=r["samples"])
+        for name, r in raw["results"].items()
+    }
+    return {"status": "error" if raw["errors"] else "ok", "benchmarks": benchmarks, "errors": raw["errors"]}
+
+def _directory(root, run_id=None):
+    return os.path.join(root, BENCH_DIR, run_id) if run_id else os.path.join(root, BENCH_DIR)
+
+def _path(root, iteration, run_id=None):
+    return os.path.join(_directory(root, run_id), f"iteration_{iteration}.json")
+
+def save_results(root, iteration, results, run_id=None):
+    os.makedirs(_directory(root, run_id), exist_ok=True)
+    with open(_path(root, iteration, run_id), "w") as f:
+        json.dump(results, f, indent=4)
+
+def load_results(root, iteration, run_id=None):
+    try:
+        with open(_path(root, iteration, run_id), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def previous_iteration(root, before, run_id=None):
+    """The latest iteration of `run_id` before `before` with stored benchmark results, or None."""
+    iterations = []
+    for path in glob.glob(os.path.join(glob.escape(_directory(root, run_id)), "iteration_*.json")):
+        match = re.search(r"iteration_(\d+)\.json$", path)
+        if match and int(match.group(1)) < before:
+            iterations.append(int(match.group(1)))
+    return max(iterations) if iterations else None
+
+def compare_results(previous, current, alpha=0.01, min_effect=0.05):
+    """Benchmarks whose samples in `current` are significantly and materially slower than in `previous`."""
+    regressions, improvements = [], []
+    for name, now in current.get("benchmarks", {}).items():
+        before = previous.get("benchmarks", {}).get(name)
+        if not before:
+            continue
+        _, p_value = mann_whitney_u(before["raw_samples"], now["raw_samples"])
+        ratio = now["median"] / before["median"] if before["median"] else float("inf")
+        entry = {"benchmark": name, "previous_median": before["median"], "current_median": now["median"],
+                 "ratio": round(ratio, 3), "p_value": round(p_value, 6)}
+        if p_value < alpha and ratio > 1 + min_effect:
+            regressions.append(entry)
+        elif p_value < alpha and ratio < 1 - min_effect:
+            improvements.append(entry)
+    return {"regressions": regressions, "improvements": improvements}
+
+def benchmark_iteration(root, iteration, run_id=None, **options):
+    """
+    Runs the benchmarks, stores them as `iteration`'s of `run_id`, and compares them with the
+    latest earlier iteration's of the same run; other runs' iterations are never compared.
+    """
+    results = run_microbenchmarks(root, **options)
+    if results["status"] == "no_benchmarks":
+        return results
+    save_results(root, iteration, results, run_id)
+    report = {
+        "status": results["status"],
+        "iteration": iteration,
+        "benchmarks": {name: {k: v for k, v in b.items() if k != "raw_samples"} for name, b in results["benchmarks"].items()},
+        "errors": results["errors"],
+    }
+    previous = previous_iteration(root, iteration, run_id)
+    if previous is not None:
+        report["compared_with_iteration"] = previous
+        report.update(compare_results(load_results(root, previous, run_id), results))
+    return report
@@ -4,23 +4,46 @@ from langchain_core.messages import HumanMessage, ToolMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.tools import Tool
 from rich import print
-from langchain_community.tools.tavily_search import TavilySearchResults
+from .cascade import ModelCascade, ModelStats, TimedModel
+from .contract_probe import check_shape
+from .json_extract import JSONExtractionError, extract_json
+from .llm_client import LimitedModel, get_pool
+from .observations import compact_observation
+from .search_cache import DEFAULT_TTL, CachedSearch, SearchCache, make_web_search_tool, tavily_backend
+from .utils import ask_user, log_event
+from .workspace import get_journal
 from .tools import (
     read_file_tool,
+    read_observation_tool,
     write_file_tool,
+    apply_patch_tool,
     command_runner_tool,
+    service_start_tool,
+    service_stop_tool,
+    service_status_tool,
+    service_logs_tool,
     build_code_map_tool,
     load_schema_tool,
     websocket_test_tool,
     run_benchmark_tool,
     request_user_confirmation_tool,
     validate_api_schema_tool,
+    contract_probe_tool,
+    run_pytest_tool,
+    profile_tool,
+    microbenchmark_tool,
+    lookup_symbol_tool,
+    search_code_tool,
+    iteration_diff_tool,
 )
 
 # --- Agent Infrastructure ---
 
-def run_agent_turn(prompt, llm_with_tools, tools_map):
-    """Handles a single turn of the agent's ReAct loop."""
+# Tools whose effects the journal can't undo: a turn that used them is not retried on another model.
+IRREVERSIBLE_TOOLS = {"command_runner_tool", "service_start_tool", "service_stop_tool", "request_user_confirmation_tool"}
+
+def run_agent_turn(prompt, llm_with_tools, tools_map, calls=None):
+    """Handles a single turn of the agent's ReAct loop. The names of the tools it calls are appended to `calls`."""
     messages = [HumanMessage(content=prompt)]
     while True:
         result = llm_with_tools.invoke(messages)
@@ -34,28 +57,60 @@ def run_agent_turn(prompt, llm_with_tools, tools_map):
         print(f"[yellow]Thought:[/ ] {result.content}")
 
         for tool_call in result.tool_calls:
+            if calls is not None:
+                calls.append(tool_call["name"])
             if tool_call['name'] == 'request_user_confirmation_tool':
                 prompt_text = tool_call['args']['prompt']
                 print(f"[bold yellow]Confirmation required:[/bold yellow] {prompt_text} [y/n]")
-                user_response = input().lower()
+                user_response = ask_user(f"{prompt_text} [y/n]").lower()
                 tool_output = "User confirmed." if user_response == 'y' else "User denied."
                 messages.append(ToolMessage(tool_output, tool_call_id=tool_call["id"]))
                 continue
 
             action = f"Action: {tool_call['name']}({tool_call['args']})"
             print(f"[cyan]Action:[/ ] {tool_call['name']}({tool_call['args']})")
-            tool_output = tools_map[tool_call["name"]].invoke(tool_call["args"])
+            tool_output = compact_observation(tools_map[tool_call["name"]].invoke(tool_call["args"]))
             observation = f"Observation: {tool_output}"
             print(f"[magenta]Observation:[/ ] {tool_output}")
             messages.append(ToolMessage(tool_output, tool_call_id=tool_call["id"]))
 
+# Minimal shape each node's answer must have; checked after extraction, before the answer is used.
+TOOL_CALLS = {"type": "array", "items": {"type": "object", "required": ["tool_name", "args"],
+                                         "properties": {"tool_name": {"type": "string"}, "args": {"type": "object"}}}}
+SPEC = {"type": "object", "required": ["title", "acceptance_criteria", "deliverables"],
+        "properties": {"acceptance_criteria": {"type": "array"}, "deliverables": {"type": "array"}}}
+OUTPUT_SCHEMAS = {
+    "router": {"type": "object", "required": ["policy"], "properties": {
+        "policy": {"type": "string", "enum": ["implement", "research", "debug", "refactor", "clarify", "exit"]}}},
+    "spec": SPEC,
+    "research": SPEC,
+    "plan": {"type": "object", "required": ["plan"], "properties": {"plan": {"type": "array", "items": {"type": "string"}}}},
+    "implementer": {"type": "object", "properties": {"tool_calls": TOOL_CALLS, "confidence": {"type": "number"}}},
+    "debug_implementer": {"type": "object", "properties": {"tool_calls": TOOL_CALLS}},
+    "refactor_implementer": {"type": "object", "properties": {"tool_calls": TOOL_CALLS}},
+    "tester": {"type": "object", "required": ["report"], "properties": {"report": {"type": "object"}}},
+    "critic": {"type": "array", "items": {"type": "object", "required": ["description", "severity"]}},
+    "performance": {"type": "object"},
+}
+
+CORRECTION_PROMPT = """Your previous answer could not be used as it is:
+{problems}
+
+Previous answer:
+{answer}
+
+Reply with only the corrected JSON value: keep everything that was right, fix only the problems above, and add no other text."""
+
 class Agent:
     """A class to encapsulate agent behavior."""
-    def __init__(self, llm_with_tools, tools_map, prompt_path, output_file=None, app_root="."):
+    def __init__(self, llm_with_tools, tools_map, prompt_path, output_file=None, app_root=".", escalate=False):
         self.llm_with_tools = llm_with_tools
         self.tools_map = tools_map
         self.prompt_path = os.path.join(app_root, prompt_path)
         self.output_file = output_file
+        self.escalate = escalate
+        self.name = os.path.basename(prompt_path).replace("_prompt.txt", "")
+        self.turn = None  # (node, model) of the cascade turn whose answer `run` returned
 
     def run(self, **kwargs):
         """Runs the agent for a specific task."""
@@ -66,44 +121,108 @@ class Agent:
             print(f"[bold red]Error reading prompt file {self.prompt_path}: {e}[/]")
             return None
 
-        result_json = run_agent_turn(prompt, self.llm_with_tools, self.tools_map)
+        if not isinstance(self.llm_with_tools, ModelCascade):
+            result_json = run_agent_turn(prompt, self.llm_with_tools, self.tools_map)
+            result_data, _ = self._parse_or_correct(result_json, self.llm_with_tools)
+            return self._finish(result_json, result_data)
 
+        cascade = self.llm_with_tools
+        tiers = cascade.plan(self.name, self.escalate)
+        for index, (model, llm) in enumerate(tiers):
+            timed = TimedModel(llm)
+            journal, calls = get_journal(), []
+            checkpoint = journal.checkpoint()
+            result_json = run_agent_turn(prompt, timed, self.tools_map, calls)
+            result_data, problems = self._parse_or_correct(result_json, timed)
+            success = result_data is not None and not problems and cascade.confident(result_data)
+            cascade.record(self.name, model, success, timed.elapsed)
+            log_event("model_call", {"node": self.name, "model": model, "success": success, "latency": round(timed.elapsed, 3)})
+            self.turn = (self.name, model)
+            irreversible = sorted(IRREVERSIBLE_TOOLS.intersection(calls))
+            if success or index == len(tiers) - 1 or irreversible:
+                if not success and irreversible:
+                    print(f"[bold yellow]Not escalating {self.name}: the turn already used {', '.join(irreversible)}.[/bold yellow]")
+                return self._finish(result_json, result_data)
+            reason = ("invalid JSON" if result_data is None else "an answer of the wrong shape" if problems
+                      else f"low confidence ({result_data.get('confidence')})")
+            # The next tier starts from the tree as it was before this turn, not from its half-done edits.
+            restored = journal.restore(checkpoint)
+            if restored:
+                log_event("turn_undone", {"node": self.name, "model": model, "files": restored})
+            print(f"[bold yellow]{model} returned {reason} for {self.name}; escalating to {tiers[index + 1][0]}.[/bold yellow]")
+
+    def _parse(self, result_json):
+        """Returns (value, problems): the answer's JSON value (None if there is none) and how it misses the node's schema."""
+        schema = OUTPUT_SCHEMAS.get(self.name)
+        try:
+            fits = (lambda value: not list(check_shape(schema, value, "answer"))) if schema else None
+            result_data, repairs = extract_json(result_json, accept=fits)
+        except JSONExtractionError as e:
+            return None, [str(e)]
+        if repairs:
+            log_event("json_repaired", {"node": self.name, "repairs": repairs})
+        problems = list(check_shape(schema, result_data, "answer")) if schema else []
+        # A cut-off answer may still fit the schema, but whatever came after the cut is lost.
+        if "dropped a truncated tool call" in repairs:
+            problems.append("answer: cut off in the middle of a tool call, which was dropped; repeat it in full")
+        elif "closed a truncated value" in repairs:
+            problems.append("answer: cut off; only the part before the cut could be used")
+        return result_data, problems
+
+    def _parse_or_correct(self, result_json, llm):
+        """Parses the answer; only if it is unusable, asks `llm` once to correct it (a single call, not a new turn)."""
+        result_data, problems = self._parse(result_json)
+        if not problems:
+            return result_data, problems
+        print(f"[bold yellow]Answer from {self.name} is unusable ({'; '.join(problems[:3])}); asking for a correction.[/bold yellow]")
         try:
-            result_json = result_json.strip()
-            if result_json.startswith("```json"):
-                result_json = result_json[7:-4].strip()
-            result_data = json.loads(result_json)
+            correction = llm.invoke([HumanMessage(content=CORRECTION_PROMPT.format(
+                problems="\n".join(f"- {p}" for p in problems[:20]), answer=result_json))])
+            corrected, corrected_problems = self._parse(correction.content)
+        except Exception as e:
+            corrected, corrected_problems = None, [f"correction failed: {e}"]
+        log_event("json_correction", {"node": self.name, "problems": problems, "fixed": not corrected_problems})
+        if corrected is not None and len(corrected_problems) <= len(problems):
+            return corrected, corrected_problems
+        return result_data, problems
 
+    def _finish(self, result_json, result_data=None):
+        if result_data is not None:
             if self.output_file:
                 with open(self.output_file, "w") as f:
                     json.dump(result_data, f, indent=4)
                 print(f"[bold blue]Output written to {self.output_file}[/]")
             
             # Execute tool calls if present
-            if "tool_calls" in result_data and isinstance(result_data["tool_calls"], list):
+            if isinstance(result_data, dict) and "tool_calls" in result_data and isinstance(result_data["tool_calls"], list):
                 for tool_call in result_data["tool_calls"]:
+                    if not isinstance(tool_call, dict):
+                        continue
                     tool_name = tool_call.get("tool_name")
                     tool_args = tool_call.get("args", {})
                     if tool_name in self.tools_map:
                         print(f"[cyan]Action:[/ ] {tool_name}({tool_args})")
-                        tool_output = self.tools_map[tool_name].invoke(tool_args)
+                        try:
+                            tool_output = self.tools_map[tool_name].invoke(tool_args)
+                        except Exception as e:
+                            tool_output = f"Error: {e}"
                         print(f"[magenta]Observation:[/ ] {tool_output}")
                     else:
                         print(f"[bold red]Error: Tool '{tool_name}' not found.[/]")
 
             return result_data
-        except (json.JSONDecodeError, AttributeError):
-            print(f"[bold red]Error: Agent did not return valid JSON from prompt {self.prompt_path}.[/]")
-            if self.output_file:
-                report = {
-                    "error": f"Invalid JSON response from agent using {self.prompt_path}.",
-                    "summary": "Agent failed due to error.",
-                    "raw_output": result_json,
-                }
-                with open(self.output_file, "w") as f:
-                    json.dump(report, f, indent=4)
-                return report
-            return None
+
+        print(f"[bold red]Error: Agent did not return valid JSON from prompt {self.prompt_path}.[/]")
+        if self.output_file:
+            report = {
+                "error": f"Invalid JSON response from agent using {self.prompt_path}.",
+                "summary": "Agent failed due to error.",
+                "raw_output": result_json,
+            }
+            with open(self.output_file, "w") as f:
+                json.dump(report, f, indent=4)
+            return report
+        return None
 
 # --- LLM and Tool Configurations ---
 
@@ -114,42 +233,86 @@ if not api_key:
 tavily_api_key = os.getenv("TAVILY_API_KEY")
 
 
-llm_flash = ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=api_key)
-llm_pro = ChatGoogleGenerativeAI(model="gemini-1.5-pro", google_api_key=api_key)
+# Retries are handled by the shared client pools (see llm_client.py), not by each client.
+llm_flash = ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=api_key, max_retries=0)
+llm_pro = ChatGoogleGenerativeAI(model="gemini-1.5-pro", google_api_key=api_key, max_retries=0)
 
 def get_web_search_tool():
-    """Returns a tool for performing web searches."""
-    if not tavily_api_key:
+    """Returns a tool for performing web searches, answered from the on-disk cache when possible."""
+    offline = os.getenv("AIDE_SEARCH_OFFLINE", "").lower() in ("1", "true", "yes")
+    if not tavily_api_key and not offline:
         print("[bold yellow]Warning: TAVILY_API_KEY not set. Web search will be disabled.[/bold yellow]")
         return None
-    return TavilySearchResults(max_results=3)
+    cache = SearchCache(
+        os.path.join(os.path.expanduser("~"), ".aide", "search_cache"),
+        ttl=int(os.getenv("AIDE_SEARCH_TTL", str(DEFAULT_TTL))),
+    )
+    backend = tavily_backend(max_results=3) if tavily_api_key else None
+    return make_web_search_tool(CachedSearch(backend, cache, offline=offline, namespace="tavily:3"))
 
 web_search = get_web_search_tool()
 all_tools_list = [
     read_file_tool,
+    read_observation_tool,
     write_file_tool,
+    apply_patch_tool,
     build_code_map_tool,
     load_schema_tool,
     websocket_test_tool,
     run_benchmark_tool,
     request_user_confirmation_tool,
     validate_api_schema_tool,
+    contract_probe_tool,
+    run_pytest_tool,
+    profile_tool,
+    microbenchmark_tool,
+    lookup_symbol_tool,
+    search_code_tool,
+    iteration_diff_tool,
     command_runner_tool,
+    service_start_tool,
+    service_stop_tool,
+    service_status_tool,
+    service_logs_tool,
 ]
 if web_search:
     all_tools_list.append(web_search)
 
 all_tools_map = {t.name: t for t in all_tools_list}
 
+# Per-node success and latency of each model, shared by every cascade so routing adapts across runs.
+model_stats = ModelStats(os.path.join(os.path.expanduser("~"), ".aide", "model_stats.json"))
+
+# Every call to a model goes through its shared pool, whatever agent or session makes it.
+pool_limits = {
+    "requests_per_minute": int(os.getenv("AIDE_LLM_RPM", "60")),
+    "tokens_per_minute": int(os.getenv("AIDE_LLM_TPM", "1000000")),
+    "max_concurrency": int(os.getenv("AIDE_LLM_CONCURRENCY", "4")),
+}
+flash_pool = get_pool("gemini-1.5-flash", **pool_limits)
+pro_pool = get_pool("gemini-1.5-pro", **pool_limits)
+
+def make_cascade(tools, priors=None):
+    """Flash first, escalating to pro; both bound to `tools`."""
+    return ModelCascade(
+        [
+            ("gemini-1.5-flash", LimitedModel(llm_flash.bind_tools(tools), flash_pool)),
+            ("gemini-1.5-pro", LimitedModel(llm_pro.bind_tools(tools), pro_pool)),
+        ],
+        model_stats,
+        priors=priors,
+    )
+
 implementer_tools = all_tools_list
 implementer_tools_map = {t.name: t for t in implementer_tools}
-llm_implementer = llm_flash.bind_tools(implementer_tools)
-llm_refactor = llm_pro.bind_tools(implementer_tools)
+llm_implementer = make_cascade(implementer_tools)
+# Refactoring starts on pro until flash has proven itself on it.
+llm_refactor = make_cascade(implementer_tools, priors={"gemini-1.5-flash": 0.5})
 
 tester_tools = all_tools_list
 tester_tools_map = {t.name: t for t in tester_tools}
-llm_tester = llm_flash.bind_tools(tester_tools)
+llm_tester = make_cascade(tester_tools)
 
 default_tools = all_tools_list
-llm_default = llm_flash.bind_tools(default_tools)
+llm_default = make_cascade(default_tools)
 default_tools_map = {t.name: t for t in default_tools}
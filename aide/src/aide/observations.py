@@ -0,0 +1,116 @@
+"""Out-of-band storage for large tool observations.
+
+A tool output longer than `OBSERVATION_LIMIT` characters is written to
+`.aide/observations/<id>.txt` in the workspace, and the model gets a compact
+excerpt instead: the first and last lines, plus the lines that look like errors
+(tracebacks, failed tests, compiler errors) with their line numbers. The excerpt
+names the observation id, and `read_observation_tool` pages through the full
+text on demand, so a multi-megabyte pytest log costs a few kilobytes per turn
+instead of being re-sent in full with every later message.
+"""
+import hashlib
+import json
+import os
+import re
+
+from .workspace import get_workspace_root
+
+OBSERVATION_DIR = os.path.join(".aide", "observations")
+OBSERVATION_LIMIT = 8000
+HEAD_LINES = 40
+TAIL_LINES = 40
+MAX_ERROR_LINES = 30
+MAX_LINE_LENGTH = 300
+PAGE_CHARS = 6000  # a page stays below OBSERVATION_LIMIT, so it is never compacted again
+
+ERROR_LINE = re.compile(
+    r"Traceback \(most recent call last\)|\b\w*(Error|Exception)\b|\bFAILED\b|\bERROR\b|^E\s{2,}|"
+    r"\bassert(ion)?\b|\berror:|\bfatal\b|\bpanic(ked)?\b|\bfailed\b",
+    re.IGNORECASE,
+)
+
+def _directory():
+    return os.path.join(get_workspace_root(), OBSERVATION_DIR)
+
+def _clip(line):
+    return line if len(line) <= MAX_LINE_LENGTH else line[:MAX_LINE_LENGTH] + " [...]"
+
+def store_observation(text):
+    """Writes `text` out of band and returns its id (the same text always gets the same id)."""
+    observation_id = hashlib.sha256(text.encode("utf-8", "replace")).hexdigest()[:16]
+    directory = _directory()
+    path = os.path.join(directory, f"{observation_id}.txt")
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8", errors="replace") as f:
+            f.write(text)
+    return observation_id
+
+def excerpt(text, observation_id):
+    """Head, tail and error lines of `text`, with a note on how to page through the rest."""
+    lines = text.splitlines()
+    head = lines[:HEAD_LINES]
+    tail_start = max(HEAD_LINES, len(lines) - TAIL_LINES)
+    tail = lines[tail_start:]
+    errors = [(number, line) for number, line in enumerate(lines[HEAD_LINES:tail_start], start=HEAD_LINES)
+              if ERROR_LINE.search(line)]
+
+    parts = [f"[Observation {observation_id}: {len(text)} characters, {len(lines)} lines. "
+             f"Showing the first {len(head)} and last {len(tail)} lines and error lines in between; "
+             f"call read_observation_tool(observation_id=\"{observation_id}\", offset=<line>, limit=<lines>) for the rest.]"]
+    parts += [_clip(line) for line in head]
+    if errors:
+        parts.append(f"[... {len(errors)} error line(s) between lines {HEAD_LINES + 1} and {tail_start} ...]")
+        parts += [f"{number + 1}: {_clip(line)}" for number, line in errors[:MAX_ERROR_LINES]]
+        if len(errors) > MAX_ERROR_LINES:
+            parts.append(f"[... {len(errors) - MAX_ERROR_LINES} more error line(s) ...]")
+    if tail:
+        parts.append(f"[... lines {HEAD_LINES + 1}-{tail_start} omitted ...]" if tail_start > HEAD_LINES else "[...]")
+        parts += [_clip(line) for line in tail]
+    return "\n".join(parts)
+
+def compact_observation(output, limit=OBSERVATION_LIMIT):
+    """Returns `output` unchanged if it is small, otherwise stores it and returns an excerpt."""
+    text = output if isinstance(output, str) else json.dumps(output, indent=2, default=str)
+    if len(text) <= limit:
+        return output
+    return excerpt(text, store_observation(text))
+
+def read_observation(observation_id, offset=1, limit=200, column=0):
+    """
+    Up to `limit` lines of a stored observation starting at line `offset` (1-based, as numbered in the excerpt).
+    A line too long for one page is split across pages; `column` continues it from that character.
+    """
+    if not re.fullmatch(r"[0-9a-f]{16}", observation_id or ""):
+        return f"Error: '{observation_id}' is not an observation id."
+    path = os.path.join(_directory(), f"{observation_id}.txt")
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return f"Error: Observation {observation_id} not found."
+    start, limit, column = max(offset, 1) - 1, max(limit, 1), max(column, 0)
+    page, size, resume = [], 0, None
+    for number in range(start, min(start + limit, len(lines))):
+        skip = column if number == start else 0
+        prefix = f"{number + 1}: " if not skip else f"{number + 1} (from character {skip + 1}): "
+        text = lines[number][skip:]
+        if size + len(prefix) + len(text) > PAGE_CHARS:
+            if page:
+                break
+            # A single line longer than a page: show as much as fits and say where it continues.
+            text = text[:PAGE_CHARS - len(prefix)]
+            resume = (number, skip + len(text))
+        page.append(prefix + text)
+        size += len(prefix) + len(text) + 1
+        if resume:
+            break
+    if resume:
+        number, next_column = resume
+        footer = (f"[Line {number + 1} is {len(lines[number])} characters long and continues; "
+                  f"continue with offset={number + 1}, column={next_column}.]")
+    else:
+        end = start + len(page)
+        footer = (f"[Lines {start + 1}-{end} of {len(lines)}; continue with offset={end + 1}.]" if end < len(lines)
+                  else f"[End of observation, {len(lines)} lines.]")
+    return "\n".join(page + [footer])
@@ -0,0 +1,218 @@
+"""Structural comparison of OpenAPI documents.
+
+Both documents have their local `$ref`s resolved and are compared per path,
+method, parameter, request body and response, with JSON schemas compared
+structurally (type, format, enum, required, properties, items, combinators).
+Key order, list order where it carries no meaning, and documentation-only keys
+(descriptions, titles, examples, operation ids) are ignored.
+
+The result is a compact list of incompatibilities, each with a `severity` of
+"error" (the running service breaks the contract) or "warning" (it exposes more
+than the contract describes). Whether a change in what is required breaks
+clients depends on its direction: a request field or parameter that becomes
+required breaks them, one that becomes optional only accepts more, so it is a
+warning; in a response it is the other way round.
+"""
+import json
+import os
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+SCHEMA_KEYS = ("type", "format", "enum", "const", "nullable")
+EXTRA_REQUIRED = "fields unexpectedly required"
+NO_LONGER_REQUIRED = "fields no longer required"
+_project_cache = {}
+
+# --- Loading and normalization ---
+
+def _resolve_pointer(document, ref):
+    node = document
+    for part in ref.lstrip("#/").split("/"):
+        node = node[part.replace("~1", "/").replace("~0", "~")]
+    return node
+
+def resolve_refs(document):
+    """Returns a copy of `document` with every local `$ref` inlined; cycles become {"$circular": ref}."""
+    def resolve(node, seen):
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if isinstance(ref, str) and ref.startswith("#/"):
+                if ref in seen:
+                    return {"$circular": ref}
+                try:
+                    target = _resolve_pointer(document, ref)
+                except (KeyError, TypeError, IndexError):
+                    return {"$unresolved": ref}
+                return resolve(target, seen | {ref})
+            return {key: resolve(value, seen) for key, value in node.items()}
+        if isinstance(node, list):
+            return [resolve(item, seen) for item in node]
+        return node
+    return resolve(document, frozenset())
+
+def load_project_schema(path):
+    """Loads and resolves the project's schema, re-parsing only when the file changes."""
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _project_cache.get(os.path.abspath(path))
+    if cached and cached[0] == stamp:
+        return cached[1]
+    with open(path, "r") as f:
+        resolved = resolve_refs(json.load(f))
+    _project_cache[os.path.abspath(path)] = (stamp, resolved)
+    return resolved
+
+def _parameters(path_item, operation):
+    params = {}
+    for param in (path_item.get("parameters") or []) + (operation.get("parameters") or []):
+        if isinstance(param, dict) and "name" in param:
+            params[(param.get("in", "query"), param["name"])] = param
+    return params
+
+def operations(document):
+    operations = {}
+    for path, path_item in (document.get("paths") or {}).items():
+        if not isinstance(path_item, dict):
+            continue
+        for method in HTTP_METHODS:
+            if isinstance(path_item.get(method), dict):
+                operations[(path, method)] = (path_item, path_item[method])
+    return operations
+
+def _canonical_path(path):
+    """`/users/{user_id}` and `/users/{id}` describe the same route."""
+    parts = path.rstrip("/").split("/") or [""]
+    return "/".join("{}" if p.startswith("{") and p.endswith("}") else p for p in parts) or "/"
+
+def schema_of_content(content):
+    content = content or {}
+    media = content.get("application/json") or next(iter(content.values()), {})
+    return (media or {}).get("schema")
+
+# --- Schema comparison ---
+
+def compare_schemas(expected, actual, location):
+    """Yields (location, detail) for every structural difference between two JSON schemas."""
+    if expected is None or actual is None:
+        if expected is not None:
+            yield location, "schema missing"
+        return
+    if "$circular" in expected or "$circular" in actual:
+        return
+    for key in SCHEMA_KEYS:
+        exp, act = expected.get(key), actual.get(key)
+        if key == "enum" and exp is not None and act is not None:
+            exp, act = sorted(map(json.dumps, exp)), sorted(map(json.dumps, act))
+        if key == "type" and exp is None and "properties" in expected:
+            exp = "object"
+        if key == "type" and act is None and "properties" in actual:
+            act = "object"
+        if exp is not None and exp != act:
+            yield f"{location}.{key}", f"expected {json.dumps(exp)}, got {json.dumps(act)}"
+    missing_required = set(expected.get("required") or []) - set(actual.get("required") or [])
+    if missing_required:
+        yield f"{location}.required", f"{NO_LONGER_REQUIRED}: {sorted(missing_required)}"
+    extra_required = set(actual.get("required") or []) - set(expected.get("required") or [])
+    if extra_required:
+        yield f"{location}.required", f"{EXTRA_REQUIRED}: {sorted(extra_required)}"
+    expected_props, actual_props = expected.get("properties") or {}, actual.get("properties") or {}
+    for name in sorted(expected_props):
+        if name not in actual_props:
+            yield f"{location}.properties.{name}", "property missing"
+        else:
+            yield from compare_schemas(expected_props[name], actual_props[name], f"{location}.properties.{name}")
+    if "items" in expected:
+        yield from compare_schemas(expected["items"], actual.get("items"), f"{location}.items")
+    for combinator in ("allOf", "anyOf", "oneOf"):
+        if combinator in expected:
+            exp_variants = sorted(json.dumps(_strip_docs(v), sort_keys=True) for v in expected[combinator])
+            act_variants = sorted(json.dumps(_strip_docs(v), sort_keys=True) for v in actual.get(combinator) or [])
+            if exp_variants != act_variants:
+                yield f"{location}.{combinator}", "variants differ"
+
+def _strip_docs(node):
+    if isinstance(node, dict):
+        return {k: _strip_docs(v) for k, v in node.items() if k not in ("title", "description", "example", "examples")}
+    if isinstance(node, list):
+        return [_strip_docs(v) for v in node]
+    return node
+
+# --- Document comparison ---
+
+def compare(expected, actual):
+    """Returns the incompatibilities of `actual` (running service) against `expected` (project schema).
+
+    Both documents must already have their `$ref`s resolved.
+    """
+    issues = []
+
+    def add(severity, kind, path, method, location, detail):
+        issues.append({"severity": severity, "kind": kind, "path": path, "method": method.upper() if method else None,
+                       "location": location, "detail": detail})
+
+    expected_ops = operations(expected)
+    actual_ops = {(_canonical_path(p), m): (p, ops) for (p, m), ops in operations(actual).items()}
+    actual_paths = {_canonical_path(p) for p, _ in operations(actual)}
+
+    for (path, method), (path_item, operation) in sorted(expected_ops.items()):
+        key = (_canonical_path(path), method)
+        if key not in actual_ops:
+            kind = "missing_method" if key[0] in actual_paths else "missing_path"
+            add("error", kind, path, method, f"paths.{path}.{method}", "not served by the running application")
+            continue
+        _, (actual_item, actual_operation) = actual_ops[key]
+        base = f"paths.{path}.{method}"
+
+        expected_params, actual_params = _parameters(path_item, operation), _parameters(actual_item, actual_operation)
+        # Path parameters are already matched through the canonical route; only their names could differ.
+        expected_params = {k: v for k, v in expected_params.items() if k[0] != "path"}
+        actual_params = {k: v for k, v in actual_params.items() if k[0] != "path"}
+        for (location, name), param in sorted(expected_params.items()):
+            other = actual_params.get((location, name))
+            where = f"{base}.parameters.{location}.{name}"
+            if other is None:
+                add("error", "missing_parameter", path, method, where, "parameter missing")
+                continue
+            if param.get("required") and not other.get("required"):
+                add("warning", "parameter_optional", path, method, f"{where}.required", "expected required=True, got False")
+            elif other.get("required") and not param.get("required"):
+                add("error", "parameter_mismatch", path, method, f"{where}.required", "expected required=False, got True")
+            for location, detail in compare_schemas(param.get("schema"), other.get("schema"), f"{where}.schema"):
+                if detail.startswith(NO_LONGER_REQUIRED):
+                    add("warning", "parameter_optional", path, method, location, detail)
+                else:
+                    add("error", "parameter_mismatch", path, method, location, detail)
+        for (location, name), param in sorted(actual_params.items()):
+            if (location, name) not in expected_params and param.get("required"):
+                add("error", "unexpected_required_parameter", path, method, f"{base}.parameters.{location}.{name}",
+                    "required by the running application but not in the schema")
+
+        expected_body = schema_of_content((operation.get("requestBody") or {}).get("content"))
+        actual_body = schema_of_content((actual_operation.get("requestBody") or {}).get("content"))
+        for location, detail in compare_schemas(expected_body, actual_body, f"{base}.requestBody"):
+            if detail.startswith(NO_LONGER_REQUIRED):
+                add("warning", "request_field_optional", path, method, location, detail)
+            else:
+                add("error", "request_body_mismatch", path, method, location, detail)
+
+        expected_responses = operation.get("responses") or {}
+        actual_responses = actual_operation.get("responses") or {}
+        for status in sorted(expected_responses):
+            if status not in actual_responses:
+                add("error", "missing_response", path, method, f"{base}.responses.{status}", "status code not documented by the running application")
+                continue
+            expected_schema = schema_of_content(expected_responses[status].get("content"))
+            actual_schema = schema_of_content(actual_responses[status].get("content"))
+            for location, detail in compare_schemas(expected_schema, actual_schema, f"{base}.responses.{status}"):
+                if detail.startswith(EXTRA_REQUIRED):
+                    add("warning", "response_field_required", path, method, location, detail)
+                else:
+                    add("error", "response_schema_mismatch", path, method, location, detail)
+        for status in sorted(set(actual_responses) - set(expected_responses)):
+            if status != "422":  # FastAPI documents validation errors on every endpoint with a body or parameters
+                add("warning", "extra_response", path, method, f"{base}.responses.{status}", "not in the project schema")
+
+    expected_keys = {(_canonical_path(p), m) for p, m in expected_ops}
+    for key, (path, _) in sorted(actual_ops.items()):
+        if key not in expected_keys:
+            add("warning", "extra_operation", path, key[1], f"paths.{path}.{key[1]}", "served but not in the project schema")
+    return issues
@@ -0,0 +1,320 @@
+"""Applies unified diffs and search/replace blocks to files.
+
+Every hunk of a patch is matched against the current file contents first (exactly,
+then ignoring whitespace, then with up to `MAX_FUZZ` context lines trimmed from
+each end). Files are only written if every hunk in every file applies, so a
+patch either lands completely or leaves the workspace untouched.
+"""
+import difflib
+import os
+import re
+import stat
+import tempfile
+
+MAX_FUZZ = 2
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+SEARCH_MARKER = re.compile(r"^<{5,9} SEARCH\s*$")
+DIVIDER_MARKER = re.compile(r"^={5,9}\s*$")
+REPLACE_MARKER = re.compile(r"^>{5,9} REPLACE\s*$")
+# Read once: os.umask can only be read by setting it, which races with concurrent candidates.
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+class PatchError(Exception):
+    """Raised when a patch cannot be parsed."""
+
+# --- Parsing ---
+
+def _clean_path(raw):
+    path = raw.split("\t")[0].strip()
+    if path == "/dev/null":
+        return None
+    if path[:2] in ("a/", "b/"):
+        path = path[2:]
+    return path
+
+def parse_unified_diff(text):
+    """Returns [{"old_path", "new_path", "hunks": [{"header", "old_start", "lines": [(tag, text)]}]}].
+
+    Hunk line counts in the headers are not trusted; a hunk runs until the next
+    hunk or file header.
+    """
+    files, current, hunk = [], None, None
+    lines = text.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "):
+            current = {"old_path": _clean_path(line[4:]), "new_path": _clean_path(lines[i + 1][4:]), "hunks": []}
+            files.append(current)
+            hunk = None
+            i += 2
+            continue
+        match = HUNK_HEADER.match(line)
+        if match:
+            if current is None:
+                raise PatchError(f"Hunk '{line}' appears before any '---'/'+++' file header.")
+            hunk = {"header": line, "old_start": int(match.group(1)), "lines": []}
+            current["hunks"].append(hunk)
+        elif hunk is not None:
+            if line.startswith("\\"):
+                pass  # "\ No newline at end of file"
+            elif line[:1] in (" ", "+", "-"):
+                hunk["lines"].append((line[0], line[1:]))
+            elif line == "":
+                hunk["lines"].append((" ", ""))
+            else:
+                hunk = None  # "diff --git", "index ..." and other noise between files
+        i += 1
+    for file_patch in files:
+        for h in file_patch["hunks"]:
+            while h["lines"] and h["lines"][-1] == (" ", ""):
+                h["lines"].pop()
+    if not files:
+        raise PatchError("No '---'/'+++' file headers found in the patch.")
+    return files
+
+def parse_search_replace(text):
+    """Returns [{"path", "search", "replace"}] from SEARCH/REPLACE blocks."""
+    blocks, path = [], None
+    lines = text.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if SEARCH_MARKER.match(line):
+            if not path:
+                raise PatchError("A SEARCH block must be preceded by a line with the file path.")
+            search, replace = [], []
+            i += 1
+            while i < len(lines) and not DIVIDER_MARKER.match(lines[i]):
+                search.append(lines[i])
+                i += 1
+            i += 1
+            while i < len(lines) and not REPLACE_MARKER.match(lines[i]):
+                replace.append(lines[i])
+                i += 1
+            if i >= len(lines):
+                raise PatchError(f"Unterminated SEARCH/REPLACE block for {path}.")
+            blocks.append({"path": path, "search": search, "replace": replace})
+        elif line.strip() and not line.startswith("```"):
+            path = line.strip().strip("`*").strip()
+        i += 1
+    return blocks
+
+def is_search_replace(text):
+    return any(SEARCH_MARKER.match(line) for line in text.splitlines())
+
+# --- Matching ---
+
+def _normalize(line):
+    return " ".join(line.split())
+
+def _find(lines, block, start, expected, normalize=False):
+    """Returns the match position of `block` in `lines[start:]` closest to `expected`, or None."""
+    if not block:
+        return max(start, min(expected, len(lines)))
+    key = _normalize if normalize else (lambda s: s)
+    target = [key(line) for line in block]
+    first = target[0]
+    positions = [
+        pos for pos in range(start, len(lines) - len(block) + 1)
+        if key(lines[pos]) == first and [key(line) for line in lines[pos:pos + len(block)]] == target
+    ]
+    if not positions:
+        return None
+    return min(positions, key=lambda pos: abs(pos - expected))
+
+def _closest(lines, block):
+    """The region of `lines` most similar to `block`, to explain a rejected hunk."""
+    if not block or not lines or len(lines) > 5000:
+        return None
+    best = (0.0, 0)
+    size = len(block)
+    matcher = difflib.SequenceMatcher(None)
+    matcher.set_seq2("\n".join(block))
+    for pos in range(0, max(1, len(lines) - size + 1)):
+        matcher.set_seq1("\n".join(lines[pos:pos + size]))
+        if matcher.real_quick_ratio() <= best[0] or matcher.quick_ratio() <= best[0]:
+            continue
+        ratio = matcher.ratio()
+        if ratio > best[0]:
+            best = (ratio, pos)
+    ratio, pos = best
+    if ratio == 0.0:
+        return None
+    return {"line": pos + 1, "similarity": round(ratio, 2), "text": lines[pos:pos + size]}
+
+def _apply_hunk(lines, hunk_lines, start, expected):
+    """Tries exact, whitespace-insensitive and fuzzed matches. Returns (new_lines, end) or None."""
+    for fuzz in range(MAX_FUZZ + 1):
+        body = list(hunk_lines)
+        trimmed_head = 0
+        for _ in range(fuzz):
+            if body and body[0][0] == " ":
+                body.pop(0)
+                trimmed_head += 1
+            if body and body[-1][0] == " ":
+                body.pop()
+        if fuzz and not any(tag == " " for tag, _ in hunk_lines):
+            break
+        old = [text for tag, text in body if tag in (" ", "-")]
+        new = [text for tag, text in body if tag in (" ", "+")]
+        for normalize in (False, True):
+            pos = _find(lines, old, start, expected + trimmed_head, normalize)
+            if pos is not None:
+                if normalize:
+                    # Keep the file's own text for context lines; only the +/- lines change.
+                    file_old = lines[pos:pos + len(old)]
+                    merged, k = [], 0
+                    for tag, text in body:
+                        if tag == " ":
+                            merged.append(file_old[k])
+                            k += 1
+                        elif tag == "-":
+                            k += 1
+                        else:
+                            merged.append(text)
+                    new = merged
+                return lines[:pos] + new + lines[pos + len(old):], pos + len(new)
+    return None
+
+# --- Planning and applying ---
+
+def _read_lines(path):
+    with open(path, "r", newline="") as f:
+        content = f.read()
+    newline = "\r\n" if "\r\n" in content else "\n"
+    return content.splitlines(), newline, content.endswith(("\n", "\r"))
+
+def _join(lines, newline, trailing):
+    if not lines:
+        return ""
+    return newline.join(lines) + (newline if trailing else "")
+
+def plan_unified(text, root="."):
+    """Returns (changes, rejects): changes maps path -> new content (None to delete)."""
+    changes, rejects, state = {}, [], {}
+    for file_patch in parse_unified_diff(text):
+        old_path, new_path = file_patch["old_path"], file_patch["new_path"]
+        path = new_path or old_path
+        full_path = os.path.join(root, path)
+        if new_path is None:
+            changes[old_path] = None
+            continue
+        if path in state:
+            lines, newline, trailing = state[path]
+        elif old_path is not None and os.path.exists(full_path):
+            lines, newline, trailing = _read_lines(full_path)
+        elif old_path is None or not file_patch["hunks"] or all(tag != "-" and tag != " " for h in file_patch["hunks"] for tag, _ in h["lines"]):
+            lines, newline, trailing = [], "\n", True
+        else:
+            rejects.append({"file": path, "hunk": 1, "reason": "File does not exist."})
+            continue
+        start, offset = 0, 0
+        for number, hunk in enumerate(file_patch["hunks"], 1):
+            expected = max(hunk["old_start"] - 1 + offset, 0)
+            result = _apply_hunk(lines, hunk["lines"], start, expected)
+            if result is None:
+                old = [t for tag, t in hunk["lines"] if tag in (" ", "-")]
+                rejects.append({
+                    "file": path,
+                    "hunk": number,
+                    "header": hunk["header"],
+                    "reason": "Context/removed lines not found in the file (tried exact, whitespace-insensitive and fuzzed matches).",
+                    "expected": old,
+                    "closest_match": _closest(lines, old),
+                })
+                continue
+            new_lines, start = result
+            offset += len(new_lines) - len(lines)
+            lines = new_lines
+        state[path] = (lines, newline, trailing)
+        changes[path] = _join(lines, newline, trailing)
+        if old_path and new_path and old_path != new_path:
+            changes[old_path] = None
+    return changes, rejects
+
+def plan_search_replace(text, root="."):
+    changes, rejects, state = {}, [], {}
+    for number, block in enumerate(parse_search_replace(text), 1):
+        path = block["path"]
+        full_path = os.path.join(root, path)
+        if path in state:
+            lines, newline, trailing = state[path]
+        elif os.path.exists(full_path):
+            lines, newline, trailing = _read_lines(full_path)
+        elif not any(line.strip() for line in block["search"]):
+            lines, newline, trailing = [], "\n", True
+        else:
+            rejects.append({"file": path, "block": number, "reason": "File does not exist."})
+            continue
+        search = block["search"]
+        if not any(line.strip() for line in search):
+            if lines:
+                rejects.append({"file": path, "block": number, "reason": "Empty SEARCH section is only allowed for new or empty files."})
+                continue
+            lines = list(block["replace"])
+        else:
+            match = None
+            for normalize in (False, True):
+                key = _normalize if normalize else (lambda s: s)
+                target = [key(line) for line in search]
+                positions = [pos for pos in range(len(lines) - len(search) + 1)
+                             if [key(line) for line in lines[pos:pos + len(search)]] == target]
+                if len(positions) > 1:
+                    rejects.append({"file": path, "block": number, "reason": f"SEARCH text matches {len(positions)} locations (lines {', '.join(str(p + 1) for p in positions)}); include more surrounding lines."})
+                    match = False
+                    break
+                if positions:
+                    match = positions[0]
+                    break
+            if match is False:
+                continue
+            if match is None:
+                rejects.append({"file": path, "block": number, "reason": "SEARCH text not found in the file.",
+                                "expected": search, "closest_match": _closest(lines, search)})
+                continue
+            lines = lines[:match] + list(block["replace"]) + lines[match + len(search):]
+        state[path] = (lines, newline, trailing)
+        changes[path] = _join(lines, newline, trailing)
+    return changes, rejects
+
+def plan_patch(text, root="."):
+    """Computes the result of a patch without touching the disk."""
+    if is_search_replace(text):
+        return plan_search_replace(text, root)
+    return plan_unified(text, root)
+
+def apply_changes(changes, root="."):
+    """Writes every change or none: on failure, already-written files are restored."""
+    originals = {}
+    try:
+        for path, content in changes.items():
+            full_path = os.path.join(root, path)
+            if os.path.exists(full_path):
+                with open(full_path, "r", newline="") as f:
+                    originals[path] = f.read()
+            else:
+                originals[path] = None
+            if content is None:
+                if os.path.exists(full_path):
+                    os.remove(full_path)
+                continue
+            directory = os.path.dirname(full_path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".aide_patch_")
+            with os.fdopen(fd, "w", newline="") as f:
+                f.write(content)
+            # mkstemp creates the file 0600; keep the original's mode (e.g. +x), or the usual mode for new files.
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(full_path).st_mode) if originals[path] is not None else 0o666 & ~_UMASK)
+            os.replace(tmp_path, full_path)
+    except OSError:
+        for path, original in originals.items():
+            full_path = os.path.join(root, path)
+            if original is None:
+                if os.path.exists(full_path):
+                    os.remove(full_path)
+            else:
+                with open(full_path, "w", newline="") as f:
+                    f.write(original)
+        raise
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+"""Offline end-to-end benchmark of the AIDE graph.
+
+Runs the full router -> spec -> plan -> implement -> test -> critic pipeline on a
+small calculator task with every model replaced by a `FakeChatModel`, so the
+measured time is AIDE's own overhead (graph, agents, tools, static checks and the
+real pytest run) rather than the provider's. Reports total wall time, graph
+compilation time, time per node and the peak traced memory, and compares the
+medians against a stored baseline:
+
+    PYTHONPATH=aide/src python -m aide.pipeline_bench --runs 5
+    PYTHONPATH=aide/src python -m aide.pipeline_bench --update-baseline
+"""
+import argparse
+import contextlib
+import functools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest import mock
+
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+from rich import print
+from rich.table import Table
+from rich.console import Console
+
+from . import graph
+from .cascade import ModelCascade, ModelStats
+from .fake_llm import FakeChatModel
+from .utils import reset_input_handler, set_input_handler
+
+DEFAULT_BASELINE = os.path.join(".aide", "pipeline_baseline.json")
+APP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+REQUEST = "build a calculator module with an add function and tests"
+
+CALCULATOR = "def add(a, b):\n    return a + b\n"
+CALCULATOR_TEST = "from calculator import add\n\n\ndef test_add():\n    assert add(2, 3) == 5\n"
+
+SCRIPT = [
+    (r"acting as a policy router", '{"policy": "implement"}'),
+    (r"You are a specification writer", json.dumps({
+        "title": "Calculator", "description": "An add function.", "acceptance_criteria": ["add(2, 3) == 5"],
+        "non_goals": [], "deliverables": ["calculator.py", "tests/test_calculator.py"], "tests_to_run": ["pytest tests/"],
+    })),
+    (r"acting as a planner", json.dumps({"plan": ["Write `add` in calculator.py", "Test it in tests/test_calculator.py"]})),
+    (r"Your task is to implement the software", [
+        {"content": "Writing the module and its test.", "tool_calls": [
+            {"name": "write_file_tool", "args": {"path": "calculator.py", "content": CALCULATOR}},
+            {"name": "write_file_tool", "args": {"path": "tests/test_calculator.py", "content": CALCULATOR_TEST}},
+        ]},
+        '{"tool_calls": [], "confidence": 0.9}',
+    ]),
+    (r"acting as a critic", "[]"),
+]
+
+def scripted_cascade(model):
+    return ModelCascade([("fake", model)], ModelStats())
+
+@contextlib.contextmanager
+def offline_graph(model, timings):
+    """Swaps every model in the graph for `model` and times each node into `timings`."""
+    def timed(name, node):
+        @functools.wraps(node)
+        def wrapper(state):
+            start = time.perf_counter()
+            try:
+                return node(state)
+            finally:
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+        return wrapper
+
+    nodes = {name: getattr(graph, name) for name in dir(graph) if name.endswith("_node") and callable(getattr(graph, name))}
+    with contextlib.ExitStack() as stack:
+        for name in ("llm_default", "llm_implementer", "llm_refactor", "llm_tester"):
+            stack.enter_context(mock.patch.object(graph, name, scripted_cascade(model)))
+        for name, node in nodes.items():
+            stack.enter_context(mock.patch.object(graph, name, timed(name, node)))
+        yield
+
+def run_pipeline(workspace=None, trace_memory=False, model=None):
+    """Runs the scripted pipeline once in `workspace` (a fresh temporary directory by default)."""
+    model = model or FakeChatModel(SCRIPT)
+    workspace = workspace or tempfile.mkdtemp(prefix="aide-bench-")
+    timings = {}
+    previous_cwd = os.getcwd()
+    token = set_input_handler(lambda prompt, timeout=None: "y")
+    os.chdir(workspace)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with offline_graph(model, timings):
+            start = time.perf_counter()
+            app = graph.create_graph()
+            compiled = time.perf_counter()
+            final_state = app.invoke({
+                "user_request": REQUEST,
+                "app_root": APP_ROOT,
+                "user_feedback_queue": [],
+                "critic_feedback": "",
+                "iteration_count": 0,
+                "max_iterations": 3,
+                "run_performance_test": False,
+                "user_input_timeout": 0,
+                "router_confidence_threshold": 1.1,  # always exercise the router agent
+            })
+            finished = time.perf_counter()
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        os.chdir(previous_cwd)
+        reset_input_handler(token)
+    return {
+        "total": finished - start,
+        "compile": compiled - start,
+        "nodes": timings,
+        "peak_memory_kb": round(peak / 1024, 1) if peak is not None else None,
+        "llm_calls": len(model.calls),
+        "final_state": final_state,
+        "workspace": workspace,
+    }
+
+def summarize(runs):
+    """Median of each metric over `runs`; the memory peak is the first traced run's."""
+    nodes = sorted({name for run in runs for name in run["nodes"]})
+    return {
+        "total": statistics.median(run["total"] for run in runs),
+        "compile": statistics.median(run["compile"] for run in runs),
+        "nodes": {name: statistics.median(run["nodes"].get(name, 0.0) for run in runs) for name in nodes},
+        "peak_memory_kb": next((run["peak_memory_kb"] for run in runs if run["peak_memory_kb"] is not None), None),
+        "llm_calls": runs[0]["llm_calls"],
+    }
+
+def compare(current, baseline, tolerance=0.25, floor=0.005):
+    """Lists metrics more than `tolerance` worse than the baseline, ignoring time differences below `floor` seconds."""
+    metrics = [("total", current["total"], baseline.get("total")), ("compile", current["compile"], baseline.get("compile")),
+               ("peak_memory_kb", current["peak_memory_kb"], baseline.get("peak_memory_kb"))]
+    metrics += [(f"nodes.{name}", value, baseline.get("nodes", {}).get(name)) for name, value in current["nodes"].items()]
+    regressions = []
+    for name, value, reference in metrics:
+        if value is None or not reference:
+            continue
+        if name != "peak_memory_kb" and value - reference < floor:
+            continue
+        if value > reference * (1 + tolerance):
+            regressions.append({"metric": name, "baseline": reference, "current": value, "ratio": round(value / reference, 2)})
+    return regressions
+
+def print_summary(summary, baseline):
+    table = Table(title="AIDE offline pipeline benchmark")
+    table.add_column("metric")
+    table.add_column("current", justify="right")
+    table.add_column("baseline", justify="right")
+    baseline = baseline or {}
+    rows = [("total (s)", summary["total"], baseline.get("total")), ("compile (s)", summary["compile"], baseline.get("compile"))]
+    rows += [(f"{name} (s)", value, baseline.get("nodes", {}).get(name)) for name, value in summary["nodes"].items()]
+    rows.append(("peak memory (KiB)", summary["peak_memory_kb"], baseline.get("peak_memory_kb")))
+    for name, value, reference in rows:
+        table.add_row(name, f"{value:.4f}" if isinstance(value, float) else str(value), "-" if reference is None else f"{reference:.4f}")
+    Console().print(table)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the AIDE pipeline.")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs; the medians are reported.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file to compare against.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run's results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before a metric counts as a regression.")
+    args = parser.parse_args(argv)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        runs = [run_pipeline(trace_memory=True)]  # warm-up, and the only run paying for tracemalloc
+        runs += [run_pipeline() for _ in range(max(args.runs, 1))]
+    summary = summarize(runs[1:])
+    summary["peak_memory_kb"] = runs[0]["peak_memory_kb"]
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    print_summary(summary, baseline)
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(summary, f, indent=4)
+        print(f"[bold blue]Baseline written to {args.baseline}[/bold blue]")
+        return 0
+    if baseline is None:
+        print(f"[yellow]No baseline at {args.baseline}; run with --update-baseline to store one.[/yellow]")
+        return 0
+    regressions = compare(summary, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"[bold red]Regression in {regression['metric']}: {regression['baseline']:.4f} -> {regression['current']:.4f} ({regression['ratio']}x)[/bold red]")
+    if not regressions:
+        print("[bold green]No regressions against the baseline.[/bold green]")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Background loading of context the implementer needs but the plan doesn't.
+
+The code map and the API schema depend only on the files in the workspace, not
+on the spec or plan, so the graph starts loading them when a run starts and
+collects them after the plan is approved (or, for the debug and refactor
+policies, right after the spec): the work overlaps the spec and plan model
+calls and the wait for the user's approval instead of following them.
+
+A task is a `(load, fingerprint)` pair. `fingerprint` is a cheap summary of the
+task's inputs (file paths, sizes and mtimes) taken just before loading; if it
+differs when the result is collected, an agent changed the inputs in the
+meantime and the task is loaded again rather than served stale.
+"""
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import log_event
+from .workspace import get_workspace_root
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="aide-prefetch")
+_pending = {}
+_lock = threading.Lock()
+
+def file_fingerprint(paths):
+    """(path, mtime_ns, size) of each of `paths`; missing files are included as (path, None, None)."""
+    fingerprint = []
+    for path in sorted(paths):
+        try:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            fingerprint.append((path, None, None))
+    return tuple(fingerprint)
+
+def _run(load, fingerprint):
+    before = fingerprint()
+    return before, load()
+
+def start_prefetch(tasks, root=None):
+    """Starts loading each of `tasks` ({name: (load, fingerprint)}) for the workspace `root`."""
+    root = os.path.abspath(root or get_workspace_root())
+    futures = {
+        name: _executor.submit(contextvars.copy_context().run, _run, load, fingerprint)
+        for name, (load, fingerprint) in tasks.items()
+    }
+    with _lock:
+        previous = _pending.pop(root, {})
+        _pending[root] = futures
+    for future in previous.values():
+        future.cancel()
+
+def collect_prefetch(tasks, root=None):
+    """
+    Returns {name: value} for `tasks`, waiting for prefetched results that are still loading.
+    Tasks that were never started, failed, or whose inputs changed since are loaded now.
+    """
+    root = os.path.abspath(root or get_workspace_root())
+    with _lock:
+        futures = _pending.pop(root, {})
+    values, outcomes = {}, {}
+    for name, (load, fingerprint) in tasks.items():
+        future = futures.get(name)
+        outcome = "missing"
+        if future is not None:
+            try:
+                before, value = future.result()
+                if before == fingerprint():
+                    values[name], outcomes[name] = value, "prefetched"
+                    continue
+                outcome = "stale"
+            except Exception as e:
+                outcome = f"failed: {e}"
+        values[name], outcomes[name] = load(), outcome
+    log_event("prefetch_collected", outcomes)
+    return values
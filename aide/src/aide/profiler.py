@@ -0,0 +1,144 @@
+"""Profiles a project's tests or an entry point under cProfile and tracemalloc.
+
+The target runs in a child interpreter (so profiling can't disturb AIDE, and a
+crash or hang only costs the child), which writes the raw cProfile stats and
+its top allocation sites to temporary files. The parent condenses them into a
+report small enough for a prompt:
+
+- `hot_functions`: the project's own functions by cumulative time, with call
+  counts and self time; the optimization targets.
+- `hot_library_functions`: functions outside the project by self time, which
+  shows where library calls (serialization, regexes, I/O) dominate.
+- `allocations`: the project's source lines that hold the most memory at the
+  end of the run, and the traced peak.
+"""
+import json
+import os
+import pstats
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import time
+
+from .pytest_runner import project_python
+
+DRIVER = r'''
+import cProfile, json, os, runpy, sys, tracemalloc
+
+mode, target, stats_path, memory_path = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4]
+sys.path.insert(0, os.getcwd())
+tracemalloc.start(1)
+profiler = cProfile.Profile()
+exit_code = 0
+profiler.enable()
+try:
+    if mode == "pytest":
+        import pytest
+        exit_code = int(pytest.main([target, "-q", "-p", "no:cacheprovider"]))
+    elif target.endswith(".py"):
+        sys.argv = [target]
+        runpy.run_path(target, run_name="__main__")
+    elif ":" in target:
+        import importlib
+        module, _, function = target.partition(":")
+        getattr(importlib.import_module(module), function)()
+    else:
+        sys.argv = [target]
+        runpy.run_module(target, run_name="__main__", alter_sys=True)
+except SystemExit as e:
+    exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+except BaseException as e:
+    exit_code = 1
+    print(f"{type(e).__name__}: {e}", file=sys.stderr)
+finally:
+    profiler.disable()
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    profiler.dump_stats(stats_path)
+    with open(memory_path, "w") as f:
+        json.dump({"exit_code": exit_code, "peak_kb": round(peak / 1024, 1), "allocations": [
+            {"site": f"{s.traceback[0].filename}:{s.traceback[0].lineno}", "size_kb": round(s.size / 1024, 1), "count": s.count}
+            for s in snapshot.statistics("lineno")[:5000]
+        ]}, f)
+sys.exit(exit_code)
+'''
+
+LIBRARY_DIRS = tuple(os.path.abspath(p) for p in {sysconfig.get_paths()["stdlib"], sysconfig.get_paths()["purelib"], sysconfig.get_paths()["platlib"]})
+
+def in_project(filename, root):
+    """Whether `filename` is project code: under `root` and not in a virtualenv or the interpreter's libraries."""
+    path = os.path.abspath(os.path.join(root, filename))
+    if not path.startswith(os.path.join(root, "")) or path.startswith(LIBRARY_DIRS):
+        return False
+    return not any(part in ("venv", ".venv", "site-packages") for part in path.split(os.sep))
+
+def _relative(filename, root):
+    path = os.path.abspath(os.path.join(root, filename))
+    return os.path.relpath(path, root) if path.startswith(os.path.join(root, "")) else filename
+
+def summarize_stats(stats_path, root, top=15):
+    """Condenses a cProfile stats file into the project's hot functions and the hottest library functions."""
+    stats = pstats.Stats(stats_path).stats
+    project, library = [], []
+    for (filename, line, name), (_, calls, self_time, cumulative, _) in stats.items():
+        if filename == "~" or filename.startswith("<"):
+            continue
+        entry = {
+            "function": f"{_relative(filename, root)}:{line}({name})",
+            "calls": calls,
+            "self_time": round(self_time, 6),
+            "cumulative_time": round(cumulative, 6),
+            "per_call_ms": round(cumulative / calls * 1000, 4) if calls else None,
+        }
+        (project if in_project(filename, root) else library).append(entry)
+    project.sort(key=lambda e: e["cumulative_time"], reverse=True)
+    library.sort(key=lambda e: e["self_time"], reverse=True)
+    return {
+        "total_calls": sum(s[1] for s in stats.values()),
+        "hot_functions": project[:top],
+        "hot_library_functions": library[:max(top // 3, 3)],
+    }
+
+def profile_target(target="tests", entry_point=None, timeout=600, top=15, cwd=None):
+    """
+    Runs pytest on `target`, or `entry_point` (`script.py`, `package.module` or `module:function`)
+    if given, under cProfile and tracemalloc in a subprocess, and returns the condensed report.
+    """
+    root = os.path.abspath(cwd or os.getcwd())
+    mode, subject = ("entry", entry_point) if entry_point else ("pytest", target)
+    with tempfile.TemporaryDirectory(prefix="aide_profile_") as scratch:
+        driver, stats_path, memory_path = (os.path.join(scratch, name) for name in ("driver.py", "profile.pstats", "memory.json"))
+        with open(driver, "w") as f:
+            f.write(DRIVER)
+        start = time.monotonic()
+        try:
+            # The project's own interpreter, so its dependencies are importable.
+            result = subprocess.run([project_python(root) or sys.executable, driver, mode, subject, stats_path, memory_path],
+                                    capture_output=True, text=True, timeout=timeout, cwd=root)
+        except subprocess.TimeoutExpired:
+            return {"status": "error", "target": subject, "message": f"Profiling timed out after {timeout}s."}
+        duration = round(time.monotonic() - start, 3)
+        if not os.path.exists(stats_path) or not os.path.exists(memory_path):
+            return {"status": "error", "target": subject, "exit_code": result.returncode,
+                    "message": "The profiled run produced no statistics.", "stderr": result.stderr[-2000:]}
+        with open(memory_path, "r") as f:
+            memory = json.load(f)
+        report = {
+            "status": "ok" if memory["exit_code"] == 0 else "target_failed",
+            "target": subject,
+            "exit_code": memory["exit_code"],
+            "duration": duration,
+            **summarize_stats(stats_path, root, top),
+            "peak_memory_kb": memory["peak_kb"],
+            "allocations": [dict(a, site=_relative(a["site"], root)) for a in memory["allocations"]
+                            if in_project(a["site"].rpartition(":")[0], root)][:top],
+        }
+    if report["status"] != "ok":
+        report["stderr"] = result.stderr[-2000:]
+    return report
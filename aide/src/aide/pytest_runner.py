@@ -0,0 +1,110 @@
+"""Runs pytest directly and turns its JUnit XML report into the `test_report` structure.
+
+The tests run under the project's own interpreter, so its dependencies are
+importable: the python of a virtualenv in the project (`.venv`, `venv`, `env`),
+else the `pytest` on PATH, and only if there is neither, AIDE's own interpreter.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+def _testcase_status(testcase):
+    for child in testcase:
+        if child.tag in ("failure", "error", "skipped"):
+            status = {"failure": "failed", "error": "error", "skipped": "skipped"}[child.tag]
+            message = child.get("message") or ""
+            details = (child.text or "").strip()
+            return status, message, details
+    return "passed", "", ""
+
+def parse_junit_xml(path):
+    """Parses a JUnit XML file into a list of per-test results."""
+    tests = []
+    root = ET.parse(path).getroot()
+    for testcase in root.iter("testcase"):
+        classname = testcase.get("classname", "")
+        name = testcase.get("name", "")
+        status, message, details = _testcase_status(testcase)
+        tests.append({
+            "name": f"{classname}::{name}" if classname else name,
+            "status": status,
+            "duration": float(testcase.get("time") or 0.0),
+            "message": message,
+            "logs": details.splitlines()[-40:] if details else [],
+        })
+    return tests
+
+VENV_DIRS = (".venv", "venv", "env")
+
+def project_python(root=None):
+    """The python of the project's virtualenv under `root`, or None if it has none."""
+    root = os.path.abspath(root or os.getcwd())
+    for name in VENV_DIRS:
+        for executable in (os.path.join("bin", "python"), os.path.join("Scripts", "python.exe")):
+            path = os.path.join(root, name, executable)
+            if os.path.isfile(path) and os.access(path, os.X_OK):
+                return path
+    return None
+
+def pytest_command(root=None):
+    """The command that runs the project's pytest (see the module docstring)."""
+    python = project_python(root)
+    if python:
+        return [python, "-m", "pytest"]
+    on_path = shutil.which("pytest")
+    return [on_path] if on_path else [sys.executable, "-m", "pytest"]
+
+def run_pytest(target="tests", timeout=600, extra_args=None, cwd=None):
+    """Runs pytest on `target` and returns a test report dict.
+
+    `report.overall_status` is "passed", "failed", "no_tests" or "error".
+    """
+    fd, xml_path = tempfile.mkstemp(suffix=".xml", prefix="aide_pytest_")
+    os.close(fd)
+    command = pytest_command(cwd) + [target, f"--junitxml={xml_path}", "-q", "-p", "no:cacheprovider"]
+    command += list(extra_args or [])
+    start = time.monotonic()
+    try:
+        # `python -m pytest` puts the project directory on sys.path; a `pytest` script doesn't.
+        root = os.path.abspath(cwd or os.getcwd())
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+        result = subprocess.run(command, capture_output=True, text=True, timeout=timeout, cwd=cwd, env=env)
+    except subprocess.TimeoutExpired:
+        os.remove(xml_path)
+        return {"report": {
+            "tests": [], "summary": {}, "duration": timeout, "exit_code": None,
+            "overall_status": "error", "message": f"pytest timed out after {timeout}s.",
+        }}
+    duration = time.monotonic() - start
+    try:
+        tests = parse_junit_xml(xml_path) if os.path.getsize(xml_path) else []
+    except ET.ParseError:
+        tests = []
+    finally:
+        os.remove(xml_path)
+
+    summary = {status: sum(1 for t in tests if t["status"] == status) for status in ("passed", "failed", "error", "skipped")}
+    summary["total"] = len(tests)
+    if result.returncode == 0 and tests:
+        overall_status = "passed"
+    elif result.returncode == 5 or (result.returncode == 0 and not tests):
+        overall_status = "no_tests"
+    elif summary["failed"] or summary["error"]:
+        overall_status = "failed"
+    else:
+        # Collection/usage errors produce no test cases but a non-zero exit code.
+        overall_status = "error"
+    report = {
+        "tests": tests,
+        "summary": summary,
+        "duration": round(duration, 3),
+        "exit_code": result.returncode,
+        "overall_status": overall_status,
+    }
+    if overall_status != "passed":
+        report["output_tail"] = (result.stdout + result.stderr).splitlines()[-60:]
+    return {"report": report}
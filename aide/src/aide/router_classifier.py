@@ -0,0 +1,130 @@
+"""Local policy classifier that lets `router_node` skip the LLM for obvious requests.
+
+Two signals are combined:
+- keyword/regex rules for the common phrasings ("fix the failing test ...", "add endpoint ...");
+- a small TF-IDF nearest-centroid model trained on past routing decisions the LLM
+  made, read back from the `routing_decision` events in `aide_log.jsonl`.
+"""
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+
+POLICIES = ["implement", "debug", "refactor", "research", "clarify", "exit"]
+
+RULES = {
+    "debug": r"\b(fix|fixes|debug|failing|fails|failed|broken|bug|bugs|error|errors|exception|traceback|crash(es|ing)?)\b",
+    "refactor": r"\b(refactor|refactoring|clean ?up|restructure|reorganize|rename|simplify|deduplicate|extract)\b",
+    "research": r"\b(research|investigate|compare|evaluate|look into|find out|which (library|framework)|pros and cons)\b",
+    "implement": r"\b(add|create|implement|build|write|generate|make|support)\b",
+}
+_COMPILED_RULES = {policy: re.compile(pattern, re.IGNORECASE) for policy, pattern in RULES.items()}
+
+MIN_TRAINING_EXAMPLES = 8
+_TOKEN = re.compile(r"[a-z0-9_]+")
+_models = {}
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+def classify_by_rules(request):
+    """Returns (policy, confidence) from the keyword rules, or (None, 0.0)."""
+    matches = {policy: rule.findall(request) for policy, rule in _COMPILED_RULES.items()}
+    matched = [policy for policy, found in matches.items() if found]
+    if not matched:
+        return None, 0.0
+    words = tokenize(request)
+    first_word = words[0] if words else ""
+    leading = [p for p in matched if _COMPILED_RULES[p].fullmatch(first_word)]
+    if len(matched) == 1:
+        if leading:
+            return matched[0], 0.95
+        # A single keyword somewhere in the request ("a page that shows an error banner") is too weak
+        # to skip the LLM router; several distinct ones ("the test fails with a traceback") are not.
+        hits = {m if isinstance(m, str) else m[0] for m in matches[matched[0]]}
+        return matched[0], 0.85 if len({h.lower() for h in hits}) > 1 else 0.6
+    if len(leading) == 1:
+        # "fix the failing add endpoint": the leading verb decides.
+        return leading[0], 0.8
+    # Several intents and no leading verb to break the tie: prefer the most specific one.
+    for policy in ("debug", "refactor", "research", "implement"):
+        if policy in matched:
+            return policy, 0.5
+
+class TfidfRouter:
+    """Nearest-centroid classifier over TF-IDF vectors of past requests."""
+    def __init__(self, examples):
+        documents = [(Counter(tokenize(text)), policy) for text, policy in examples]
+        document_frequency = Counter()
+        for counts, _ in documents:
+            document_frequency.update(counts.keys())
+        total = len(documents)
+        self.idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in document_frequency.items()}
+        centroids = defaultdict(Counter)
+        for counts, policy in documents:
+            for term, weight in self._vector(counts).items():
+                centroids[policy][term] += weight
+        self.centroids = {policy: self._normalize(vector) for policy, vector in centroids.items()}
+
+    def _vector(self, counts):
+        return self._normalize({term: count * self.idf.get(term, 0.0) for term, count in counts.items()})
+
+    @staticmethod
+    def _normalize(vector):
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {t: w / norm for t, w in vector.items()} if norm else {}
+
+    def predict(self, request):
+        """Returns (policy, confidence) where confidence blends similarity and margin."""
+        vector = self._vector(Counter(tokenize(request)))
+        scores = sorted(
+            ((sum(w * centroid.get(t, 0.0) for t, w in vector.items()), policy) for policy, centroid in self.centroids.items()),
+            reverse=True,
+        )
+        if not scores or scores[0][0] <= 0:
+            return None, 0.0
+        best, policy = scores[0]
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        return policy, round(min(1.0, best) * (best - runner_up) / best, 3)
+
+def load_training_examples(log_path="aide_log.jsonl"):
+    """Past (request, policy) pairs decided by the LLM router."""
+    examples = []
+    if not os.path.exists(log_path):
+        return examples
+    with open(log_path, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            details = entry.get("details") or {}
+            if entry.get("event_type") == "routing_decision" and details.get("source") == "llm" and details.get("policy") in POLICIES:
+                examples.append((details["user_request"], details["policy"]))
+    return examples
+
+def get_tfidf_router(log_path="aide_log.jsonl"):
+    """Returns a model trained on the log, retrained only when the log changes."""
+    try:
+        stamp = os.stat(log_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _models.get(log_path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    examples = load_training_examples(log_path)
+    model = TfidfRouter(examples) if len(examples) >= MIN_TRAINING_EXAMPLES and len({p for _, p in examples}) > 1 else None
+    _models[log_path] = (stamp, model)
+    return model
+
+def classify(request, log_path="aide_log.jsonl"):
+    """Returns (policy, confidence, source) for `request` without calling the LLM."""
+    rule_policy, rule_confidence = classify_by_rules(request)
+    model = get_tfidf_router(log_path)
+    model_policy, model_confidence = model.predict(request) if model else (None, 0.0)
+    if rule_policy and rule_policy == model_policy:
+        return rule_policy, round(min(1.0, max(rule_confidence, model_confidence) + 0.05), 3), "rules+tfidf"
+    if model_confidence > rule_confidence:
+        return model_policy, model_confidence, "tfidf"
+    return rule_policy, rule_confidence, "rules"
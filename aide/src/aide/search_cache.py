@@ -0,0 +1,180 @@
+"""Persistent cache in front of the web search tool.
+
+Agents search for the same library documentation again and again, across
+iterations and sessions. `CachedSearch` answers a query from an on-disk cache
+when it has a fresh result for it, keyed by the normalized query (case, spacing,
+surrounding quotes and trailing punctuation don't matter), and only asks the
+backend otherwise:
+
+- entries expire after `ttl` seconds; the least recently used ones are evicted
+  once the cache exceeds `max_bytes`;
+- concurrent identical queries share one backend call;
+- in offline mode only cached results are served, stale ones included;
+- if the backend fails, a stale cached result is better than none.
+
+A backend is any callable taking a query and returning a JSON-serializable
+list of results; anything else is treated as a failure and never cached.
+`tavily_backend` wraps Tavily and `FakeSearchBackend` answers from a dict for
+tests and offline runs.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+from langchain_core.tools import StructuredTool
+
+from .utils import log_event
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+
+def normalize_query(query):
+    query = re.sub(r"\s+", " ", str(query)).strip().lower()
+    return query.strip("\"'`").rstrip("?!.,;: ").strip()
+
+class SearchCache:
+    def __init__(self, directory, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, clock=time.time):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key, allow_stale=False):
+        """The cached entry for `key`, or None if there is none (or it expired and `allow_stale` is false)."""
+        try:
+            with open(self._path(key), "r") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if not allow_stale and self.clock() - entry["created"] > self.ttl:
+            return None
+        try:
+            os.utime(self._path(key))  # the file's mtime is its last use, for eviction
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, query, results):
+        entry = {"query": query, "results": results, "created": self.clock()}
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+            self._evict()
+        return entry
+
+    def _evict(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+class CachedSearch:
+    def __init__(self, backend, cache, offline=False, namespace="default"):
+        self.backend = backend
+        self.cache = cache
+        self.offline = offline or backend is None
+        self.namespace = namespace
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "shared": 0, "stale": 0}
+
+    def key(self, query):
+        return hashlib.sha256(f"{self.namespace}\n{normalize_query(query)}".encode()).hexdigest()
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def search(self, query):
+        key = self.key(query)
+        entry = self.cache.get(key, allow_stale=self.offline)
+        if entry is not None:
+            self._count("hits")
+            return entry["results"]
+        if self.offline:
+            return f"No cached results for '{query}' (web search is offline)."
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+        if not leader:
+            self._count("shared")
+            return future.result()
+
+        self._count("misses")
+        results = None
+        try:
+            results = self.backend(query)
+            if not isinstance(results, list):
+                raise ValueError(f"unexpected search results: {str(results)[:200]}")
+            self.cache.put(key, query, results)
+        except Exception as e:
+            stale = self.cache.get(key, allow_stale=True)
+            if stale is not None:
+                self._count("stale")
+                log_event("web_search_stale", {"query": query, "error": str(e)})
+                results = stale["results"]
+            else:
+                results = f"Error: Web search failed: {e}"
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            # Followers must never wait forever, even if the leader is interrupted (KeyboardInterrupt, cancellation).
+            if results is None:
+                future.set_exception(RuntimeError(f"Web search for '{query}' was interrupted."))
+            else:
+                future.set_result(results)
+        return results
+
+def tavily_backend(max_results=3):
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    tavily = TavilySearchResults(max_results=max_results)
+
+    def search(query):
+        results = tavily.invoke({"query": query})
+        # The tool catches its own errors (rate limits, network) and returns them as a string.
+        if not isinstance(results, list):
+            raise RuntimeError(str(results))
+        return results
+    return search
+
+class FakeSearchBackend:
+    """Answers from `results` (normalized query -> results) and records every query it is asked."""
+    def __init__(self, results=None, default=None, latency=0.0):
+        self.results = {normalize_query(q): r for q, r in (results or {}).items()}
+        self.default = [] if default is None else default
+        self.latency = latency
+        self.queries = []
+
+    def __call__(self, query):
+        self.queries.append(query)
+        if self.latency:
+            time.sleep(self.latency)
+        return self.results.get(normalize_query(query), self.default)
+
+def make_web_search_tool(search):
+    def web_search_tool(query: str):
+        """Searches the web for documentation, examples or error messages. Results are cached across sessions."""
+        return search.search(query)
+    return StructuredTool.from_function(web_search_tool)
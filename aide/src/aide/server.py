@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+"""Long-running AIDE server.
+
+Keeps the compiled graph and the model clients warm between runs and accepts
+sessions over a local HTTP API. Node events (what `interactive_runner` prints
+from `app.stream`) are streamed over a WebSocket, and every prompt the CLI would
+read from stdin -- plan approval, critic selection, command approval -- is
+answered through the API instead.
+
+    POST /sessions                      start a session
+    GET  /sessions                      list sessions
+    GET  /sessions/{id}                 session status, pending prompt, event count
+    POST /sessions/{id}/reply           answer the pending prompt
+    POST /sessions/{id}/feedback        queue feedback for the next implementer/critic turn
+    WS   /sessions/{id}/events          replay and stream events, accepts replies and feedback
+    GET  /metrics                       LLM client pool counters (calls, retries, throttling, circuit state)
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import sys
+import threading
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel
+
+from .app import get_project_path
+from .llm_client import all_metrics
+from .graph import create_graph
+from .services import get_service_manager
+from .workspace import release_journal
+from .utils import (
+    FeedbackQueue,
+    log_event,
+    reset_feedback_queue,
+    reset_input_handler,
+    set_feedback_queue,
+    set_input_handler,
+)
+
+FINAL_EVENTS = ("done", "error")
+
+class SessionRequest(BaseModel):
+    user_request: str
+    new: bool = False
+    max_iterations: int = 10
+    run_performance_test: bool = False
+    user_input_timeout: float = 30.0
+    candidates: int = 1
+
+class Reply(BaseModel):
+    text: str = ""
+
+def _jsonable(value):
+    return json.loads(json.dumps(value, default=str))
+
+class Session:
+    """A single graph run and the channel between it and its API clients."""
+    def __init__(self, request: SessionRequest):
+        self.id = uuid.uuid4().hex[:12]
+        self.request = request
+        self.status = "queued"
+        self.pending_prompt = None
+        self.events = []
+        self._subscribers = []
+        self._replies = queue.Queue()
+        self.feedback = FeedbackQueue()
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        with self._lock:
+            self.events.append(event)
+            subscribers = list(self._subscribers)
+        for loop, events in subscribers:
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+    def subscribe(self, loop):
+        """Returns an asyncio queue pre-filled with the event history."""
+        events = asyncio.Queue()
+        with self._lock:
+            for event in self.events:
+                events.put_nowait(event)
+            self._subscribers.append((loop, events))
+        return events
+
+    def unsubscribe(self, events):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s[1] is not events]
+
+    def ask(self, prompt, timeout=None):
+        """Input handler used by the graph: blocks the run until a reply arrives or `timeout` passes."""
+        with self._lock:
+            self.status = "waiting_input"
+            self.pending_prompt = prompt
+        self.publish({"type": "prompt", "prompt": prompt, "timeout": timeout})
+        try:
+            reply = self._replies.get(timeout=timeout)
+        except queue.Empty:
+            reply = None
+        with self._lock:
+            self.pending_prompt = None
+            self.status = "running"
+            # Extra replies, or one that raced the timeout, must not answer the next, unrelated prompt.
+            while not self._replies.empty():
+                self._replies.get_nowait()
+        self.publish({"type": "reply", "text": reply})
+        return reply
+
+    def reply(self, text):
+        """Answers the pending prompt. Returns False, dropping the reply, if no prompt is pending."""
+        with self._lock:
+            if self.pending_prompt is None:
+                return False
+            self._replies.put(text)
+            return True
+
+    def summary(self):
+        return {
+            "session_id": self.id,
+            "user_request": self.request.user_request,
+            "status": self.status,
+            "pending_prompt": self.pending_prompt,
+            "events": len(self.events),
+        }
+
+class SessionManager:
+    """Owns the compiled graph and runs queued sessions one at a time.
+
+    Sessions run serially because the tools resolve paths against the process
+    working directory, which each session changes to its project directory.
+    """
+    def __init__(self, workspace=".", graph_factory=create_graph):
+        self.workspace = os.path.abspath(workspace)
+        self.app_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+        self.graph = graph_factory()
+        self.sessions = {}
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._work, daemon=True)
+        self._worker.start()
+
+    def submit(self, request: SessionRequest):
+        session = Session(request)
+        self.sessions[session.id] = session
+        self._queue.put(session)
+        return session
+
+    def get(self, session_id):
+        return self.sessions.get(session_id)
+
+    def _work(self):
+        while True:
+            session = self._queue.get()
+            try:
+                self._run(session)
+            finally:
+                os.chdir(self.workspace)
+
+    def _run(self, session: Session):
+        request = session.request
+        session.status = "running"
+        os.chdir(self.workspace)
+        if request.new:
+            project_path = get_project_path(request.user_request)
+            os.makedirs(project_path, exist_ok=True)
+            os.chdir(project_path)
+        session.publish({"type": "start", "session_id": session.id, "cwd": os.getcwd()})
+        log_event("session_start", {"user_request": request.user_request, "session_id": session.id})
+
+        initial_state = {
+            "user_request": request.user_request,
+            "run_id": session.id,
+            "app_root": self.app_root,
+            "user_feedback_queue": [],
+            "critic_feedback": "",
+            "iteration_count": 0,
+            "max_iterations": request.max_iterations,
+            "run_performance_test": request.run_performance_test,
+            "user_input_timeout": request.user_input_timeout,
+            "candidates": request.candidates,
+        }
+        token = set_input_handler(session.ask)
+        feedback_token = set_feedback_queue(session.feedback)
+        final_summary = None
+        try:
+            for event in self.graph.stream(initial_state):
+                for node, output in event.items():
+                    if output and output.get("final_summary"):
+                        final_summary = output["final_summary"]
+                    session.publish({"type": "node", "node": node, "output": _jsonable(output)})
+        except Exception as e:
+            session.status = "error"
+            session.publish({"type": "error", "error": str(e)})
+            return
+        finally:
+            reset_feedback_queue(feedback_token)
+            reset_input_handler(token)
+            get_service_manager().stop_all(os.getcwd())  # a finished session's servers must not hold its ports
+            release_journal(os.getcwd())
+        session.status = "done"
+        session.publish({"type": "done", "final_summary": final_summary})
+
+def create_app(manager: SessionManager = None, workspace="."):
+    manager = manager or SessionManager(workspace)
+    api = FastAPI(title="AIDE Server")
+    api.state.manager = manager
+
+    def _session_or_404(session_id):
+        session = manager.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+        return session
+
+    @api.post("/sessions")
+    def create_session(request: SessionRequest):
+        return manager.submit(request).summary()
+
+    @api.get("/sessions")
+    def list_sessions():
+        return [session.summary() for session in manager.sessions.values()]
+
+    @api.get("/metrics")
+    def metrics():
+        return all_metrics()
+
+    @api.get("/sessions/{session_id}")
+    def get_session(session_id: str):
+        return _session_or_404(session_id).summary()
+
+    @api.post("/sessions/{session_id}/reply")
+    def reply(session_id: str, body: Reply):
+        session = _session_or_404(session_id)
+        if not session.reply(body.text):
+            raise HTTPException(status_code=409, detail="Session is not waiting for input.")
+        return {"status": "accepted"}
+
+    @api.post("/sessions/{session_id}/feedback")
+    def feedback(session_id: str, body: Reply):
+        _session_or_404(session_id).feedback.put(body.text)
+        return {"status": "queued"}
+
+    @api.websocket("/sessions/{session_id}/events")
+    async def session_events(websocket: WebSocket, session_id: str):
+        session = manager.get(session_id)
+        if session is None:
+            await websocket.close(code=4404)
+            return
+        await websocket.accept()
+        events = session.subscribe(asyncio.get_running_loop())
+
+        async def forward_replies():
+            while True:
+                message = await websocket.receive_json()
+                if message.get("type") == "reply":
+                    if not session.reply(message.get("text", "")):
+                        log_event("reply_dropped", {"session_id": session.id, "text": message.get("text", "")})
+                elif message.get("type") == "feedback":
+                    session.feedback.put(message.get("text", ""))
+
+        receiver = asyncio.create_task(forward_replies())
+        try:
+            while True:
+                event = await events.get()
+                await websocket.send_json(event)
+                if event["type"] in FINAL_EVENTS:
+                    break
+        except WebSocketDisconnect:
+            pass
+        finally:
+            receiver.cancel()
+            session.unsubscribe(events)
+        await websocket.close()
+
+    return api
+
+def main():
+    parser = argparse.ArgumentParser(description="AIDE server - keeps the agent graph warm and serves sessions over HTTP/WebSocket")
+    parser.add_argument('--host', default="127.0.0.1", help='Interface to bind to.')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on.')
+    parser.add_argument('--workspace', default=".", help='Directory sessions run in (and create --new projects under).')
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(workspace=args.workspace), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""Long-lived background services (dev servers, compose stacks) shared across iterations.
+
+Bringing a server up and down around every test run costs most of the tester's
+time, and a plain shell command can't keep a process running in the background
+at all. `ServiceManager` starts each named service once, in its own process
+group with its output appended to `.aide/services/<name>.log`, and keeps it
+running across iterations. Starting a service that is already running with the
+same command is a no-op unless one of its watched files changed since it
+started, in which case it is restarted; either way the call returns only once
+the service's readiness probe (an HTTP URL answering below 500, or a TCP port
+accepting connections) passes while the process is still alive, or it exits,
+or the timeout runs out. A service whose probe already passes before it is
+started is not started at all: another process holds its port, and the probe
+would report that process as this service.
+
+Services belong to a workspace root: they are keyed by `(root, name)`, and the
+server stops a session's services when the session ends so they don't hold
+its ports.
+
+Logs are tail-able: `logs` returns the last lines plus the byte offset of the
+end of the log, and a later call with that offset returns only what was
+written since. Compose stacks are started in the foreground (`docker compose
+up`, not `-d`) so that stopping the process group stops the stack.
+"""
+import atexit
+import glob
+import os
+import signal
+import socket
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from .prefetch import file_fingerprint
+from .workspace import get_workspace_root
+
+SERVICE_DIR = os.path.join(".aide", "services")
+DEFAULT_WATCH = ["**/*.py", "requirements*.txt", "pyproject.toml", "Dockerfile", "docker-compose*.yml", "compose*.yaml"]
+IGNORED_PARTS = {".aide", ".git", ".venv", "venv", "node_modules", "__pycache__"}
+
+def watched_files(root, patterns):
+    files = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(root, pattern), recursive=True):
+            if not IGNORED_PARTS.intersection(os.path.relpath(path, root).split(os.sep)):
+                files.add(path)
+    return files
+
+def probe_http(url, timeout=2.0):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status < 500
+    except urllib.error.HTTPError as e:
+        return e.code < 500
+    except (urllib.error.URLError, OSError, ValueError):
+        return False
+
+def probe_tcp(port, host="127.0.0.1", timeout=2.0):
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+class Service:
+    def __init__(self, name, command, root, watch, ready_url=None, ready_port=None):
+        self.name = name
+        self.command = command
+        self.root = root
+        self.watch = list(watch)
+        self.ready_url = ready_url
+        self.ready_port = ready_port
+        self.log_path = os.path.join(root, SERVICE_DIR, f"{name}.log")
+        self.process = None
+        self.fingerprint = None
+        self.started_at = None
+        self.restarts = 0
+
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def ready(self):
+        if self.ready_url:
+            return probe_http(self.ready_url)
+        if self.ready_port:
+            return probe_tcp(self.ready_port)
+        return self.running()
+
+    def current_fingerprint(self):
+        return file_fingerprint(watched_files(self.root, self.watch))
+
+    def describe(self):
+        return {
+            "name": self.name,
+            "command": self.command,
+            "running": self.running(),
+            "pid": self.process.pid if self.process else None,
+            "exit_code": self.process.poll() if self.process else None,
+            "uptime": round(time.monotonic() - self.started_at, 1) if self.running() else None,
+            "restarts": self.restarts,
+            "log": os.path.relpath(self.log_path, self.root),
+        }
+
+class ServiceManager:
+    def __init__(self, stop_timeout=10.0, poll_interval=0.2):
+        self.services = {}  # (root, name) -> Service
+        self.stop_timeout = stop_timeout
+        self.poll_interval = poll_interval
+        self._lock = threading.RLock()
+
+    def start(self, name, command, ready_url=None, ready_port=None, watch=None, timeout=60.0, root=None):
+        """
+        Starts `name` with `command`, or keeps it running if it already is with the same command and none
+        of its `watch` globs' files changed since. Waits up to `timeout` seconds for the readiness probe.
+        """
+        root = os.path.abspath(root or get_workspace_root())
+        with self._lock:
+            service = self.services.get((root, name))
+            same = (service is not None and service.running() and service.command == command and service.root == root
+                    and (service.ready_url, service.ready_port) == (ready_url, ready_port))
+            if same and (watch is None or list(watch) == service.watch) and service.current_fingerprint() == service.fingerprint:
+                reused = service
+            else:
+                reused = None
+                previous = service
+                service = Service(name, command, root, DEFAULT_WATCH if watch is None else watch, ready_url, ready_port)
+                if previous is not None:
+                    self._terminate(previous)
+                    service.restarts = previous.restarts + 1
+                    del self.services[(root, name)]
+                if (ready_url or ready_port) and service.ready():
+                    # Another process (e.g. another project's server) answers the probe; it would pass for this one.
+                    return dict(service.describe(), status="port_in_use", ready=False,
+                                message="Something else already answers the readiness probe; stop it or use another port.")
+                self._spawn(service)
+            self.services[(root, name)] = service
+        if reused:
+            return dict(self._wait_ready(service, timeout), status="reused")
+        return dict(self._wait_ready(service, timeout), status="restarted" if service.restarts else "started")
+
+    def _spawn(self, service):
+        os.makedirs(os.path.dirname(service.log_path), exist_ok=True)
+        service.fingerprint = service.current_fingerprint()
+        with open(service.log_path, "ab") as log:
+            log.write(f"\n--- {time.strftime('%Y-%m-%d %H:%M:%S')} starting: {service.command}\n".encode())
+            log.flush()
+            service.process = subprocess.Popen(
+                service.command, shell=True, cwd=service.root, stdout=log, stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL, start_new_session=True,
+            )
+        service.started_at = time.monotonic()
+
+    def _wait_ready(self, service, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            if not service.running():
+                return dict(service.describe(), ready=False, message="The service exited.",
+                            log_tail=self.logs(service.name, 30, root=service.root)["lines"])
+            if service.ready() and service.running():  # a probe the process didn't outlive answered someone else
+                return dict(service.describe(), ready=True)
+            if time.monotonic() >= deadline:
+                return dict(service.describe(), ready=False, message=f"Not ready after {timeout}s.",
+                            log_tail=self.logs(service.name, 30, root=service.root)["lines"])
+            time.sleep(self.poll_interval)
+
+    def _terminate(self, service):
+        if not service.running():
+            return
+        try:
+            os.killpg(service.process.pid, signal.SIGTERM)
+            service.process.wait(self.stop_timeout)
+        except subprocess.TimeoutExpired:
+            os.killpg(service.process.pid, signal.SIGKILL)
+            service.process.wait()
+        except ProcessLookupError:
+            pass
+
+    def _get(self, name, root=None):
+        return self.services.get((os.path.abspath(root or get_workspace_root()), name))
+
+    def running_with(self, name, command, root=None):
+        """Whether `name` is running `command` (so it was approved when it was started)."""
+        service = self._get(name, root)
+        return service is not None and service.running() and service.command == command
+
+    def stop(self, name, root=None):
+        with self._lock:
+            service = self.services.pop((os.path.abspath(root or get_workspace_root()), name), None)
+            if service is None:
+                return {"name": name, "status": "unknown"}
+            self._terminate(service)
+            return dict(service.describe(), status="stopped")
+
+    def stop_all(self, root=None):
+        """Stops every service, or only those of the workspace `root`."""
+        with self._lock:
+            keys = [key for key in self.services if root is None or key[0] == os.path.abspath(root)]
+            return [self.stop(name, service_root) for service_root, name in keys]
+
+    def status(self, root=None):
+        """Every service of the workspace `root` (the current one by default)."""
+        root = os.path.abspath(root or get_workspace_root())
+        with self._lock:
+            return [dict(s.describe(), ready=s.running() and s.ready()) for (r, _), s in self.services.items() if r == root]
+
+    def logs(self, name, lines=50, offset=None, root=None):
+        """The last `lines` lines of the service's log, or everything after byte `offset`, and the offset to continue from."""
+        service = self._get(name, root)
+        if service is None or not os.path.exists(service.log_path):
+            return {"name": name, "lines": [], "next_offset": 0, "message": f"No log for service '{name}'."}
+        with open(service.log_path, "rb") as f:
+            if offset is not None:
+                f.seek(offset)
+                text = f.read()
+            else:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(size - 64 * 1024, 0))
+                text = f.read()
+            next_offset = f.tell()
+        content = text.decode("utf-8", errors="replace").splitlines()
+        return {"name": name, "lines": content if offset is not None else content[-lines:], "next_offset": next_offset}
+
+_manager = ServiceManager()
+atexit.register(_manager.stop_all)
+
+def get_service_manager():
+    return _manager
@@ -0,0 +1,227 @@
+"""Fast local checks run on freshly written files before the LLM tester and critic.
+
+A syntax error or an import that cannot resolve makes every test fail, so there is
+no point spending two model round trips finding that out. These checks use only
+`compile`/`ast` and module lookups and finish in milliseconds.
+
+Third-party modules are looked up in AIDE's own interpreter, not the project's
+environment, so a dependency that isn't installed here is only a warning (none
+at all if the project declares it in its requirements, `pyproject.toml` or
+`Dockerfile`). Only unresolved project-local modules and names are errors.
+"""
+import ast
+import glob
+import importlib.util
+import os
+import re
+import sys
+
+_STDLIB = set(getattr(sys, "stdlib_module_names", ())) | set(sys.builtin_module_names)
+
+def _module_name(path):
+    module = os.path.splitext(os.path.normpath(path))[0].replace(os.sep, ".")
+    return module[:-len(".__init__")] if module.endswith(".__init__") else module
+
+def _local_modules(code_map):
+    """Maps dotted module names from the code map to their files."""
+    modules = {}
+    for path in (code_map or {}):
+        modules[_module_name(os.path.relpath(path))] = os.path.abspath(path)
+    return modules
+
+def _module_file(module, search_dirs, local_modules):
+    if module in local_modules:
+        return local_modules[module]
+    relative = module.replace(".", os.sep)
+    for directory in search_dirs:
+        for candidate in (relative + ".py", os.path.join(relative, "__init__.py")):
+            path = os.path.join(directory, candidate)
+            if os.path.isfile(path):
+                return os.path.abspath(path)
+        if os.path.isdir(os.path.join(directory, relative)):
+            # Namespace package
+            return os.path.abspath(os.path.join(directory, relative))
+    return None
+
+def _is_installed(module):
+    top = module.split(".")[0]
+    if top in _STDLIB:
+        return True
+    try:
+        return importlib.util.find_spec(top) is not None
+    except (ImportError, ValueError):
+        return False
+
+def _normalize(name):
+    return re.sub(r"[-_.]+", "_", name).lower()
+
+def _declared_requirements(root):
+    """Normalized names of the distributions the project declares it depends on."""
+    names = set()
+    sources = glob.glob(os.path.join(root, "requirements*.txt")) + [os.path.join(root, name) for name in ("pyproject.toml", "setup.py", "setup.cfg", "Dockerfile")]
+    for path in sources:
+        try:
+            with open(path, "r") as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError):
+            continue
+        if path.endswith(".txt"):
+            lines = text.splitlines()
+        elif path.endswith("Dockerfile"):
+            lines = [arg for match in re.findall(r"pip3? install ([^&;|\n]+)", text) for arg in match.split()]
+        else:
+            lines = re.findall(r"[\"']([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(?:[<>=!~;][^\"']*)?[\"']", text)
+        for line in lines:
+            match = re.match(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)", line)
+            if match and not line.lstrip().startswith(("#", "-")):
+                names.add(_normalize(match.group(1)))
+    return names
+
+def _exported_names(path, code_map, cache):
+    """Top-level names a module defines, or None if they can't be known statically."""
+    if path in cache:
+        return cache[path]
+    names = None
+    if os.path.isfile(path):
+        try:
+            with open(path, "r") as f:
+                tree = ast.parse(f.read(), filename=path)
+        except (SyntaxError, UnicodeDecodeError, OSError):
+            tree = None
+        if tree is not None:
+            names = set()
+            for node in tree.body:
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    names.add(node.name)
+                elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                    if any(alias.name == "*" for alias in node.names):
+                        names = None
+                        break
+                    names.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+                elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+                    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                    for target in targets:
+                        names.update(n.id for n in ast.walk(target) if isinstance(n, ast.Name))
+                if names is not None and "__getattr__" in names:
+                    names = None
+                    break
+            if names is not None:
+                entry = (code_map or {}).get(os.path.relpath(path), {})
+                names.update(entry.get("classes", []))
+                names.update(entry.get("functions", []))
+    cache[path] = names
+    return names
+
+def _guarded_imports(tree):
+    """Import nodes inside try blocks (optional-dependency pattern) are not checked."""
+    guarded = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Try):
+            for child in node.body:
+                for inner in ast.walk(child):
+                    if isinstance(inner, (ast.Import, ast.ImportFrom)):
+                        guarded.add(id(inner))
+    return guarded
+
+def check_file(path, code_map=None, root=".", _cache=None):
+    """Returns a list of problems found in a single Python file."""
+    cache = {} if _cache is None else _cache
+    problems = []
+    try:
+        with open(path, "r") as f:
+            source = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return [{"file": path, "line": 0, "kind": "unreadable", "severity": "error", "message": str(e)}]
+    try:
+        tree = compile(source, path, "exec", ast.PyCF_ONLY_AST)
+    except SyntaxError as e:
+        return [{"file": path, "line": e.lineno or 0, "kind": "syntax_error", "severity": "error", "message": f"{e.__class__.__name__}: {e.msg}"}]
+
+    file_dir = os.path.dirname(os.path.abspath(path))
+    search_dirs = [os.path.abspath(root), file_dir]
+    local_modules = _local_modules(code_map)
+    guarded = _guarded_imports(tree)
+    declared_key = ("declared", os.path.abspath(root))
+    if declared_key not in cache:
+        cache[declared_key] = _declared_requirements(os.path.abspath(root))
+
+    def unresolved(node, module):
+        top = module.split(".")[0]
+        local = _module_file(top, search_dirs, local_modules) or any(m.split(".")[0] == top for m in local_modules)
+        if local:
+            return {"file": path, "line": node.lineno, "kind": "unresolved_import", "severity": "error",
+                    "message": f"Cannot resolve module '{module}'."}
+        if _normalize(top) in cache[declared_key]:
+            return None
+        return {"file": path, "line": node.lineno, "kind": "missing_dependency", "severity": "warning",
+                "message": f"Module '{module}' is not installed here and not declared in the project's requirements."}
+
+    for node in ast.walk(tree):
+        if id(node) in guarded:
+            continue
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if not (_module_file(alias.name, search_dirs, local_modules) or _is_installed(alias.name)):
+                    problem = unresolved(node, alias.name)
+                    if problem:
+                        problems.append(problem)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = file_dir
+                for _ in range(node.level - 1):
+                    base = os.path.dirname(base)
+                module_label = "." * node.level + (node.module or "")
+                module_path = _module_file(node.module, [base], {}) if node.module else os.path.join(base, "__init__.py")
+                if node.module is None and not os.path.exists(module_path):
+                    module_path = base
+            else:
+                module_label = node.module
+                module_path = _module_file(node.module, search_dirs, local_modules)
+                if module_path is None and _is_installed(node.module):
+                    continue
+                if module_path is None:
+                    problem = unresolved(node, node.module)
+                    if problem:
+                        problems.append(problem)
+                    continue
+            if module_path is None:
+                problems.append({"file": path, "line": node.lineno, "kind": "unresolved_import", "severity": "error",
+                                 "message": f"Cannot resolve module '{module_label}'."})
+                continue
+            if os.path.isdir(module_path):
+                continue
+            names = _exported_names(module_path, code_map, cache)
+            if names is None:
+                continue
+            package_dir = os.path.dirname(module_path) if module_path.endswith("__init__.py") else None
+            for alias in node.names:
+                if alias.name == "*" or alias.name in names:
+                    continue
+                if package_dir and _module_file(alias.name, [package_dir], {}):
+                    continue
+                problems.append({"file": path, "line": node.lineno, "kind": "unresolved_name", "severity": "error",
+                                 "message": f"'{alias.name}' is not defined in '{module_label}'."})
+    return problems
+
+def check_files(paths, code_map=None, root="."):
+    """Runs the static checks over every Python file in `paths`. Problems with severity "error" fail the gate."""
+    cache = {}
+    problems = []
+    for path in sorted(set(paths)):
+        if path.endswith(".py") and os.path.isfile(path):
+            problems.extend(check_file(path, code_map, root, cache))
+    return problems
+
+def problems_to_feedback(problems):
+    """Formats problems as critic-style change requests for the implementer."""
+    return [
+        {
+            "change_request_type": "bug",
+            "description": f"{os.path.relpath(p['file'])}:{p['line']}: {p['message']}",
+            "severity": "critical",
+            "priority": "high",
+            "source": "static_check",
+            "kind": p["kind"],
+        }
+        for p in problems
+    ]
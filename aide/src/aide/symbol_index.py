@@ -0,0 +1,177 @@
+"""Symbol-level index of the workspace's Python code.
+
+Maps qualified names (`calculator.add`, `shop.cart.Cart.total`) to their file,
+line range, signature and docstring, and keeps an inverted index from
+identifiers to the symbols that use them. Agents use it through
+`lookup_symbol_tool` and `search_code_tool` to pull the few functions they need
+instead of whole files.
+"""
+import ast
+import math
+import os
+import re
+from collections import defaultdict
+
+EXCLUDED_DIRS = {".git", ".venv", "venv", "__pycache__", "node_modules", ".aide", "benchmark_system_DONT_TOUCH"}
+_WORD = re.compile(r"[A-Z]+[0-9]*(?![a-z])|[A-Z]?[a-z]+[0-9]*|[0-9]+")
+
+def split_identifier(identifier):
+    """`parseHTTPResponse_v2` -> ['parse', 'http', 'response', 'v2'], plus the whole lowercased name."""
+    parts = [p.lower() for chunk in identifier.split("_") for p in _WORD.findall(chunk)]
+    return {identifier.lower(), *parts}
+
+def _signature(node):
+    if isinstance(node, ast.ClassDef):
+        bases = [ast.unparse(b) for b in node.bases] + [ast.unparse(k) for k in node.keywords]
+        return f"class {node.name}({', '.join(bases)})" if bases else f"class {node.name}"
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+def _identifiers(node, skip_nested=False):
+    identifiers = set()
+    stack = list(ast.iter_child_nodes(node))
+    while stack:
+        child = stack.pop()
+        if skip_nested and isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            identifiers.add(child.name)
+            continue
+        if isinstance(child, ast.Name):
+            identifiers.add(child.id)
+        elif isinstance(child, ast.Attribute):
+            identifiers.add(child.attr)
+        elif isinstance(child, ast.arg):
+            identifiers.add(child.arg)
+        elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            identifiers.add(child.name)
+        stack.extend(ast.iter_child_nodes(child))
+    return identifiers
+
+class SymbolIndex:
+    def __init__(self, root="."):
+        self.root = os.path.abspath(root)
+        self.symbols = {}
+        self.identifiers = defaultdict(set)
+        self._files = {}
+
+    def _module_name(self, path):
+        module = os.path.splitext(os.path.relpath(path, self.root))[0].replace(os.sep, ".")
+        return module[:-len(".__init__")] if module.endswith(".__init__") else module
+
+    def _python_files(self):
+        for directory, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS and not d.endswith(".egg-info")]
+            for name in files:
+                if name.endswith(".py"):
+                    yield os.path.join(directory, name)
+
+    def _remove_file(self, path):
+        _, qualnames = self._files.pop(path, (None, []))
+        for qualname in qualnames:
+            entry = self.symbols.pop(qualname, None)
+            for token in (entry or {}).get("_tokens", ()):
+                self.identifiers[token].discard(qualname)
+
+    def _index_file(self, path, stamp):
+        self._remove_file(path)
+        qualnames = []
+        try:
+            with open(path, "r") as f:
+                tree = ast.parse(f.read(), filename=path)
+        except (SyntaxError, UnicodeDecodeError, OSError):
+            self._files[path] = (stamp, qualnames)
+            return
+
+        def visit(body, prefix, in_class):
+            for node in body:
+                if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    continue
+                qualname = f"{prefix}.{node.name}"
+                is_class = isinstance(node, ast.ClassDef)
+                tokens = set()
+                for identifier in _identifiers(node, skip_nested=is_class) | {node.name}:
+                    tokens |= split_identifier(identifier)
+                self.symbols[qualname] = {
+                    "qualname": qualname,
+                    "name": node.name,
+                    "kind": "class" if is_class else ("method" if in_class else "function"),
+                    "file": os.path.relpath(path, self.root),
+                    "start_line": min([node.lineno] + [d.lineno for d in node.decorator_list]),
+                    "end_line": node.end_lineno,
+                    "signature": _signature(node),
+                    "docstring": (ast.get_docstring(node) or "").split("\n\n")[0],
+                    "_tokens": tokens,
+                }
+                for token in tokens:
+                    self.identifiers[token].add(qualname)
+                qualnames.append(qualname)
+                visit(node.body, qualname, is_class)
+
+        visit(tree.body, self._module_name(path), False)
+        self._files[path] = (stamp, qualnames)
+
+    def refresh(self):
+        """Re-indexes only the files added, changed or removed since the last refresh."""
+        seen = set()
+        for path in self._python_files():
+            seen.add(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if self._files.get(path, (None,))[0] != stamp:
+                self._index_file(path, stamp)
+        for path in set(self._files) - seen:
+            self._remove_file(path)
+        return self
+
+    def source(self, qualname, max_lines=80):
+        entry = self.symbols[qualname]
+        with open(os.path.join(self.root, entry["file"]), "r") as f:
+            lines = f.readlines()[entry["start_line"] - 1:entry["end_line"]]
+        if len(lines) > max_lines:
+            lines = lines[:max_lines] + [f"... ({len(lines) - max_lines} more lines)\n"]
+        return "".join(lines)
+
+    def _public(self, qualname, include_source, max_lines=80):
+        entry = {k: v for k, v in self.symbols[qualname].items() if not k.startswith("_")}
+        if include_source:
+            entry["source"] = self.source(qualname, max_lines)
+        return entry
+
+    def lookup(self, name, include_source=True):
+        """Finds symbols by exact qualified name or by dotted suffix (`add`, `Cart.total`)."""
+        if name in self.symbols:
+            matches = [name]
+        else:
+            matches = sorted(q for q in self.symbols if q.endswith("." + name))
+        return [self._public(q, include_source) for q in matches]
+
+    def search(self, query, limit=5, include_source=True):
+        """Ranks symbols by the IDF-weighted identifiers they share with `query`."""
+        tokens = set()
+        for word in re.findall(r"\w+", query):
+            tokens |= split_identifier(word)
+        total = max(len(self.symbols), 1)
+        scores = defaultdict(float)
+        for token in tokens:
+            holders = self.identifiers.get(token)
+            if not holders:
+                continue
+            weight = math.log(1 + total / len(holders))
+            for qualname in holders:
+                scores[qualname] += weight
+                if token in split_identifier(self.symbols[qualname]["name"]):
+                    scores[qualname] += weight
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [dict(self._public(q, include_source, max_lines=40), score=round(s, 3)) for q, s in ranked]
+
+_indexes = {}
+
+def get_symbol_index(root="."):
+    """Returns the (incrementally refreshed) index for `root`."""
+    root = os.path.abspath(root)
+    if root not in _indexes:
+        _indexes[root] = SymbolIndex(root)
+    return _indexes[root].refresh()
@@ -0,0 +1,44 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from .artifacts import ArtifactStore, artifact_text, is_artifact, load_artifact
+
+class TestArtifactStore(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.store = ArtifactStore(self.root)
+
+    def test_round_trip_returns_a_copy(self):
+        ref = self.store.put("spec", {"title": "Calculator", "criteria": ["add"]})
+        self.assertTrue(is_artifact(ref))
+        value = self.store.get(ref)
+        value["criteria"].append("mutated")
+        self.assertEqual(self.store.get(ref), {"title": "Calculator", "criteria": ["add"]})
+        self.assertEqual(json.loads(self.store.text(ref))["title"], "Calculator")
+
+    def test_identical_content_is_stored_once(self):
+        first = self.store.put("plan", {"plan": ["a"]}, iteration=0)
+        second = self.store.put("plan", {"plan": ["a"]}, iteration=0)
+        self.assertEqual(first, second)
+        self.assertEqual(len(os.listdir(self.store.object_dir)), 1)
+        self.assertEqual(len(self.store.history("plan")), 1)
+
+    def test_history_and_reload(self):
+        """Each iteration's version is kept and survives opening the store again."""
+        self.store.put("test_report", {"status": "failed"}, iteration=0)
+        ref = self.store.put("test_report", {"status": "passed"}, iteration=1)
+        reopened = ArtifactStore(self.root)
+        self.assertEqual([v["iteration"] for v in reopened.history("test_report")], [0, 1])
+        self.assertEqual(reopened.get(ref), {"status": "passed"})
+
+    def test_plain_values_pass_through(self):
+        self.assertEqual(load_artifact({"a": 1}), {"a": 1})
+        self.assertIsNone(load_artifact(None))
+        self.assertEqual(artifact_text({"a": 1}), json.dumps({"a": 1}, indent=4))
+
+if __name__ == '__main__':
+    unittest.main()
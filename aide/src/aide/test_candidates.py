@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+from .candidates import CANDIDATE_DIR, run_candidates, select_best
+from .tools import pop_written_files, read_file_tool, write_file_tool
+from .workspace import _journals, get_journal
+
+TEST = "from calc import add\n\ndef test_add():\n    assert add(2, 3) == 5\n\ndef test_add_negative():\n    assert add(-1, 1) == 0\n"
+
+ATTEMPTS = [
+    "def add(a, b):\n    return a + b if a > 0 else 1\n",
+    "def add(a, b):\n    # add the numbers\n    result = a + b\n    return result\n",
+    "def add(a, b):\n    return a + b\n",
+]
+
+class TestCandidates(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        os.makedirs(os.path.join(self.root, "tests"))
+        with open(os.path.join(self.root, "tests", "test_calc.py"), "w") as f:
+            f.write(TEST)
+        with open(os.path.join(self.root, "calc.py"), "w") as f:
+            f.write("def add(a, b):\n    raise NotImplementedError\n")
+        with open(os.path.join(self.root, "conftest.py"), "w") as f:
+            f.write("import sys, os\nsys.path.insert(0, os.path.dirname(__file__))\n")
+
+    def test_best_candidate_is_promoted(self):
+        """Each candidate writes into its own copy; the passing one with the smallest diff is promoted."""
+        def implement(index):
+            self.assertIn("NotImplementedError", read_file_tool.invoke({"path": "calc.py"}))
+            write_file_tool.invoke({"path": "calc.py", "content": ATTEMPTS[index]})
+            return f"model-{index}"
+
+        winner, candidates = run_candidates(3, implement, 1, self.root)
+        self.assertEqual([c["pass_rate"] for c in candidates], [0.5, 1.0, 1.0])
+        self.assertEqual(winner["index"], 2)
+        self.assertEqual(winner["result"], "model-2")
+        with open(os.path.join(self.root, "calc.py")) as f:
+            self.assertEqual(f.read(), ATTEMPTS[2])
+        self.assertEqual(winner["promoted"], [os.path.join(self.root, "calc.py")])
+        self.assertEqual(list(get_journal(self.root).changed_files(1)), ["calc.py"])
+        self.assertFalse(os.path.exists(winner["root"]))
+        self.assertEqual([root for root in _journals if root.startswith(CANDIDATE_DIR)], [])
+        pop_written_files()
+
+    def test_failed_candidate_loses(self):
+        candidates = [
+            {"index": 0, "pass_rate": -1.0, "diff_size": 0},
+            {"index": 1, "pass_rate": 0.0, "diff_size": 10},
+        ]
+        self.assertEqual(select_best(candidates)["index"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+from .cascade import ModelCascade, ModelStats
+from .workspace import get_journal, reset_workspace_root, set_workspace_root
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+from . import graph
+from .fake_llm import FakeChatModel
+from .models import Agent
+from .tools import pop_written_files, write_file_tool
+
+class Reply:
+    def __init__(self, content):
+        self.content = content
+        self.tool_calls = []
+
+class ScriptedModel:
+    """Answers every turn with the same content after `delay` seconds and counts the calls."""
+    def __init__(self, content, delay=0.0):
+        self.content = content
+        self.delay = delay
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        time.sleep(self.delay)
+        return Reply(self.content)
+
+class TestModelCascade(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        with open(os.path.join(self.root, "review_prompt.txt"), "w") as f:
+            f.write("Review {code}")
+
+    def agent(self, cascade, escalate=False):
+        return Agent(cascade, {}, "review_prompt.txt", app_root=self.root, escalate=escalate)
+
+    def test_escalates_on_invalid_json_and_low_confidence(self):
+        """Flash's invalid (even after a correction request) or unsure answers are retried on pro, and count against flash."""
+        flash, pro = ScriptedModel("not json"), ScriptedModel('{"verdict": "ok"}', delay=0.01)
+        cascade = ModelCascade([("flash", flash), ("pro", pro)], ModelStats())
+        self.assertEqual(self.agent(cascade).run(code="x"), {"verdict": "ok"})
+        self.assertEqual((flash.calls, pro.calls), (2, 1))
+        flash.content = '{"verdict": "maybe", "confidence": 0.2}'
+        self.assertEqual(self.agent(cascade).run(code="x"), {"verdict": "ok"})
+        stats = cascade.stats.get("review", "flash")
+        self.assertEqual((stats["calls"], stats["successes"]), (2, 0))
+        self.assertIsNotNone(stats["latency"])
+
+    def test_escalation_undoes_the_failed_turn(self):
+        """The stronger tier starts from the files as they were before the weaker tier's turn."""
+        flash = FakeChatModel([
+            (r"^Review", [{"content": "", "tool_calls": [{"name": "write_file_tool", "args": {"path": "a.py", "content": "broken"}}]},
+                          "not json"]),
+            (r"could not be used", "still not json"),
+        ])
+        pro = ScriptedModel('{"verdict": "ok"}')
+        with open(os.path.join(self.root, "a.py"), "w") as f:
+            f.write("original")
+        token = set_workspace_root(self.root)
+        try:
+            get_journal().start_run("test")
+            get_journal().begin(1)
+            cascade = ModelCascade([("flash", flash), ("pro", pro)], ModelStats())
+            agent = Agent(cascade, {"write_file_tool": write_file_tool}, "review_prompt.txt", app_root=self.root)
+            self.assertEqual(agent.run(code="x"), {"verdict": "ok"})
+            with open(os.path.join(self.root, "a.py")) as f:
+                self.assertEqual(f.read(), "original")
+            self.assertEqual(get_journal().changed_files(1), {})
+        finally:
+            reset_workspace_root(token)
+            pop_written_files()
+
+    def test_turn_with_commands_is_not_escalated(self):
+        class CommandTool:
+            name = "command_runner_tool"
+            def invoke(self, args):
+                return "ran"
+
+        flash = FakeChatModel([
+            (r"^Review", [{"content": "", "tool_calls": [{"name": "command_runner_tool", "args": {"command": "make"}}]}, "not json"]),
+            (r"could not be used", "still not json"),
+        ])
+        pro = ScriptedModel('{"verdict": "ok"}')
+        cascade = ModelCascade([("flash", flash), ("pro", pro)], ModelStats())
+        Agent(cascade, {"command_runner_tool": CommandTool()}, "review_prompt.txt", app_root=self.root).run(code="x")
+        self.assertEqual(pro.calls, 0)
+
+    def test_routing_adapts_to_statistics(self):
+        """A node that flash keeps failing starts on pro, except for a periodic retry on flash."""
+        stats = ModelStats()
+        cascade = ModelCascade([("flash", None), ("pro", None)], stats, explore_every=3)
+        self.assertEqual([m for m, _ in cascade.plan("critic")], ["flash", "pro"])
+        for _ in range(3):
+            stats.record("critic", "flash", False, 1.0)
+        self.assertEqual([m for m, _ in cascade.plan("critic")], ["pro"])
+        self.assertEqual([m for m, _ in cascade.plan("critic")], ["flash", "pro"])
+        self.assertEqual([m for m, _ in cascade.plan("critic", escalate=True)], ["pro"])
+        self.assertEqual([m for m, _ in cascade.plan("router")], ["flash", "pro"])
+
+    def test_outcome_reported_against_the_agents_turn(self):
+        """A later verdict goes to the model that produced that agent's answer, whatever ran since, and is persisted."""
+        path = os.path.join(self.root, "model_stats.json")
+        flash, pro = ScriptedModel('{"tool_calls": []}'), ScriptedModel('{"tool_calls": []}')
+        cascade = ModelCascade([("flash", flash), ("pro", pro)], ModelStats(path))
+        first, second = self.agent(cascade), self.agent(cascade, escalate=True)
+        first.run(code="x")
+        second.run(code="y")
+        self.assertEqual((first.turn, second.turn), (("review", "flash"), ("review", "pro")))
+        cascade.report_outcome(first.turn, False)
+        self.assertEqual(ModelStats(path).get("review", "flash")["calls"], 2)
+        self.assertEqual(ModelStats(path).get("review", "pro")["calls"], 1)
+
+    def test_rolled_back_attempt_counts_as_a_failure(self):
+        """A regressing attempt is a failed turn for the cascade and the streak, though the restored tree passes."""
+        def pytest_report(**statuses):
+            tests = [{"name": name, "status": status} for name, status in statuses.items()]
+            overall = "passed" if all(s == "passed" for s in statuses.values()) else "failed"
+            return {"report": {"overall_status": overall, "summary": {"total": len(tests)}, "duration": 0.1, "tests": tests}}
+
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        token = set_workspace_root(self.root)
+        try:
+            journal = get_journal()
+            journal.start_run("test")
+            journal.record_outcome(1, pytest_report(test_a="passed", test_b="passed"))
+            journal.commit(1)
+            journal.begin(2)
+            state = {"iteration_count": 2, "test_failure_streak": 0, "app_root": self.root,
+                     "implementer_turn": ("implementer", "flash"), "profile_report": {"hot_functions": []},
+                     "benchmark_report": {"regressions": []},
+                     "candidate_pytest_report": pytest_report(test_a="passed", test_b="failed")}
+            with mock.patch.object(graph, "llm_implementer") as implementer:
+                result = graph.tester_node(state)
+            implementer.report_outcome.assert_called_once_with(("implementer", "flash"), False)
+            self.assertEqual((result["test_failure_streak"], result["implementer_turn"]), (1, None))
+            # Both measured the previous iteration's code.
+            self.assertEqual((result["profile_report"], result["benchmark_report"]), (None, None))
+        finally:
+            reset_workspace_root(token)
+            os.chdir(cwd)
+
+if __name__ == '__main__':
+    unittest.main()
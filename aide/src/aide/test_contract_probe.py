@@ -0,0 +1,138 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .contract_probe import build_probes, check_shape, example_for, run_probes
+
+ITEM = {
+    "type": "object",
+    "required": ["id", "name"],
+    "properties": {"id": {"type": "integer"}, "name": {"type": "string"}, "price": {"type": "number"}},
+}
+
+SCHEMA = {
+    "paths": {
+        "/items/{item_id}": {"get": {
+            "parameters": [{"name": "item_id", "in": "path", "required": True, "schema": {"type": "integer"}}],
+            "responses": {"200": {"content": {"application/json": {"schema": ITEM}}}},
+        }},
+        "/items": {"post": {
+            "requestBody": {"content": {"application/json": {"schema": ITEM}}},
+            "responses": {"201": {"content": {"application/json": {"schema": ITEM}}}},
+        }},
+        "/search": {"get": {
+            "parameters": [{"name": "q", "in": "query", "required": True, "schema": {"type": "string"}}],
+            "responses": {"200": {"content": {"application/json": {"schema": {"type": "array", "items": ITEM}}}}},
+        }},
+    }
+}
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves /items correctly and breaks /search: it returns items without a name."""
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    requests_seen = 0
+    methods_seen = []
+
+    def do_GET(self):
+        StubHandler.methods_seen.append("GET")
+        if self.path.startswith("/flaky"):
+            StubHandler.requests_seen += 1
+            self.send_json(500 if StubHandler.requests_seen % 2 == 0 else 200, {"id": 1, "name": "widget"})
+        elif self.path.startswith("/items/"):
+            self.send_json(200, {"id": int(self.path.rsplit("/", 1)[1]), "name": "widget"})
+        elif self.path.startswith("/search?q="):
+            self.send_json(200, [{"id": 1}])
+        else:
+            self.send_json(404, {"detail": "Not Found"})
+
+    def do_POST(self):
+        StubHandler.methods_seen.append("POST")
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.send_json(201, body)
+
+    def do_PUT(self):
+        StubHandler.methods_seen.append("PUT")
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.send_json(200, body)
+
+    def do_DELETE(self):
+        StubHandler.methods_seen.append("DELETE")
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+class TestContractProbe(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_examples_satisfy_their_schema(self):
+        """Generated payloads pass the same shape check used on responses."""
+        self.assertEqual(list(check_shape(ITEM, example_for(ITEM))), [])
+        probes = {p["path"]: p for p in build_probes(SCHEMA)}
+        self.assertEqual(probes["/items/{item_id}"]["url_path"], "/items/1")
+        self.assertEqual(probes["/search"]["params"], {"q": "q"})
+
+    def test_probes_against_stub(self):
+        """Every endpoint is probed; the one returning the wrong shape fails with the field that is missing."""
+        result = run_probes(SCHEMA, self.base_url, concurrency=4, repeat=2)
+        by_path = {r["path"]: r for r in result["endpoints"]}
+        self.assertEqual((result["passed"], result["failed"]), (2, 1))
+        self.assertTrue(by_path["/items"]["passed"])
+        self.assertEqual(by_path["/items"]["status_code"], 201)
+        self.assertEqual(by_path["/search"]["problems"], ["body[0].name: required field missing"])
+        self.assertGreater(by_path["/items/{item_id}"]["latency_ms"]["max"], 0)
+
+    def test_every_repeated_response_is_checked(self):
+        """With repeat > 1, a failing response fails the probe even when the last one passes."""
+        schema = {"paths": {"/flaky": {"get": {"responses": {"200": {"content": {"application/json": {"schema": ITEM}}}}}}}}
+        StubHandler.requests_seen = 0
+        result = run_probes(schema, self.base_url, concurrency=1, repeat=3)
+        endpoint = result["endpoints"][0]
+        self.assertEqual((result["failed"], endpoint["status_code"], endpoint["failed_requests"]), (1, 500, 1))
+        self.assertTrue(endpoint["problems"][0].startswith("status 500 is not documented"))
+
+    def test_mutations_are_ordered_around_reads(self):
+        """Creates run before the reads, updates and deletes after them, so a read never races a delete."""
+        item_id = [{"name": "item_id", "in": "path", "required": True, "schema": {"type": "integer"}}]
+        schema = {"paths": {
+            "/items/{item_id}": {
+                "get": SCHEMA["paths"]["/items/{item_id}"]["get"],
+                "put": {"parameters": item_id, "requestBody": {"content": {"application/json": {"schema": ITEM}}},
+                        "responses": {"200": {"content": {"application/json": {"schema": ITEM}}}}},
+                "delete": {"parameters": item_id, "responses": {"204": {}}},
+            },
+            "/items": SCHEMA["paths"]["/items"],
+        }}
+        StubHandler.methods_seen = []
+        result = run_probes(schema, self.base_url, concurrency=4, repeat=2)
+        self.assertEqual(result["failed"], 0)
+        self.assertEqual(StubHandler.methods_seen, ["POST", "POST", "GET", "GET", "PUT", "PUT", "DELETE", "DELETE"])
+        self.assertEqual([(r["method"], r["path"]) for r in result["endpoints"]],
+                         [(p["method"], p["path"]) for p in build_probes(schema)])
+
+    def test_unreachable_service(self):
+        result = run_probes(SCHEMA, "http://127.0.0.1:9", timeout=1)
+        self.assertEqual(result["failed"], 3)
+        self.assertTrue(result["endpoints"][0]["problems"][0].startswith("request failed"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+import unittest
+from .file_reader import FileReader
+from .tools import read_file_tool, write_file_tool
+from .workspace import reset_workspace_root, set_workspace_root
+
+class TestFileReader(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.path = os.path.join(self.root, "app.log")
+        with open(self.path, "w") as f:
+            f.write("".join(f"line {i}\n" for i in range(1, 1001)))
+
+    def test_line_and_byte_ranges(self):
+        reader = FileReader()
+        self.assertEqual(reader.read(self.path, 10, 12), "[Lines 10-12 of 1000]\nline 10\nline 11\nline 12\n")
+        self.assertEqual(reader.read(self.path, start_line=1000), "[Lines 1000-1000 of 1000]\nline 1000\n")
+        self.assertEqual(reader.read(self.path, offset=7, length=7), "[Bytes 7-14 of 8893]\nline 2\n")
+        self.assertEqual(reader.read(self.path, 2000), "[Lines 2000-1000 of 1000]\n")
+        self.assertTrue(reader.read(self.path).startswith("line 1\nline 2\n"))
+
+    def test_large_files_are_memory_mapped(self):
+        """Ranged reads give the same result whether the file is cached or mapped."""
+        cached, mapped = FileReader(), FileReader(mmap_threshold=1024)
+        self.assertEqual(cached.read(self.path, 500, 510), mapped.read(self.path, 500, 510))
+        self.assertIsNone(mapped._entries[os.path.abspath(self.path)]["data"])
+
+    def test_cache_is_invalidated_by_changes_and_writes(self):
+        reader = FileReader()
+        reader.read(self.path, 1, 1)
+        reader.read(self.path, 2, 2)
+        self.assertEqual((reader.hits, reader.misses), (1, 1))
+        with open(self.path, "a") as f:
+            f.write("line 1001\n")
+        self.assertEqual(reader.read(self.path, 1001, 1001), "[Lines 1001-1001 of 1001]\nline 1001\n")
+
+        token = set_workspace_root(self.root)
+        try:
+            self.assertIn("line 5", read_file_tool.invoke({"path": "app.log", "start_line": 5, "end_line": 5}))
+            write_file_tool.invoke({"path": "app.log", "content": "replaced\n"})
+            self.assertEqual(read_file_tool.invoke({"path": "app.log"}), "replaced\n")
+        finally:
+            reset_workspace_root(token)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+from .json_extract import JSONExtractionError, extract_json
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+from .fake_llm import FakeChatModel
+from .models import Agent
+
+class TestExtractJson(unittest.TestCase):
+
+    def test_prose_and_fences(self):
+        self.assertEqual(extract_json('{"a": 1}'), ({"a": 1}, []))
+        value, repairs = extract_json('Here is the plan:\n```json\n{"plan": ["a"]}\n```\nLet me know!')
+        self.assertEqual((value, repairs), ({"plan": ["a"]}, ["extracted from a code fence"]))
+        self.assertEqual(extract_json('The issues are [{"severity": "minor"}] and {"x": 1}.')[0], [{"severity": "minor"}])
+        self.assertEqual(extract_json('```python\nd = {"no": 1}\n```\nAnswer: {"yes": 2}')[0], {"yes": 2})
+
+    def test_prose_brackets_do_not_win(self):
+        """An empty value in the prose loses to the answer after it, or to any value the caller accepts."""
+        self.assertEqual(extract_json('Sure. If empty, return [] . {"plan": ["write add"]}')[0], {"plan": ["write add"]})
+        text = 'Use {"plan": ["a long example step", "and another one"]} as the format. {"plan": ["a"], "done": true}'
+        self.assertEqual(extract_json(text, accept=lambda value: "done" in value)[0], {"plan": ["a"], "done": True})
+
+    def test_repairs(self):
+        value, repairs = extract_json('{"a": [1, 2,], "b": "line one\nline two", "c": True, "d": None,}')
+        self.assertEqual(value, {"a": [1, 2], "b": "line one\nline two", "c": True, "d": None})
+        self.assertEqual(set(repairs), {"removed trailing commas", "escaped control characters in strings", "converted Python literals"})
+        self.assertEqual(extract_json('{"text": "True, {not a bracket] \\" still text"}')[0], {"text": 'True, {not a bracket] " still text'})
+
+    def test_truncation_drops_incomplete_elements(self):
+        """A value cut off mid-way keeps only its complete parts; a half-written tool call is dropped."""
+        truncated = '{"tool_calls": [{"tool_name": "write_file_tool", "args": {"path": "a.py", "content": "x = 1"}}, {"tool_name": "write_file_tool", "args": {"path": "b.py", "content": "def f(\n'
+        value, repairs = extract_json(truncated)
+        self.assertEqual([c["args"]["path"] for c in value["tool_calls"]], ["a.py"])
+        self.assertIn("closed a truncated value", repairs)
+        self.assertEqual(extract_json('{"title": "Calculator", "description": "An add')[0], {"title": "Calculator"})
+
+    def test_truncated_single_tool_call_is_dropped(self):
+        """A lone tool call cut off anywhere, even after its args, is never kept."""
+        for truncated in ('{"tool_calls": [{"tool_name": "write_file_tool", "args": {"path": "a.py", "content": "x = ',
+                          '{"tool_calls": [{"tool_name": "write_file_tool", "args": {"path": "a.py"}',
+                          '{"tool_calls": [{"tool_name": "write_file_tool", "args": {"path": "a.py"}}'):
+            value, repairs = extract_json(truncated)
+            self.assertEqual(value, {"tool_calls": []})
+            self.assertIn("dropped a truncated tool call", repairs)
+
+    def test_truncated_numbers_and_literals_are_not_kept(self):
+        self.assertEqual(extract_json('{"service": "api", "ready_port": 80')[0], {"service": "api"})
+        self.assertEqual(extract_json('{"service": "api", "healthy": tr')[0], {"service": "api"})
+        with self.assertRaises(JSONExtractionError):
+            extract_json('{"ready_port": 80')
+
+    def test_no_json(self):
+        for output in ("", "I could not do it.", "{{{"):
+            with self.assertRaises(JSONExtractionError):
+                extract_json(output)
+
+class TestAgentCorrection(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        with open(os.path.join(self.root, "plan_prompt.txt"), "w") as f:
+            f.write("Make a plan for {spec}")
+
+    def test_wrong_shape_gets_one_targeted_correction(self):
+        model = FakeChatModel([
+            (r"^Make a plan", 'Sure:\n```json\n{"steps": ["write add"]}\n```'),
+            (r"could not be used", '{"plan": ["write add"]}'),
+        ])
+        agent = Agent(model, {}, "plan_prompt.txt", app_root=self.root)
+        self.assertEqual(agent.run(spec="calculator"), {"plan": ["write add"]})
+        self.assertEqual([c["pattern"] for c in model.calls], [r"^Make a plan", r"could not be used"])
+
+    def test_answer_matching_the_schema_is_preferred(self):
+        model = FakeChatModel([(r"^Make a plan", 'Reply with {"steps": ["one", "two", "three"]}? No: {"plan": ["write add"]}')])
+        agent = Agent(model, {}, "plan_prompt.txt", app_root=self.root)
+        self.assertEqual(agent.run(spec="calculator"), {"plan": ["write add"]})
+        self.assertEqual(len(model.calls), 1)
+
+    def test_dropped_tool_call_gets_a_correction(self):
+        """An answer cut off mid tool call fits the schema once closed, but the lost call is asked for again."""
+        with open(os.path.join(self.root, "implementer_prompt.txt"), "w") as f:
+            f.write("Implement {plan}")
+        model = FakeChatModel([
+            (r"^Implement", '{"tool_calls": [{"tool_name": "read_file_tool", "args": {"path": "a.py"}}, {"tool_name": "write_file_tool", "args": {"path": "b.py", "con'),
+            (r"could not be used", '{"tool_calls": []}'),
+        ])
+        agent = Agent(model, {}, "implementer_prompt.txt", app_root=self.root)
+        agent.run(plan="write b.py")
+        self.assertEqual([c["pattern"] for c in model.calls], [r"^Implement", r"could not be used"])
+
+    def test_repairable_answer_needs_no_model_call(self):
+        model = FakeChatModel([(r"^Make a plan", 'Plan: {"plan": ["write add", "test add",],}')])
+        agent = Agent(model, {}, "plan_prompt.txt", app_root=self.root)
+        self.assertEqual(agent.run(spec="calculator"), {"plan": ["write add", "test add"]})
+        self.assertEqual(len(model.calls), 1)
+
+if __name__ == '__main__':
+    unittest.main()
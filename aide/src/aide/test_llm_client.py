@@ -0,0 +1,136 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from .llm_client import CircuitOpenError, ClientPool, LimitedModel, TokenBucket
+
+class FakeModelServer(ThreadingHTTPServer):
+    """A chat endpoint that throttles the first `throttle` requests and fails with 500 while `failing` is set."""
+
+    def __init__(self, throttle=0):
+        super().__init__(("127.0.0.1", 0), FakeModelHandler)
+        self.throttle = throttle
+        self.failing = False
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+class FakeModelHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with server.lock:
+            server.requests += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            throttled = server.requests <= server.throttle
+        time.sleep(0.05)
+        with server.lock:
+            server.active -= 1
+        if throttled or server.failing:
+            self.send_response(429 if throttled else 500)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        body = json.dumps({"content": "ok"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class HttpModel:
+    """The smallest chat model client: posts the messages, raises on HTTP errors."""
+    def __init__(self, url):
+        self.url = url
+
+    def invoke(self, messages):
+        response = requests.post(self.url, json={"messages": messages}, timeout=5)
+        response.raise_for_status()
+        return response.json()["content"]
+
+class TestClientPool(unittest.TestCase):
+
+    def start(self, server):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return HttpModel(f"http://127.0.0.1:{server.server_address[1]}/chat")
+
+    def test_throttling_is_retried_within_concurrency_limit(self):
+        """A burst of parallel calls survives injected 429s and never exceeds the concurrency bound."""
+        server = FakeModelServer(throttle=3)
+        pool = ClientPool("fake", max_concurrency=2, backoff_base=0.01)
+        model = LimitedModel(self.start(server), pool)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(model.invoke(["hello"]))) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["ok"] * 6)
+        self.assertLessEqual(server.max_active, 2)
+        metrics = pool.metrics()
+        self.assertEqual((metrics["calls"], metrics["successes"], metrics["throttled"], metrics["retries"]), (6, 6, 3, 3))
+        self.assertEqual(metrics["circuit"], "closed")
+
+    def test_circuit_breaker_opens_and_recovers(self):
+        """Repeated 5xx open the circuit, calls then fail fast, and a probe after the cool-down closes it."""
+        server = FakeModelServer()
+        server.failing = True
+        pool = ClientPool("fake", max_retries=1, backoff_base=0.001, failure_threshold=2, reset_timeout=0.2)
+        model = LimitedModel(self.start(server), pool)
+        with self.assertRaises(requests.HTTPError):
+            model.invoke(["hello"])
+        requests_before = server.requests
+        with self.assertRaises(CircuitOpenError):
+            model.invoke(["hello"])
+        self.assertEqual(server.requests, requests_before)
+        server.failing = False
+        time.sleep(0.25)
+        self.assertEqual(model.invoke(["hello"]), "ok")
+        self.assertEqual(pool.metrics()["circuit"], "closed")
+
+    def test_throttled_probe_does_not_wedge_the_circuit(self):
+        """A 429 on the half-open probe is retried as a new probe instead of blocking every later call."""
+        server = FakeModelServer()
+        server.failing = True
+        pool = ClientPool("fake", max_retries=1, backoff_base=0.001, failure_threshold=2, reset_timeout=0.2)
+        model = LimitedModel(self.start(server), pool)
+        with self.assertRaises(requests.HTTPError):
+            model.invoke(["hello"])
+        server.failing = False
+        server.throttle = server.requests + 1
+        time.sleep(0.25)
+        self.assertEqual(model.invoke(["hello"]), "ok")
+        self.assertEqual((pool.metrics()["circuit"], pool.metrics()["throttled"]), ("closed", 1))
+        self.assertFalse(pool.breaker.probing)
+
+    def test_client_errors_are_not_retried(self):
+        pool = ClientPool("fake", backoff_base=0.001)
+        calls = []
+        def bad_request():
+            calls.append(1)
+            raise ValueError("400 Bad Request")
+        with self.assertRaises(ValueError):
+            pool.call(bad_request)
+        self.assertEqual(len(calls), 1)
+
+    def test_token_bucket(self):
+        now = [0.0]
+        bucket = TokenBucket(60, capacity=2, clock=lambda: now[0])
+        self.assertEqual(bucket.acquire(), 0.0)
+        self.assertEqual(bucket.acquire(), 0.0)
+        now[0] += 1.0  # one request per second refills one token
+        self.assertEqual(bucket.acquire(), 0.0)
+        self.assertEqual(bucket.tokens, 0)
+
+if __name__ == '__main__':
+    unittest.main()
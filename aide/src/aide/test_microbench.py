@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import unittest
+from .microbench import benchmark_iteration, find_benchmarks, mann_whitney_u, median_confidence_interval, summarize
+
+BENCH = '''
+from calculator import total
+
+def bench_total():
+    total({n})
+
+def helper():
+    pass
+'''
+
+class TestStatistics(unittest.TestCase):
+
+    def test_summary(self):
+        stats = summarize([5.0, 1.0, 3.0, 2.0, 4.0, 100.0])
+        self.assertEqual(stats["median"], 3.5)
+        self.assertLessEqual(stats["ci95"][0], 3.5)
+        self.assertGreaterEqual(stats["ci95"][1], 3.5)
+        self.assertEqual(median_confidence_interval(list(range(15))), (3, 11))
+
+    def test_mann_whitney(self):
+        """Completely separated samples are significant; identical distributions are not."""
+        fast, slow = [1.0 + i * 0.01 for i in range(15)], [2.0 + i * 0.01 for i in range(15)]
+        u, p = mann_whitney_u(fast, slow)
+        self.assertEqual(u, 225)
+        self.assertLess(p, 0.001)
+        self.assertGreater(mann_whitney_u(fast, list(reversed(fast)))[1], 0.9)
+        self.assertEqual(mann_whitney_u([1.0] * 5, [1.0] * 5)[1], 1.0)
+
+class TestMicrobenchmarks(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        os.makedirs(os.path.join(self.root, "tests"))
+        with open(os.path.join(self.root, "calculator.py"), "w") as f:
+            f.write("def total(n):\n    return sum(range(n))\n")
+
+    def write_bench(self, n):
+        with open(os.path.join(self.root, "tests", "bench_calculator.py"), "w") as f:
+            f.write(BENCH.format(n=n))
+
+    def test_regression_between_iterations(self):
+        options = {"warmup": 0.0, "min_sample": 0.002, "repeat": 9}
+        self.write_bench(1000)
+        self.assertEqual(find_benchmarks(self.root), {os.path.join("tests", "bench_calculator.py"): ["bench_total"]})
+        first = benchmark_iteration(self.root, 1, **options)
+        self.assertEqual(first["status"], "ok")
+        self.assertNotIn("regressions", first)
+        benchmark = first["benchmarks"]["tests/bench_calculator.py::bench_total"]
+        self.assertGreater(benchmark["loops"], 1)
+        self.assertNotIn("raw_samples", benchmark)
+
+        self.write_bench(20000)
+        second = benchmark_iteration(self.root, 2, **options)
+        self.assertEqual(second["compared_with_iteration"], 1)
+        self.assertEqual([r["benchmark"] for r in second["regressions"]], ["tests/bench_calculator.py::bench_total"])
+        self.assertGreater(second["regressions"][0]["ratio"], 2)
+
+    def test_runs_are_not_compared(self):
+        """A new run's first iteration is not compared with another run's iterations."""
+        options = {"warmup": 0.0, "min_sample": 0.002, "repeat": 5}
+        self.write_bench(1000)
+        benchmark_iteration(self.root, 1, run_id="earlier", **options)
+        benchmark_iteration(self.root, 2, run_id="earlier", **options)
+        report = benchmark_iteration(self.root, 3, run_id="later", **options)
+        self.assertNotIn("compared_with_iteration", report)
+        self.assertEqual(benchmark_iteration(self.root, 4, run_id="later", **options)["compared_with_iteration"], 3)
+
+    def test_errors_and_missing_benchmarks(self):
+        self.assertEqual(benchmark_iteration(self.root, 1)["status"], "no_benchmarks")
+        with open(os.path.join(self.root, "tests", "bench_broken.py"), "w") as f:
+            f.write("def bench_fails():\n    raise ValueError('boom')\n")
+        report = benchmark_iteration(self.root, 1, warmup=0.0, repeat=3)
+        self.assertEqual(report["status"], "error")
+        self.assertIn("ValueError: boom", report["errors"]["tests/bench_broken.py::bench_fails"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+from .observations import OBSERVATION_LIMIT, compact_observation, read_observation
+from .workspace import reset_workspace_root, set_workspace_root
+
+class TestObservations(unittest.TestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.token = set_workspace_root(root)
+
+    def tearDown(self):
+        reset_workspace_root(self.token)
+
+    def test_small_outputs_are_unchanged(self):
+        self.assertEqual(compact_observation("ok"), "ok")
+        self.assertEqual(compact_observation({"status": "passed"}), {"status": "passed"})
+
+    def test_large_output_becomes_excerpt_with_errors(self):
+        """A long log keeps its head, tail and error lines, and the rest can be paged in."""
+        lines = [f"line {i}" for i in range(5000)]
+        lines[2500] = "E       AssertionError: assert 4 == 5"
+        log = "\n".join(lines)
+        summary = compact_observation(log)
+        self.assertLess(len(summary), OBSERVATION_LIMIT)
+        self.assertIn("line 0", summary)
+        self.assertIn("line 4999", summary)
+        self.assertIn("2501: E       AssertionError", summary)
+        self.assertNotIn("line 1000\n", summary)
+
+        observation_id = summary.split()[1].rstrip(":")
+        page = read_observation(observation_id, offset=2501, limit=3)
+        self.assertEqual(page.splitlines()[:3], ["2501: E       AssertionError: assert 4 == 5", "2502: line 2501", "2503: line 2502"])
+        self.assertIn("continue with offset=2504", page)
+        self.assertIn("End of observation", read_observation(observation_id, offset=4999))
+
+    def test_long_lines_are_paged_by_character(self):
+        """A single 20 000-character line is readable in full, one page at a time."""
+        line = "".join(f"{i:05d}," for i in range(3500))[:20000]
+        observation_id = compact_observation("header\n" + line).split()[1].rstrip(":")
+        pages, column = [], 0
+        while True:
+            page = read_observation(observation_id, offset=2, column=column)
+            body, footer = page.splitlines()
+            pages.append(body.split(": ", 1)[1])
+            if "column=" not in footer:
+                break
+            column = int(footer.rsplit("column=", 1)[1].rstrip(".]"))
+        self.assertEqual("".join(pages), line)
+        self.assertEqual(len(pages), 4)
+        self.assertIn("End of observation, 2 lines", footer)
+
+    def test_unknown_ids_are_rejected(self):
+        self.assertIn("not an observation id", read_observation("../../etc/passwd"))
+        self.assertIn("not found", read_observation("0" * 16))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from .openapi_diff import compare, load_project_schema, resolve_refs
+
+PROJECT = {
+    "openapi": "3.0.0",
+    "paths": {
+        "/items/{item_id}": {
+            "get": {
+                "parameters": [
+                    {"name": "item_id", "in": "path", "required": True, "schema": {"type": "integer"}},
+                    {"name": "verbose", "in": "query", "schema": {"type": "boolean"}},
+                ],
+                "responses": {"200": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Item"}}}}},
+            }
+        },
+        "/items": {"post": {"responses": {"201": {"description": "Created"}}}},
+    },
+    "components": {"schemas": {"Item": {
+        "type": "object",
+        "required": ["id", "name"],
+        "properties": {"id": {"type": "integer"}, "name": {"type": "string"}, "tags": {"type": "array", "items": {"type": "string"}}},
+    }}},
+}
+
+def running_schema():
+    """What FastAPI would serve: same contract, different key order, names and titles."""
+    return {
+        "components": {"schemas": {"ItemOut": {
+            "title": "ItemOut",
+            "properties": {"tags": {"items": {"type": "string"}, "type": "array"}, "name": {"type": "string", "title": "Name"}, "id": {"type": "integer"}},
+            "required": ["name", "id"],
+            "type": "object",
+        }}},
+        "paths": {
+            "/items/{id}": {"get": {
+                "responses": {
+                    "422": {"description": "Validation Error"},
+                    "200": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/ItemOut"}}}},
+                },
+                "parameters": [
+                    {"in": "query", "name": "verbose", "schema": {"type": "boolean"}},
+                    {"in": "path", "name": "id", "required": True, "schema": {"type": "integer"}},
+                ],
+            }},
+            "/items": {"post": {"responses": {"201": {"description": "Created"}}}},
+        },
+    }
+
+class TestOpenApiDiff(unittest.TestCase):
+
+    def test_equivalent_schemas_match(self):
+        """Key order, $ref names, titles, path parameter names and FastAPI's 422s are not differences."""
+        self.assertEqual(compare(resolve_refs(PROJECT), resolve_refs(running_schema())), [])
+
+    def test_structural_incompatibilities(self):
+        """Missing operations, parameters and changed response fields are reported precisely."""
+        actual = running_schema()
+        del actual["paths"]["/items"]
+        actual["paths"]["/items/{id}"]["get"]["parameters"].pop(0)
+        actual["components"]["schemas"]["ItemOut"]["properties"]["id"]["type"] = "string"
+        actual["paths"]["/health"] = {"get": {"responses": {"200": {}}}}
+        issues = compare(resolve_refs(PROJECT), resolve_refs(actual))
+        self.assertEqual(
+            sorted((i["severity"], i["kind"], i["location"]) for i in issues),
+            [
+                ("error", "missing_parameter", "paths./items/{item_id}.get.parameters.query.verbose"),
+                ("error", "missing_path", "paths./items.post"),
+                ("error", "response_schema_mismatch", "paths./items/{item_id}.get.responses.200.properties.id.type"),
+                ("warning", "extra_operation", "paths./health.get"),
+            ],
+        )
+
+    def test_newly_required_fields(self):
+        """A field newly required in a request breaks clients; in a response it is only a warning."""
+        project = json.loads(json.dumps(PROJECT))
+        project["paths"]["/items"]["post"]["requestBody"] = {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Item"}}}}
+        actual = running_schema()
+        actual["paths"]["/items"]["post"]["requestBody"] = {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/ItemOut"}}}}
+        actual["components"]["schemas"]["ItemOut"]["required"].append("tags")
+        issues = compare(resolve_refs(project), resolve_refs(actual))
+        self.assertEqual(
+            sorted((i["severity"], i["kind"], i["location"]) for i in issues),
+            [
+                ("error", "request_body_mismatch", "paths./items.post.requestBody.required"),
+                ("warning", "response_field_required", "paths./items/{item_id}.get.responses.200.required"),
+            ],
+        )
+
+    def test_no_longer_required_fields(self):
+        """A request field or parameter that becomes optional only accepts more; in a response it breaks clients."""
+        project = json.loads(json.dumps(PROJECT))
+        project["paths"]["/items"]["post"]["requestBody"] = {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Item"}}}}
+        project["paths"]["/items/{item_id}"]["get"]["parameters"][1]["required"] = True
+        actual = running_schema()
+        actual["paths"]["/items"]["post"]["requestBody"] = {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/ItemOut"}}}}
+        actual["components"]["schemas"]["ItemOut"]["required"].remove("name")
+        issues = compare(resolve_refs(project), resolve_refs(actual))
+        self.assertEqual(
+            sorted((i["severity"], i["kind"], i["location"]) for i in issues),
+            [
+                ("error", "response_schema_mismatch", "paths./items/{item_id}.get.responses.200.required"),
+                ("warning", "parameter_optional", "paths./items/{item_id}.get.parameters.query.verbose.required"),
+                ("warning", "request_field_optional", "paths./items.post.requestBody.required"),
+            ],
+        )
+
+    def test_circular_refs_and_cache(self):
+        """Recursive schemas resolve without looping, and the project schema is cached until it changes."""
+        document = {"components": {"schemas": {"Node": {"type": "object", "properties": {"child": {"$ref": "#/components/schemas/Node"}}}}},
+                    "paths": {}}
+        resolved = resolve_refs(document)
+        self.assertEqual(resolved["components"]["schemas"]["Node"]["properties"]["child"]["properties"]["child"],
+                         {"$circular": "#/components/schemas/Node"})
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, "api_schema.json")
+        with open(path, "w") as f:
+            json.dump(PROJECT, f)
+        self.assertIs(load_project_schema(path), load_project_schema(path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+from .patching import PatchError, apply_changes, plan_patch
+
+CALCULATOR = "def add(a, b):\n    return a + b\n\n\ndef sub(a, b):\n    return a - b\n"
+
+class TestPatching(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.write("calculator.py", CALCULATOR)
+
+    def write(self, path, content):
+        with open(os.path.join(self.root, path), "w") as f:
+            f.write(content)
+
+    def read(self, path):
+        with open(os.path.join(self.root, path)) as f:
+            return f.read()
+
+    def apply(self, patch):
+        changes, rejects = plan_patch(patch, self.root)
+        if not rejects:
+            apply_changes(changes, self.root)
+        return changes, rejects
+
+    def test_unified_diff_with_offset(self):
+        """Hunks apply even when the header line numbers are off."""
+        patch = (
+            "--- a/calculator.py\n+++ b/calculator.py\n"
+            "@@ -40,2 +40,2 @@\n def sub(a, b):\n-    return a - b\n+    return a - b  # subtract\n"
+        )
+        _, rejects = self.apply(patch)
+        self.assertEqual(rejects, [])
+        self.assertIn("return a - b  # subtract\n", self.read("calculator.py"))
+        self.assertTrue(self.read("calculator.py").startswith("def add(a, b):\n"))
+
+    def test_fuzzed_context(self):
+        """Stale context lines at the hunk edges are tolerated."""
+        patch = (
+            "--- a/calculator.py\n+++ b/calculator.py\n"
+            "@@ -1,3 +1,3 @@\n def add(a, b):\n-    return a + b\n+    return b + a\n this line is not in the file\n"
+        )
+        _, rejects = self.apply(patch)
+        self.assertEqual(rejects, [])
+        self.assertIn("return b + a", self.read("calculator.py"))
+
+    def test_multi_file_patch_is_atomic(self):
+        """If one file's hunk is rejected, no file is written and the reject explains why."""
+        patch = (
+            "--- /dev/null\n+++ b/new_module.py\n@@ -0,0 +1,1 @@\n+VALUE = 1\n"
+            "--- a/calculator.py\n+++ b/calculator.py\n@@ -1,2 +1,2 @@\n-    return a + c\n+    return a + b + c\n"
+        )
+        _, rejects = self.apply(patch)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "new_module.py")))
+        self.assertEqual(self.read("calculator.py"), CALCULATOR)
+        self.assertEqual(rejects[0]["file"], "calculator.py")
+        self.assertEqual(rejects[0]["closest_match"]["line"], 2)
+
+    def test_file_modes_are_kept(self):
+        """A patched executable stays executable, and new files get the usual permissions."""
+        self.write("run.sh", "#!/bin/sh\necho one\n")
+        os.chmod(os.path.join(self.root, "run.sh"), 0o755)
+        self.apply("run.sh\n<<<<<<< SEARCH\necho one\n=======\necho two\n>>>>>>> REPLACE\n"
+                   "notes.txt\n<<<<<<< SEARCH\n=======\nnew\n>>>>>>> REPLACE\n")
+        self.assertEqual(self.read("run.sh"), "#!/bin/sh\necho two\n")
+        self.assertEqual(os.stat(os.path.join(self.root, "run.sh")).st_mode & 0o777, 0o755)
+        mask = os.umask(0)
+        os.umask(mask)
+        self.assertEqual(os.stat(os.path.join(self.root, "notes.txt")).st_mode & 0o777, 0o666 & ~mask)
+
+    def test_search_replace_blocks(self):
+        """SEARCH/REPLACE blocks edit one file and create another."""
+        patch = (
+            "calculator.py\n<<<<<<< SEARCH\n    return a + b\n=======\n    return sum((a, b))\n>>>>>>> REPLACE\n"
+            "notes.txt\n<<<<<<< SEARCH\n=======\nhello\n>>>>>>> REPLACE\n"
+        )
+        changes, rejects = self.apply(patch)
+        self.assertEqual(rejects, [])
+        self.assertIn("return sum((a, b))", self.read("calculator.py"))
+        self.assertEqual(self.read("notes.txt"), "hello\n")
+
+    def test_ambiguous_search_is_rejected(self):
+        patch = "calculator.py\n<<<<<<< SEARCH\n    return a\n=======\n    pass\n>>>>>>> REPLACE\n"
+        self.write("calculator.py", "def f(a):\n    return a\n\ndef g(a):\n    return a\n")
+        _, rejects = self.apply(patch)
+        self.assertIn("matches 2 locations", rejects[0]["reason"])
+
+    def test_garbage_is_an_error(self):
+        with self.assertRaises(PatchError):
+            plan_patch("just some text", self.root)
+
+if __name__ == '__main__':
+    unittest.main()
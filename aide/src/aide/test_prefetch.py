@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from .prefetch import collect_prefetch, file_fingerprint, start_prefetch
+
+class TestPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.path = os.path.join(self.root, "api_schema.json")
+        with open(self.path, "w") as f:
+            f.write("{}")
+        self.loads = 0
+        self.release = threading.Event()
+
+    def load(self):
+        self.release.wait(5)
+        self.loads += 1
+        with open(self.path, "r") as f:
+            return f.read()
+
+    def tasks(self):
+        return {"schema": (self.load, lambda: file_fingerprint([self.path]))}
+
+    def test_prefetched_value_is_used(self):
+        """The load runs in the background; collecting waits for it instead of loading again."""
+        start_prefetch(self.tasks(), self.root)
+        self.assertEqual(self.loads, 0)
+        self.release.set()
+        self.assertEqual(collect_prefetch(self.tasks(), self.root), {"schema": "{}"})
+        self.assertEqual(self.loads, 1)
+
+    def test_changed_inputs_are_reloaded(self):
+        self.release.set()
+        start_prefetch(self.tasks(), self.root)
+        while self.loads == 0:
+            threading.Event().wait(0.01)
+        with open(self.path, "w") as f:
+            f.write('{"paths": {}}')
+        self.assertEqual(collect_prefetch(self.tasks(), self.root), {"schema": '{"paths": {}}'})
+        self.assertEqual(self.loads, 2)
+
+    def test_collect_without_prefetch_loads_now(self):
+        self.release.set()
+        self.assertEqual(collect_prefetch(self.tasks(), self.root), {"schema": "{}"})
+        self.assertEqual(self.loads, 1)
+
+if __name__ == '__main__':
+    unittest.main()
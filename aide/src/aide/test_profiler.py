@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+from .profiler import profile_target
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+from .graph import has_performance_goals
+
+SLOW_MODULE = '''
+def slow_sum(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+def build_table(n):
+    return [str(i) * 10 for i in range(n)]
+
+TABLE = None
+
+def main():
+    global TABLE
+    TABLE = build_table(50000)
+    for _ in range(20):
+        slow_sum(20000)
+'''
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        with open(os.path.join(self.root, "slow.py"), "w") as f:
+            f.write(SLOW_MODULE)
+        os.makedirs(os.path.join(self.root, "tests"))
+        with open(os.path.join(self.root, "tests", "test_slow.py"), "w") as f:
+            f.write("from slow import slow_sum\n\ndef test_slow_sum():\n    assert slow_sum(100000) == 4999950000\n")
+
+    def test_entry_point_hot_functions_and_allocations(self):
+        report = profile_target(entry_point="slow:main", cwd=self.root)
+        self.assertEqual(report["status"], "ok")
+        functions = [f["function"] for f in report["hot_functions"]]
+        self.assertTrue(functions[0].startswith("slow.py:") and functions[0].endswith("(main)"))
+        slow_sum = next(f for f in report["hot_functions"] if f["function"].endswith("(slow_sum)"))
+        self.assertEqual(slow_sum["calls"], 20)
+        self.assertTrue(any(a["site"].startswith("slow.py:") for a in report["allocations"]))
+        self.assertTrue(all(not os.path.isabs(a["site"]) for a in report["allocations"]))
+        self.assertGreater(report["peak_memory_kb"], 0)
+
+    def test_tests_are_profiled(self):
+        """Profiling the test suite reports project code only in hot_functions, not pytest's."""
+        report = profile_target("tests", cwd=self.root)
+        self.assertEqual(report["status"], "ok")
+        functions = [f["function"] for f in report["hot_functions"]]
+        self.assertTrue(any(f.endswith("(slow_sum)") for f in functions))
+        self.assertFalse(any("_pytest" in f for f in functions))
+
+    def test_failing_target(self):
+        report = profile_target(entry_point="missing_module:main", cwd=self.root)
+        self.assertEqual(report["status"], "target_failed")
+        self.assertIn("ModuleNotFoundError", report["stderr"])
+
+    def test_performance_goals(self):
+        """Only stated performance goals trigger profiling, not words like "in-memory" or "fast-forward"."""
+        self.assertFalse(has_performance_goals({"description": "An in-memory store with fast-forward merges.",
+                                                "acceptance_criteria": ["Slow clients are disconnected."]}))
+        self.assertTrue(has_performance_goals({"description": "A key-value store.",
+                                               "acceptance_criteria": ["p95 latency under 50 ms"]}))
+        self.assertTrue(has_performance_goals({"description": "Keep memory usage below 100 MB."}))
+
+if __name__ == '__main__':
+    unittest.main()
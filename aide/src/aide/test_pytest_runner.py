@@ -0,0 +1,39 @@
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import unittest
+from .microbench import run_microbenchmarks
+from .pytest_runner import project_python, run_pytest
+
+class TestProjectInterpreter(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        os.makedirs(os.path.join(self.root, "tests"))
+        with open(os.path.join(self.root, "tests", "test_env.py"), "w") as f:
+            f.write("import os\n\ndef test_env():\n    assert os.environ['PROJECT_VENV'] == '1'\n")
+        with open(os.path.join(self.root, "tests", "bench_env.py"), "w") as f:
+            f.write("import os\n\ndef bench_env():\n    assert os.environ['PROJECT_VENV'] == '1'\n")
+
+    def make_venv(self):
+        """A stand-in virtualenv whose python marks the environment it runs in."""
+        python = os.path.join(self.root, ".venv", "bin", "python")
+        os.makedirs(os.path.dirname(python))
+        with open(python, "w") as f:
+            f.write(f"#!/bin/sh\nPROJECT_VENV=1 exec {sys.executable} \"$@\"\n")
+        os.chmod(python, os.stat(python).st_mode | stat.S_IXUSR)
+        return python
+
+    def test_tests_and_benchmarks_use_the_project_venv(self):
+        self.assertIsNone(project_python(self.root))
+        self.assertEqual(run_pytest("tests", cwd=self.root)["report"]["overall_status"], "failed")
+        python = self.make_venv()
+        self.assertEqual(project_python(self.root), python)
+        self.assertEqual(run_pytest("tests", cwd=self.root)["report"]["overall_status"], "passed")
+        self.assertEqual(run_microbenchmarks(self.root, warmup=0.0, repeat=3)["status"], "ok")
+
+if __name__ == '__main__':
+    unittest.main()
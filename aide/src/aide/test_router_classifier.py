@@ -0,0 +1,58 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from .router_classifier import classify, classify_by_rules
+
+class TestRouterClassifier(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.log_path = os.path.join(directory, "aide_log.jsonl")
+
+    def log_decisions(self, decisions):
+        with open(self.log_path, "a") as f:
+            for request, policy in decisions:
+                entry = {"event_type": "routing_decision",
+                         "details": {"user_request": request, "policy": policy, "source": "llm"}}
+                f.write(json.dumps(entry) + "\n")
+
+    def test_rules(self):
+        """Obvious phrasings are routed with high confidence."""
+        self.assertEqual(classify_by_rules("Fix the failing test in test_calculator.py"), ("debug", 0.95))
+        self.assertEqual(classify_by_rules("Add endpoint /users that returns all users")[0], "implement")
+        self.assertEqual(classify_by_rules("Refactor the parser module")[0], "refactor")
+        self.assertEqual(classify_by_rules("hello there"), (None, 0.0))
+
+    def test_single_incidental_keyword_is_not_confident(self):
+        """One non-leading keyword stays below the default threshold, so the LLM router decides."""
+        self.assertEqual(classify_by_rules("A page that shows an error banner"), ("debug", 0.6))
+        self.assertEqual(classify_by_rules("The calculator test fails with a traceback"), ("debug", 0.85))
+
+    def test_leading_verb_breaks_ties(self):
+        """When several intents match, the leading verb decides."""
+        policy, confidence = classify_by_rules("Create an API with proper error handling")
+        self.assertEqual(policy, "implement")
+        self.assertLess(confidence, 0.95)
+
+    def test_tfidf_learns_from_logged_decisions(self):
+        """Requests without keywords are classified from past LLM routing decisions."""
+        self.log_decisions([
+            ("what is the best way to store sessions", "research"),
+            ("what is the fastest json library", "research"),
+            ("what options exist for caching", "research"),
+            ("what are alternatives to celery", "research"),
+            ("the calculator should support division", "implement"),
+            ("the api should support pagination", "implement"),
+            ("the cli should support a verbose flag", "implement"),
+            ("the server should support websockets", "implement"),
+        ])
+        policy, confidence, source = classify("what is the best queue library", log_path=self.log_path)
+        self.assertEqual((policy, source), ("research", "tfidf"))
+        self.assertGreater(confidence, 0.0)
+        self.assertEqual(classify("nothing logged here", log_path=self.log_path + ".missing"), (None, 0.0, "rules"))
+
+if __name__ == '__main__':
+    unittest.main()
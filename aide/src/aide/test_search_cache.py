@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from .search_cache import CachedSearch, FakeSearchBackend, SearchCache, make_web_search_tool
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestCachedSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.clock = Clock()
+        self.backend = FakeSearchBackend({"fastapi websockets": [{"url": "https://fastapi.tiangolo.com/advanced/websockets/"}]})
+
+    def search(self, offline=False, **cache_options):
+        return CachedSearch(self.backend, SearchCache(self.directory, clock=self.clock, **cache_options), offline=offline)
+
+    def test_normalized_queries_share_entries_across_instances(self):
+        first = self.search().search("FastAPI  websockets?")
+        second = self.search().search('"fastapi websockets"')
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.backend.queries), 1)
+
+    def test_ttl_and_offline_mode(self):
+        """Expired entries are refreshed online, but still served offline."""
+        self.search().search("fastapi websockets")
+        self.clock.now += 8 * 24 * 3600
+        self.assertEqual(self.search(offline=True).search("fastapi websockets")[0]["url"], "https://fastapi.tiangolo.com/advanced/websockets/")
+        self.assertIn("No cached results", self.search(offline=True).search("pydantic validators"))
+        self.assertEqual(len(self.backend.queries), 1)
+        self.search().search("fastapi websockets")
+        self.assertEqual(len(self.backend.queries), 2)
+
+    def test_backend_failure_falls_back_to_stale_result(self):
+        self.search().search("fastapi websockets")
+        self.clock.now += 8 * 24 * 3600
+        def failing(query):
+            raise ConnectionError("offline")
+        search = CachedSearch(failing, SearchCache(self.directory, clock=self.clock))
+        self.assertEqual(len(search.search("fastapi websockets")), 1)
+        self.assertIn("Web search failed", search.search("unknown"))
+
+    def test_error_strings_are_not_cached(self):
+        """A backend that reports errors as text (like Tavily's tool) fails over to the stale result and caches nothing."""
+        self.search().search("fastapi websockets")
+        self.clock.now += 8 * 24 * 3600
+        throttled = FakeSearchBackend(default="HTTPError('429 Client Error: Too Many Requests')")
+        search = CachedSearch(throttled, SearchCache(self.directory, clock=self.clock))
+        self.assertEqual(len(search.search("fastapi websockets")), 1)
+        self.assertIn("Web search failed", search.search("unknown"))
+        self.assertIn("Web search failed", search.search("unknown"))
+        self.assertEqual(len(throttled.queries), 3)
+
+    def test_concurrent_identical_queries_share_one_call(self):
+        self.backend.latency = 0.2
+        search = self.search()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(search.search("fastapi websockets"))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.backend.queries), 1)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(search.stats["shared"], 4)
+
+    def test_interrupted_leader_releases_followers(self):
+        """A follower gets an error, not a hang, when the leader's search dies of a BaseException."""
+        started, release = threading.Event(), threading.Event()
+
+        def backend(query):
+            started.set()
+            release.wait(5)
+            raise KeyboardInterrupt
+
+        search = CachedSearch(backend, SearchCache(self.directory, clock=self.clock))
+        outcomes = []
+
+        def run():
+            try:
+                outcomes.append(search.search("fastapi websockets"))
+            except BaseException as e:
+                outcomes.append(type(e).__name__)
+
+        leader = threading.Thread(target=run)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=run)
+        follower.start()
+        while search.stats["shared"] == 0:
+            threading.Event().wait(0.01)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+        self.assertEqual(sorted(outcomes), ["KeyboardInterrupt", "RuntimeError"])
+        self.assertEqual(search._in_flight, {})
+
+    def test_size_bound_evicts_least_recently_used(self):
+        self.backend.default = ["x" * 400]
+        search = self.search(max_bytes=1000)
+        for i, query in enumerate(["a", "b", "c"]):
+            search.search(query)
+            os.utime(os.path.join(self.directory, f"{search.key(query)}.json"), (i, i))
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, f"{search.key('a')}.json")))
+
+    def test_tool_wrapper(self):
+        tool = make_web_search_tool(self.search())
+        self.assertEqual(tool.name, "web_search_tool")
+        self.assertEqual(tool.invoke({"query": "fastapi websockets"})[0]["url"], "https://fastapi.tiangolo.com/advanced/websockets/")
+
+if __name__ == '__main__':
+    unittest.main()
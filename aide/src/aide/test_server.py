@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from fastapi.testclient import TestClient
+from .server import Session, SessionManager, SessionRequest, create_app
+from .utils import ask_user
+
+class FakeGraph:
+    """Stands in for the compiled graph: asks for plan approval, then finishes."""
+    def stream(self, state):
+        yield {"plan_node": {"plan": {"plan": ["step"]}}}
+        approval = ask_user("Do you approve this plan? [y/n]")
+        yield {"plan_approval_node": {"final_summary": f"approval={approval}"}}
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.workspace = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workspace, ignore_errors=True)
+        manager = SessionManager(self.workspace, graph_factory=FakeGraph)
+        self.client = TestClient(create_app(manager))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def test_session_streams_events_and_takes_replies(self):
+        """A session streams node events and receives its approval over the WebSocket."""
+        session = self.client.post("/sessions", json={"user_request": "add a function"}).json()
+        with self.client.websocket_connect(f"/sessions/{session['session_id']}/events") as ws:
+            types = []
+            while True:
+                event = ws.receive_json()
+                types.append(event["type"])
+                if event["type"] == "prompt":
+                    ws.send_json({"type": "reply", "text": "y"})
+                if event["type"] == "done":
+                    break
+        self.assertEqual(types, ["start", "node", "prompt", "reply", "node", "done"])
+        self.assertEqual(event["final_summary"], "approval=y")
+
+    def test_reply_over_http(self):
+        """Replies can also be posted while the session waits on a prompt."""
+        session_id = self.client.post("/sessions", json={"user_request": "x"}).json()["session_id"]
+        for _ in range(100):
+            status = self.client.get(f"/sessions/{session_id}").json()
+            if status["status"] == "waiting_input":
+                break
+            time.sleep(0.01)
+        self.assertEqual(status["pending_prompt"], "Do you approve this plan? [y/n]")
+        self.assertEqual(self.client.post(f"/sessions/{session_id}/reply", json={"text": "n"}).status_code, 200)
+        for _ in range(100):
+            if self.client.get(f"/sessions/{session_id}").json()["status"] == "done":
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.client.get(f"/sessions/{session_id}").json()["status"], "done")
+
+    def test_reply_without_prompt_is_dropped(self):
+        """A reply sent while nothing is pending never answers a later prompt (e.g. a command approval)."""
+        session = Session(SessionRequest(user_request="x"))
+        self.assertFalse(session.reply("y"))
+        self.assertIsNone(session.ask("Run `rm -rf build`? [y/n]", timeout=0.05))
+
+if __name__ == '__main__':
+    unittest.main()
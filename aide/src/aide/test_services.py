@@ -0,0 +1,75 @@
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import time
+import unittest
+from .services import ServiceManager
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+class TestServiceManager(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        with open(os.path.join(self.root, "app.py"), "w") as f:
+            f.write("print('serving', flush=True)\n")
+        self.manager = ServiceManager(stop_timeout=5, poll_interval=0.05)
+        self.port = free_port()
+        self.command = f"{sys.executable} app.py && {sys.executable} -m http.server {self.port} --bind 127.0.0.1"
+
+    def tearDown(self):
+        self.manager.stop_all()
+
+    def start(self):
+        return self.manager.start("web", self.command, ready_url=f"http://127.0.0.1:{self.port}/",
+                                  watch=["*.py"], timeout=20, root=self.root)
+
+    def test_reused_until_watched_files_change(self):
+        """A running service is kept across starts and restarted only when its files change."""
+        first = self.start()
+        self.assertEqual((first["status"], first["ready"]), ("started", True))
+        second = self.start()
+        self.assertEqual((second["status"], second["pid"]), ("reused", first["pid"]))
+        time.sleep(0.01)
+        with open(os.path.join(self.root, "app.py"), "a") as f:
+            f.write("# changed\n")
+        third = self.start()
+        self.assertEqual((third["status"], third["ready"], third["restarts"]), ("restarted", True, 1))
+        self.assertNotEqual(third["pid"], first["pid"])
+        self.assertEqual(self.manager.stop("web", root=self.root)["status"], "stopped")
+        self.assertEqual(self.manager.status(root=self.root), [])
+
+    def test_services_belong_to_their_workspace(self):
+        """Same-named services of two workspaces are separate; another project's server doesn't pass for a new one."""
+        other = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other, ignore_errors=True)
+        first = self.start()
+        clash = self.manager.start("api", f"{sys.executable} -m http.server {self.port} --bind 127.0.0.1",
+                                   ready_url=f"http://127.0.0.1:{self.port}/", timeout=10, root=other)
+        self.assertEqual((clash["status"], clash["ready"]), ("port_in_use", False))
+        self.assertEqual(self.manager.status(root=other), [])
+        self.assertEqual([s["pid"] for s in self.manager.status(root=self.root)], [first["pid"]])
+        self.assertEqual(self.manager.stop_all(root=other), [])
+        self.assertEqual([s["status"] for s in self.manager.stop_all(root=self.root)], ["stopped"])
+
+    def test_logs_can_be_tailed(self):
+        self.start()
+        logs = self.manager.logs("web", root=self.root)
+        self.assertIn("serving", logs["lines"])
+        self.assertEqual(self.manager.logs("web", offset=logs["next_offset"], root=self.root)["lines"], [])
+
+    def test_exited_service_reports_its_log(self):
+        result = self.manager.start("broken", f"{sys.executable} -c \"raise SystemExit('bad config')\"",
+                                    ready_port=free_port(), timeout=10, root=self.root)
+        self.assertFalse(result["ready"])
+        self.assertEqual(result["message"], "The service exited.")
+        self.assertIn("bad config", result["log_tail"])
+
+if __name__ == '__main__':
+    unittest.main()
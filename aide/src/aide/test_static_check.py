@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import unittest
+from .static_check import check_files, problems_to_feedback
+
+class TestStaticCheck(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        os.chdir(self.root)
+        self.write("calculator.py", "import math\n\ndef add(a, b):\n    return a + b\n")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def write(self, path, content):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_clean_files_pass(self):
+        """Stdlib, installed, local and optional imports all resolve."""
+        test_file = self.write("tests/test_calculator.py",
+                               "import os\nimport unittest\nfrom calculator import add\n"
+                               "try:\n    import not_installed_anywhere\nexcept ImportError:\n    pass\n")
+        self.assertEqual(check_files(["calculator.py", test_file]), [])
+
+    def test_syntax_error(self):
+        """A syntax error is reported with its line number."""
+        path = self.write("broken.py", "def add(a, b)\n    return a + b\n")
+        problems = check_files([path])
+        self.assertEqual([(p["kind"], p["line"]) for p in problems], [("syntax_error", 1)])
+
+    def test_unresolved_imports(self):
+        """Missing local modules and names missing from local modules are errors."""
+        path = self.write("main.py", "import calculator.missing\nfrom calculator import add, subtract\n")
+        problems = check_files([path], code_map={"calculator.py": {"functions": ["add"]}})
+        self.assertEqual([(p["kind"], p["severity"]) for p in problems], [("unresolved_import", "error"), ("unresolved_name", "error")])
+        feedback = problems_to_feedback(problems)
+        self.assertEqual(feedback[1]["description"], "main.py:2: 'subtract' is not defined in 'calculator'.")
+        self.assertEqual(feedback[1]["severity"], "critical")
+
+    def test_third_party_imports_are_not_errors(self):
+        """A dependency missing from AIDE's interpreter is a warning, or nothing if the project declares it."""
+        self.write("requirements.txt", "# web\nFlask-Cors==4.0\n")
+        self.write("Dockerfile", "FROM python:3.12\nRUN pip install --no-cache-dir not-installed-anywhere && echo ok\n")
+        path = self.write("main.py", "import flask_cors\nfrom not_installed_anywhere import thing\nimport undeclared_anywhere\n")
+        problems = check_files([path])
+        self.assertEqual([(p["kind"], p["severity"], p["line"]) for p in problems], [("missing_dependency", "warning", 3)])
+
+if __name__ == '__main__':
+    unittest.main()
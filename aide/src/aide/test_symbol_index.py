@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from .symbol_index import SymbolIndex, split_identifier
+
+SHOP = '''"""Shopping cart."""
+import math
+
+
+class Cart:
+    """A shopping cart."""
+
+    def __init__(self):
+        self.items = []
+
+    def add_item(self, price: float, quantity: int = 1) -> None:
+        """Adds an item.
+
+        Longer description.
+        """
+        self.items.append((price, quantity))
+
+    def total(self):
+        return math.fsum(p * q for p, q in self.items)
+
+
+def parse_price(text):
+    return float(text.strip("$"))
+'''
+
+class TestSymbolIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        os.makedirs(os.path.join(self.root, "shop"))
+        self.path = os.path.join(self.root, "shop", "cart.py")
+        with open(self.path, "w") as f:
+            f.write(SHOP)
+        self.index = SymbolIndex(self.root).refresh()
+
+    def test_lookup(self):
+        """Symbols are found by qualified name or suffix with location and signature."""
+        [entry] = self.index.lookup("Cart.add_item")
+        self.assertEqual(entry["qualname"], "shop.cart.Cart.add_item")
+        self.assertEqual(entry["kind"], "method")
+        self.assertEqual((entry["start_line"], entry["end_line"]), (11, 16))
+        self.assertEqual(entry["signature"], "def add_item(self, price: float, quantity: int=1) -> None")
+        self.assertEqual(entry["docstring"], "Adds an item.")
+        self.assertTrue(entry["source"].lstrip().startswith("def add_item"))
+
+    def test_search(self):
+        """Search ranks symbols by shared identifiers and returns only their snippets."""
+        results = self.index.search("price parsing", limit=2)
+        self.assertEqual(results[0]["qualname"], "shop.cart.parse_price")
+        self.assertNotIn("class Cart", results[0]["source"])
+
+    def test_incremental_refresh(self):
+        """Changed files are re-indexed, removed symbols disappear."""
+        time.sleep(0.01)
+        with open(self.path, "w") as f:
+            f.write("def checkout():\n    pass\n")
+        self.index.refresh()
+        self.assertEqual(self.index.lookup("total"), [])
+        self.assertEqual(len(self.index.lookup("checkout")), 1)
+        self.assertNotIn("shop.cart.Cart", self.index.identifiers.get("cart", set()))
+
+    def test_split_identifier(self):
+        self.assertEqual(split_identifier("parseHTTPResponse_v2"), {"parsehttpresponse_v2", "parse", "http", "response", "v2"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,10 @@
 import unittest
 from unittest.mock import patch
 import os
+import shutil
 import json
-from .tools import command_runner_tool, CONFIG_FILE, SESSION_APPROVALS
+import tempfile
+from .tools import command_runner_tool, run_pytest_tool, CONFIG_FILE, SESSION_APPROVALS
 
 class TestCommandRunner(unittest.TestCase):
 
@@ -83,5 +85,20 @@ class TestCommandRunner(unittest.TestCase):
             self.assertIn("pre-approved", result)
             mock_input.assert_not_called()
 
+class TestRunPytest(unittest.TestCase):
+
+    def test_structured_report(self):
+        """Per-test statuses and durations are parsed from pytest's JUnit XML."""
+        workspace = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workspace, ignore_errors=True)
+        with open(os.path.join(workspace, "test_sample.py"), "w") as f:
+            f.write("def test_ok():\n    assert True\n\ndef test_bad():\n    assert 1 == 2\n")
+        report = run_pytest_tool.invoke({"target": workspace})["report"]
+        statuses = {t["name"].split("::")[-1]: t["status"] for t in report["tests"]}
+        self.assertEqual(statuses, {"test_ok": "passed", "test_bad": "failed"})
+        self.assertEqual(report["overall_status"], "failed")
+        self.assertEqual(report["summary"]["total"], 2)
+        self.assertTrue(all(isinstance(t["duration"], float) for t in report["tests"]))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,66 @@
+import os
+import threading
+import time
+import unittest
+from .utils import (
+    FeedbackQueue,
+    ask_user,
+    check_for_user_input,
+    reset_feedback_queue,
+    set_feedback_queue,
+    start_input_reader,
+    stdin_feedback,
+    stop_input_reader,
+)
+
+class TestFeedbackQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.feedback = FeedbackQueue()
+        self.token = set_feedback_queue(self.feedback)
+
+    def tearDown(self):
+        reset_feedback_queue(self.token)
+
+    def test_drain_does_not_block(self):
+        """Queued feedback is drained at once; an empty queue returns immediately."""
+        self.feedback.put("add comments")
+        self.feedback.put("")
+        self.feedback.put("use type hints")
+        self.assertEqual(check_for_user_input(), ["add comments", "use type hints"])
+        start = time.monotonic()
+        self.assertEqual(check_for_user_input(), [])
+        self.assertLess(time.monotonic() - start, 0.05)
+
+    def test_timeout_auto_continues(self):
+        """Waiting for input gives up after the timeout instead of stalling the run."""
+        self.assertEqual(check_for_user_input(timeout=0.05), [])
+        self.assertIsNone(ask_user("Select items", timeout=0.05))
+
+    def test_replies_are_separate_from_feedback(self):
+        """Feedback typed before a prompt is not its answer, and the answer is not drained as feedback."""
+        self.feedback.put("use type hints")
+        answer = threading.Timer(0.05, self.feedback.put, args=("y",))
+        answer.start()
+        self.assertEqual(ask_user("Do you approve this plan? [y/n]", timeout=2), "y")
+        answer.join()
+        self.assertEqual(check_for_user_input(), ["use type hints"])
+
+    def test_background_reader(self):
+        """The stdin reader pushes lines into the queue as they arrive."""
+        read_fd, write_fd = os.pipe()
+        stream = os.fdopen(read_fd)
+        stdin_feedback.drain()
+        reader = start_input_reader(stream)
+        try:
+            os.write(write_fd, b"first\nsecond\n")
+            self.assertEqual(stdin_feedback.get(timeout=2), "first")
+            self.assertEqual(stdin_feedback.get(timeout=2), "second")
+        finally:
+            stop_input_reader()
+            os.close(write_fd)
+            reader.join(timeout=2)
+            stream.close()
+
+if __name__ == '__main__':
+    unittest.main()
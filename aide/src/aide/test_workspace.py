@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import unittest
+from .workspace import Journal
+
+def report(**statuses):
+    return {"report": {"tests": [{"name": name, "status": status} for name, status in statuses.items()]}}
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.journal = Journal(self.root)
+
+    def write(self, path, content):
+        full_path = os.path.join(self.root, path)
+        self.journal.capture(full_path)
+        with open(full_path, "w") as f:
+            f.write(content)
+        self.journal.record(full_path)
+
+    def read(self, path):
+        with open(os.path.join(self.root, path)) as f:
+            return f.read()
+
+    def test_rollback_restores_previous_iteration(self):
+        """Rolling back an iteration restores modified files and removes created ones."""
+        self.journal.begin(1)
+        self.write("calc.py", "v1\n")
+        self.journal.commit(1)
+        self.journal.begin(2)
+        self.write("calc.py", "v2\n")
+        self.write("calc.py", "v2 again\n")
+        self.write("extra.py", "new\n")
+        self.assertEqual(sorted(self.journal.changed_files(2)), ["calc.py", "extra.py"])
+        self.assertEqual(self.journal.rollback(2), ["calc.py", "extra.py"])
+        self.assertEqual(self.read("calc.py"), "v1\n")
+        self.assertFalse(os.path.exists(os.path.join(self.root, "extra.py")))
+
+    def test_rollback_returns_to_last_committed_iteration(self):
+        """An iteration abandoned at the static gate is rolled back together with the one that regressed."""
+        self.journal.begin(1)
+        self.write("calc.py", "v1\n")
+        self.journal.commit(1)
+        self.journal.begin(2)
+        self.write("calc.py", "v2 broken\n")
+        self.journal.abandon(2)
+        self.journal.begin(3)
+        self.write("calc.py", "v3\n")
+        self.journal.rollback(3)
+        self.assertEqual(self.read("calc.py"), "v1\n")
+        self.assertEqual(self.journal.last_committed(4), 1)
+
+    def test_runs_do_not_share_iterations(self):
+        """A rollback in a new run never restores files from an earlier run's iterations."""
+        self.journal.start_run("s1")
+        self.journal.begin(1)
+        self.write("calc.py", "s1-v1\n")
+        self.journal.commit(1)
+        journal = Journal(self.root)
+        journal.start_run("s2")
+        self.journal = journal
+        journal.begin(1)
+        self.write("calc.py", "s2-v1\n")
+        journal.commit(1)
+        journal.begin(2)
+        self.write("calc.py", "s2-v2\n")
+        journal.rollback(2)
+        self.assertEqual(self.read("calc.py"), "s2-v1\n")
+        self.assertEqual(Journal(self.root).manifest["run"], "s2")
+
+    def test_diff_and_persistence(self):
+        """Diffs come from stored blobs, and the journal survives a reload."""
+        self.journal.begin(1)
+        self.write("calc.py", "a\nb\n")
+        self.journal.begin(2)
+        self.write("calc.py", "a\nc\n")
+        reloaded = Journal(self.root)
+        diff = reloaded.diff(2)
+        self.assertIn("-b\n+c\n", diff)
+        self.assertEqual(reloaded.diff_size(2), 2)
+
+    def test_writes_save_only_their_iteration(self):
+        """Recording a write rewrites the current iteration's manifest, not the index or earlier iterations."""
+        self.journal.begin(1)
+        self.write("calc.py", "v1\n")
+        self.journal.record_outcome(1, report(test_a="passed"))
+        self.journal.commit(1)
+        self.journal.begin(2)
+        paths = [os.path.join(self.journal.directory, path) for path in ("journal.json", os.path.join("iterations", "1.json"))]
+        # Every save replaces the file; holding the old ones open keeps their inodes from being reused.
+        handles = [open(path) for path in paths]
+        for handle in handles:
+            self.addCleanup(handle.close)
+        self.write("calc.py", "v2\n")
+        self.write("extra.py", "new\n")
+        self.assertEqual([os.stat(path).st_ino for path in paths], [os.fstat(handle.fileno()).st_ino for handle in handles])
+        reloaded = Journal(self.root)
+        self.assertEqual(reloaded.manifest["iterations"]["1"]["status"], "committed")
+        self.assertEqual(reloaded.outcome(1), report(test_a="passed"))
+        self.assertEqual(sorted(reloaded.changed_files(2)), ["calc.py", "extra.py"])
+
+    def test_compare_outcomes(self):
+        """Recorded outcomes are compared without re-running the earlier iteration."""
+        self.journal.record_outcome(1, report(test_a="passed", test_b="failed"))
+        self.journal.record_outcome(2, report(test_a="failed", test_b="passed", test_c="passed"))
+        comparison = self.journal.compare(1, 2)
+        self.assertEqual(comparison["fixed"], ["test_b"])
+        self.assertEqual(comparison["regressed"], ["test_a"])
+        self.assertEqual(comparison["passed"], [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,12 +7,25 @@ import asyncio
 import websockets
 from langchain_core.tools import tool
 from rich import print
-from jsondiff import diff
+from .approval import check_command
+from .contract_probe import run_probes
+from .microbench import run_microbenchmarks
+from .file_reader import get_file_reader
+from .observations import read_observation
+from .openapi_diff import compare as compare_openapi, load_project_schema, resolve_refs
+from .patching import PatchError, apply_changes, plan_patch
+from .profiler import profile_target
+from .pytest_runner import run_pytest
+from .services import get_service_manager
+from .symbol_index import get_symbol_index
+from .workspace import get_journal, get_workspace_root, resolve_path
+from .utils import ask_user
 
 # --- Config Management ---
 
 CONFIG_FILE = "aide_config.json"
 SESSION_APPROVALS = set()
+WRITTEN_FILES = set()
 
 def load_config():
     if not os.path.exists(CONFIG_FILE):
@@ -27,58 +40,176 @@ def save_config(config):
 # --- Tool Definitions ---
 
 @tool
-def read_file_tool(path: str):
-    """A tool for reading files."""
+def read_file_tool(path: str, start_line: int = None, end_line: int = None, offset: int = None, length: int = None):
+    """
+    A tool for reading files. Returns the whole file by default.
+    Pass `start_line` and/or `end_line` (1-based, inclusive) for a range of lines, or `offset` and/or
+    `length` for a range of bytes; ranged reads start with a header giving the range and the file's size.
+    Prefer ranges for large files such as logs or generated code.
+    """
     try:
-        with open(path, "r") as f:
-            return f.read()
+        return get_file_reader().read(resolve_path(path), start_line, end_line, offset, length)
     except Exception as e:
         return str(e)
 
+@tool
+def read_observation_tool(observation_id: str, offset: int = 1, limit: int = 200, column: int = 0):
+    """
+    Reads up to `limit` lines of a large tool output that was shown as an excerpt, starting at line `offset`
+    (1-based, as numbered in the excerpt). Use the observation id from the excerpt's header. A very long line
+    is split across pages: pass the `column` given in the page's footer to read the rest of it.
+    """
+    return read_observation(observation_id, offset, limit, column)
+
 @tool
 def write_file_tool(path: str, content: str):
     """A tool for writing to files."""
     try:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w") as f:
+        full_path = resolve_path(path)
+        os.makedirs(os.path.dirname(full_path) or ".", exist_ok=True)
+        journal = get_journal()
+        journal.capture(full_path)
+        with open(full_path, "w") as f:
             f.write(content)
+        journal.record(full_path)
+        get_file_reader().invalidate(full_path)
+        WRITTEN_FILES.add(os.path.abspath(full_path))
         return f"Successfully wrote to {path}"
     except Exception as e:
         return str(e)
 
+@tool
+def apply_patch_tool(patch: str):
+    """
+    Applies a patch to one or more files atomically: either every hunk applies or no file is changed.
+    Accepts a unified diff (`--- a/path` / `+++ b/path` headers and `@@` hunks, `/dev/null` to create or
+    delete a file) or search/replace blocks, each preceded by the file path:
+        path/to/file.py
+        <<<<<<< SEARCH
+        exact lines currently in the file
+        =======
+        replacement lines
+        >>>>>>> REPLACE
+    Returns the changed files, or the rejected hunks with the reason and the closest matching lines.
+    """
+    root = get_workspace_root()
+    try:
+        changes, rejects = plan_patch(patch, root)
+    except PatchError as e:
+        return {"status": "error", "error": str(e)}
+    if rejects:
+        return {"status": "rejected", "message": "No files were changed.", "rejects": rejects}
+    journal = get_journal()
+    for path in changes:
+        journal.capture(os.path.join(root, path))
+    try:
+        apply_changes(changes, root)
+    except OSError as e:
+        return {"status": "error", "error": f"Failed to write patch, no files were changed: {e}"}
+    for path, content in changes.items():
+        journal.record(os.path.join(root, path))
+        get_file_reader().invalidate(os.path.join(root, path))
+        if content is not None:
+            WRITTEN_FILES.add(os.path.join(root, path))
+    return {
+        "status": "applied",
+        "modified": sorted(p for p, c in changes.items() if c is not None),
+        "deleted": sorted(p for p, c in changes.items() if c is None),
+    }
+
+@tool
+def iteration_diff_tool(iteration: int = 0):
+    """
+    Returns the unified diff of every file written during an implementer iteration
+    (0 = the current iteration), as recorded by the workspace journal.
+    """
+    journal = get_journal()
+    iteration = iteration or journal.manifest["current"]
+    if iteration is None:
+        return "No iterations have been recorded yet."
+    return journal.diff(iteration) or f"Iteration {iteration} did not change any files."
+
 @tool
 def command_runner_tool(command: str):
     """
     A tool for running shell commands directly in the workspace.
-    Requires user approval for each new command.
+    Commands are checked against the approval rules in aide_config.json;
+    anything not covered by a rule requires user approval.
     """
-    config = load_config()
-    approved_commands = config.get("approved_commands", {})
+    denial = approve_command(command)
+    return denial or _execute_command(command)
 
-    if command in approved_commands and approved_commands[command] == "always":
+def approve_command(command: str):
+    """Returns None if `command` may run (by rule, session approval or the user's answer), else why it may not."""
+    decision = check_command(command, CONFIG_FILE, get_workspace_root())
+    if decision.action == "deny":
+        print(f"[bold red]Command denied by approval rule {decision.rule.describe()}:[/bold red] {command}")
+        return f"Command execution denied by approval rule {decision.rule.describe()}."
+
+    if decision.action == "allow":
         print(f"[bold green]Executing pre-approved command:[/bold green] {command}")
-        return _execute_command(command)
+        return None
 
     if command in SESSION_APPROVALS:
         print(f"[bold green]Executing session-approved command:[/bold green] {command}")
-        return _execute_command(command)
+        return None
 
     print(f"[bold yellow]Execution approval required for command:[/bold yellow] {command}")
     print("Approve execution? (y/n, or: once, session, always)")
-    approval = input().lower().strip()
+    approval = ask_user(f"Approve execution of `{command}`? (y/n, or: once, session, always)").lower().strip()
 
     if approval in ["always", "session", "once", "y", "yes"]:
         if approval == "always":
-            approved_commands[command] = "always"
-            config["approved_commands"] = approved_commands
+            config = load_config()
+            config.setdefault("approved_commands", {})[command] = "always"
             save_config(config)
             SESSION_APPROVALS.add(command)
         elif approval == "session":
             SESSION_APPROVALS.add(command)
-        
-        return _execute_command(command)
-    else:
-        return "Command execution denied by user."
+        return None
+    return "Command execution denied by user."
+
+@tool
+def service_start_tool(name: str, command: str, ready_url: str = "", ready_port: int = 0, watch: str = "", timeout: int = 60):
+    """
+    Starts a long-lived background service (e.g. `uvicorn main:app --port 8000`, or `docker compose up` without -d)
+    and waits until it is ready: `ready_url` answers HTTP below 500, or `ready_port` accepts TCP connections.
+    If the service is already running the same command it is kept as is, unless a watched file changed
+    (`watch`: comma-separated globs; by default Python files, requirements, pyproject.toml and compose files),
+    in which case it is restarted. Services keep running across iterations; don't stop them after testing.
+    """
+    manager = get_service_manager()
+    if not manager.running_with(name, command):
+        denial = approve_command(command)
+        if denial:
+            return denial
+    patterns = [p.strip() for p in watch.split(",") if p.strip()] or None
+    return manager.start(name, command, ready_url or None, ready_port or None, patterns, timeout)
+
+@tool
+def service_stop_tool(name: str):
+    """Stops a background service started with `service_start_tool`."""
+    return get_service_manager().stop(name)
+
+@tool
+def service_status_tool():
+    """Lists the background services with their pid, uptime, restarts, readiness and log file."""
+    return get_service_manager().status()
+
+@tool
+def service_logs_tool(name: str, lines: int = 50, offset: int = -1):
+    """
+    Returns the last `lines` lines of a service's log and `next_offset`.
+    Pass that `offset` on the next call to get only the output written since (like `tail -f`).
+    """
+    return get_service_manager().logs(name, lines, None if offset < 0 else offset)
+
+def pop_written_files(root=None):
+    """Returns the files written (under `root`, if given) since the last call and removes them from the record."""
+    prefix = os.path.join(os.path.abspath(root), "") if root else ""
+    written = sorted(p for p in WRITTEN_FILES if p.startswith(prefix))
+    WRITTEN_FILES.difference_update(written)
+    return written
 
 def _execute_command(command: str):
     try:
@@ -88,6 +219,7 @@ def _execute_command(command: str):
             capture_output=True,
             text=True,
             check=False,
+            cwd=get_workspace_root(),
         )
         if result.returncode != 0:
             return f"Error: {result.stderr}\nExit Code: {result.returncode}"
@@ -95,13 +227,48 @@ def _execute_command(command: str):
     except FileNotFoundError:
         return "Command not found."
 
+@tool
+def run_pytest_tool(target: str = "tests", timeout: int = 600):
+    """
+    Runs pytest on a file or directory and returns a structured report:
+    per-test status, duration and failure details, plus a summary and overall_status.
+    """
+    return run_pytest(target, timeout, cwd=get_workspace_root())
+
+@tool
+def profile_tool(target: str = "tests", entry_point: str = "", timeout: int = 600):
+    """
+    Profiles the project's tests (pytest on `target`) or an `entry_point` (`script.py`, `package.module` or
+    `module:function`) under cProfile and tracemalloc in a subprocess. Returns the project's hottest functions
+    by cumulative time, the hottest library functions by self time, and the top allocation sites.
+    """
+    print(f"[bold blue]Profiling {entry_point or target}...[/bold blue]")
+    return profile_target(target, entry_point or None, timeout, cwd=get_workspace_root())
+
+@tool
+def microbenchmark_tool(directory: str = "tests", repeat: int = 15):
+    """
+    Times every module-level `bench_*` function (taking no arguments) in the Python files under `directory`,
+    with warmup and automatic loop calibration, and returns per-call median, IQR and 95% confidence interval.
+    """
+    print(f"[bold blue]Running microbenchmarks in {directory}...[/bold blue]")
+    results = run_microbenchmarks(get_workspace_root(), directory, repeat=repeat)
+    for benchmark in results["benchmarks"].values():
+        benchmark.pop("raw_samples")
+    return results
+
+def code_map_files():
+    """The Python files `build_code_map_tool` parses."""
+    return [
+        filepath for filepath in glob.glob("**/*.py", recursive=True)
+        if not ("venv" in filepath or ".venv" in filepath or "benchmark_system_DONT_TOUCH" in filepath)
+    ]
+
 @tool
 def build_code_map_tool():
     """Builds a map of the codebase by parsing all Python files."""
     code_map = {}
-    for filepath in glob.glob("**/*.py", recursive=True):
-        if "venv" in filepath or ".venv" in filepath or "benchmark_system_DONT_TOUCH" in filepath:
-            continue
+    for filepath in code_map_files():
         with open(filepath, "r") as f:
             try:
                 tree = ast.parse(f.read(), filename=filepath)
@@ -127,6 +294,28 @@ def build_code_map_tool():
     print("[bold blue]Code map written to code_map.json[/]")
     return code_map
 
+@tool
+def lookup_symbol_tool(name: str, include_source: bool = True):
+    """
+    Looks up a function, class or method by name or qualified name (e.g. `add`, `calculator.add`, `Cart.total`).
+    Returns its file, line range, signature, docstring and source, without reading the whole file.
+    """
+    matches = get_symbol_index(get_workspace_root()).lookup(name, include_source)
+    if not matches:
+        return f"No symbol named '{name}' found."
+    return matches
+
+@tool
+def search_code_tool(query: str, limit: int = 5):
+    """
+    Searches the codebase for the functions, classes and methods most related to the query's identifiers
+    (e.g. "parse config file", "user_id") and returns only those snippets.
+    """
+    results = get_symbol_index(get_workspace_root()).search(query, limit)
+    if not results:
+        return f"No code found matching '{query}'."
+    return results
+
 @tool
 def load_schema_tool(path: str = "api_schema.json"):
     """Loads a JSON API schema from the specified path."""
@@ -176,6 +365,22 @@ def run_benchmark_tool(url: str, requests: int = 100, concurrency: int = 10):
     except Exception as e:
         return f"Error: {{e}}"
 
+@tool
+def contract_probe_tool(base_url: str = "http://127.0.0.1:8000", schema_path: str = "api_schema.json", concurrency: int = 8, repeat: int = 1):
+    """
+    Probes every path and method in the project's API schema against the running service.
+    Example requests are generated from the schema and sent concurrently; each endpoint is reported
+    with its status code, response shape problems, pass/fail and latency (median and max over `repeat` requests).
+    """
+    print(f"[bold blue]Probing API contract at {base_url}...[/bold blue]")
+    try:
+        project_schema = load_project_schema(schema_path)
+    except FileNotFoundError:
+        return f"Error: Project schema file not found at {schema_path}."
+    except json.JSONDecodeError:
+        return f"Error: Failed to decode JSON from {schema_path}."
+    return run_probes(project_schema, base_url, concurrency=concurrency, repeat=repeat)
+
 @tool
 def request_user_confirmation_tool(prompt: str):
     """Asks the user for a yes/no confirmation."""
@@ -186,26 +391,28 @@ def validate_api_schema_tool(url: str = "http://127.0.0.1:8000/openapi.json", sc
     """
     Validates the running application's OpenAPI schema against the project's schema file.
     This tool should be used by the tester agent after the application has been started.
+    Returns a list of incompatibilities (missing paths/methods/parameters/responses, schema mismatches),
+    each with a severity of "error" or "warning".
     """
-    print(f"[bold blue]Validating API schema against {{url}}...[/bold blue]")
+    print(f"[bold blue]Validating API schema against {url}...[/bold blue]")
     try:
-        with open(schema_path, "r") as f:
-            project_schema = json.load(f)
-        try:
-            import requests
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            running_schema = response.json()
-        except Exception as e:
-            return f"Error fetching schema from running application: {{e}}. Make sure the service is running and accessible at {{url}}."
-        differences = diff(project_schema, running_schema)
-        if not differences:
-            return "API schema validation successful. The running application's schema matches the project schema."
-        else:
-            return f"API schema validation failed. Differences found: {{json.dumps(differences, indent=2)}}"
+        project_schema = load_project_schema(schema_path)
     except FileNotFoundError:
-        return f"Error: Project schema file not found at {{schema_path}}."
+        return f"Error: Project schema file not found at {schema_path}."
     except json.JSONDecodeError:
-        return f"Error: Failed to decode JSON from {{schema_path}}."
+        return f"Error: Failed to decode JSON from {schema_path}."
+    try:
+        import requests
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+        running_schema = resolve_refs(response.json())
     except Exception as e:
-        return f"An unexpected error occurred: {{e}}"
\ No newline at end of file
+        return f"Error fetching schema from running application: {e}. Make sure the service is running and accessible at {url}."
+    incompatibilities = compare_openapi(project_schema, running_schema)
+    errors = [i for i in incompatibilities if i["severity"] == "error"]
+    return {
+        "status": "failed" if errors else "passed",
+        "errors": len(errors),
+        "warnings": len(incompatibilities) - len(errors),
+        "incompatibilities": incompatibilities,
+    }
\ No newline at end of file
@@ -1,7 +1,14 @@
+import contextvars
 import datetime
 import json
+import os
+import queue
 import sys
 import select
+import threading
+
+_input_handler = contextvars.ContextVar("aide_input_handler", default=None)
+_feedback_queue = contextvars.ContextVar("aide_feedback_queue", default=None)
 
 def log_event(event_type, details):
     """Logs an event to aide_log.jsonl."""
@@ -13,6 +20,152 @@ def log_event(event_type, details):
         }
         f.write(json.dumps(log_entry, default=str) + "\n")
 
-def check_for_user_input():
-    """Check for user input without blocking."""
-    return input()
+# --- User Input ---
+
+class FeedbackQueue:
+    """A thread-safe queue of lines typed (or posted) by the user.
+
+    Lines are feedback unless someone is waiting in `ask`: then the next line is
+    that prompt's reply. Feedback typed before a prompt is never taken as its
+    answer, and a reply is never drained as feedback.
+    """
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._replies = queue.Queue()
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    def put(self, line):
+        with self._lock:
+            (self._replies if self._waiting else self._queue).put(line)
+
+    def get(self, timeout=None):
+        """Waits up to `timeout` seconds (forever if None) for a line; returns None on timeout."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def ask(self, timeout=None):
+        """Waits up to `timeout` seconds (forever if None) for the next line put after this call; returns None on timeout."""
+        with self._lock:
+            self._waiting += 1
+        try:
+            return self._replies.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        finally:
+            with self._lock:
+                self._waiting -= 1
+                if not self._waiting:
+                    # A line that arrived as the wait timed out is feedback after all.
+                    while not self._replies.empty():
+                        self._queue.put(self._replies.get_nowait())
+
+    def drain(self):
+        """Returns every queued line without blocking."""
+        lines = []
+        while True:
+            try:
+                lines.append(self._queue.get_nowait())
+            except queue.Empty:
+                return lines
+
+stdin_feedback = FeedbackQueue()
+_reader_thread = None
+_reader_stop = threading.Event()
+
+def _read_lines(stream, feedback):
+    """Pushes complete lines from `stream` into `feedback` until EOF or stop."""
+    try:
+        fd = stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        for line in iter(stream.readline, ""):
+            feedback.put(line.rstrip("\n"))
+        return
+    pending = b""
+    while not _reader_stop.is_set():
+        try:
+            ready, _, _ = select.select([fd], [], [], 0.5)
+        except (OSError, ValueError):
+            # Not selectable (e.g. a Windows console); fall back to blocking reads.
+            ready = [fd]
+        if not ready:
+            continue
+        chunk = os.read(fd, 4096)
+        if not chunk:
+            break
+        pending += chunk
+        while b"\n" in pending:
+            line, pending = pending.split(b"\n", 1)
+            feedback.put(line.decode(errors="replace").rstrip("\r"))
+    if pending:
+        feedback.put(pending.decode(errors="replace"))
+
+def start_input_reader(stream=None):
+    """Starts the background stdin reader (once) that feeds `stdin_feedback`."""
+    global _reader_thread
+    if _reader_thread is not None and _reader_thread.is_alive():
+        return _reader_thread
+    _reader_stop.clear()
+    _reader_thread = threading.Thread(
+        target=_read_lines, args=(stream or sys.stdin, stdin_feedback), daemon=True
+    )
+    _reader_thread.start()
+    return _reader_thread
+
+def stop_input_reader():
+    _reader_stop.set()
+
+def input_reader_running():
+    return _reader_thread is not None and _reader_thread.is_alive()
+
+def set_feedback_queue(feedback):
+    """Uses `feedback` instead of the stdin queue in the current context."""
+    return _feedback_queue.set(feedback)
+
+def reset_feedback_queue(token):
+    _feedback_queue.reset(token)
+
+def get_feedback_queue():
+    return _feedback_queue.get() or stdin_feedback
+
+def set_input_handler(handler):
+    """Routes user prompts in the current context through `handler(prompt, timeout)` instead of stdin.
+
+    Returns a token that can be passed to `reset_input_handler`.
+    """
+    return _input_handler.set(handler)
+
+def reset_input_handler(token):
+    _input_handler.reset(token)
+
+def ask_user(prompt="", timeout=None):
+    """Asks the user for a line of input, using the active input handler if one is set.
+
+    With a `timeout` (seconds) the call returns None if nobody answers in time.
+    """
+    handler = _input_handler.get()
+    if handler is not None:
+        return handler(prompt, timeout)
+    if timeout is None and not input_reader_running():
+        return input()
+    if _feedback_queue.get() is None:
+        start_input_reader()
+    return get_feedback_queue().ask(timeout=timeout)
+
+def check_for_user_input(timeout=0):
+    """Check for user input without blocking.
+
+    Drains everything queued since the last check. If nothing is queued, waits up
+    to `timeout` seconds (forever if None) for a single line before giving up.
+    """
+    if timeout != 0 and _feedback_queue.get() is None:
+        start_input_reader()
+    feedback = get_feedback_queue()
+    lines = feedback.drain()
+    if not lines and timeout != 0:
+        line = feedback.get(timeout=timeout)
+        if line is not None:
+            lines = [line] + feedback.drain()
+    return [line for line in lines if line.strip()]
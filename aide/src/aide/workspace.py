@@ -0,0 +1,299 @@
+"""Transactional journal over the files agents write.
+
+Every write made through `write_file_tool` or `apply_patch_tool` is recorded
+against the current iteration: the first time a file is touched in an iteration
+its previous content is saved as a content-addressed blob (copy-on-write), and
+after each write the new content's hash is recorded. That makes it possible to
+diff, commit or roll back a whole iteration in O(changed files), and to keep each
+iteration's test outcome so two iterations can be compared without re-running
+the earlier one.
+
+Layout under `.aide/journal/`: `blobs/<sha256>`, `journal.json` (the run, the
+current iteration and each iteration's status) and `iterations/<n>.json` (the
+iteration's files and test outcome). A write rewrites only its own iteration's
+manifest, so recording costs O(files changed in the iteration) however long
+the run is. Iteration numbers restart with every run, so `start_run` resets the
+manifests: a rollback never restores another run's files.
+
+Tools resolve relative paths against the workspace root of the current context
+(`set_workspace_root`), which defaults to the process working directory; this is
+what lets implementer candidates work concurrently in separate copies.
+"""
+import contextvars
+import difflib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+JOURNAL_DIR = os.path.join(".aide", "journal")
+_workspace_root = contextvars.ContextVar("aide_workspace_root", default=None)
+
+def set_workspace_root(root):
+    """Makes tools in the current context work in `root`. Returns a token for `reset_workspace_root`."""
+    return _workspace_root.set(os.path.abspath(root))
+
+def reset_workspace_root(token):
+    _workspace_root.reset(token)
+
+def get_workspace_root():
+    return _workspace_root.get() or os.getcwd()
+
+def resolve_path(path):
+    """Resolves a tool's relative `path` against the current workspace root."""
+    root = _workspace_root.get()
+    if root is None or os.path.isabs(path):
+        return path
+    return os.path.join(root, path)
+
+def _hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+class Journal:
+    def __init__(self, root="."):
+        self.root = os.path.abspath(root)
+        self.directory = os.path.join(self.root, JOURNAL_DIR)
+        self.blob_dir = os.path.join(self.directory, "blobs")
+        self.manifest_path = os.path.join(self.directory, "journal.json")
+        self.iteration_dir = os.path.join(self.directory, "iterations")
+        self.manifest = {"run": None, "current": None, "iterations": {}}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r") as f:
+                index = json.load(f)
+            if "iterations" in index:  # single-file manifest written by older versions
+                self.manifest = index
+                return
+            self.manifest = {"run": index["run"], "current": index["current"], "iterations": {}}
+            for number, status in index.get("statuses", {}).items():
+                entry = {"files": {}, "outcome": None}
+                path = os.path.join(self.iteration_dir, f"{number}.json")
+                if os.path.exists(path):
+                    with open(path, "r") as f:
+                        entry = json.load(f)
+                self.manifest["iterations"][number] = dict(entry, status=status)
+
+    # --- Storage ---
+
+    def _write_json(self, path, value):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "w") as f:
+            json.dump(value, f, indent=4)
+        os.replace(tmp_path, path)
+
+    def _save(self, iteration=None):
+        """Writes the index (run, current iteration, statuses), or only `iteration`'s files and outcome if given."""
+        if iteration is None:
+            statuses = {number: entry["status"] for number, entry in self.manifest["iterations"].items()}
+            self._write_json(self.manifest_path, {"run": self.manifest["run"], "current": self.manifest["current"], "statuses": statuses})
+        else:
+            entry = self.manifest["iterations"][str(iteration)]
+            self._write_json(os.path.join(self.iteration_dir, f"{iteration}.json"), {"files": entry["files"], "outcome": entry["outcome"]})
+
+    def _store(self, data):
+        digest = _hash(data)
+        path = os.path.join(self.blob_dir, digest)
+        if not os.path.exists(path):
+            os.makedirs(self.blob_dir, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+        return digest
+
+    def _load(self, digest):
+        if digest is None:
+            return None
+        with open(os.path.join(self.blob_dir, digest), "rb") as f:
+            return f.read()
+
+    def _key(self, path):
+        return os.path.relpath(os.path.abspath(path), self.root)
+
+    def _entry(self, iteration=None):
+        if iteration is None:
+            iteration = self.manifest["current"]
+            if iteration is None:
+                iteration = self.begin(0)
+        if str(iteration) not in self.manifest["iterations"]:
+            self.manifest["iterations"][str(iteration)] = {"status": "open", "files": {}, "outcome": None}
+            self._save()
+        return self.manifest["iterations"][str(iteration)]
+
+    # --- Recording writes ---
+
+    def start_run(self, run_id):
+        """Starts recording a new run; earlier runs' iterations are forgotten (their blobs are kept)."""
+        self.manifest = {"run": run_id, "current": None, "iterations": {}}
+        shutil.rmtree(self.iteration_dir, ignore_errors=True)
+        self._save()
+
+    def begin(self, iteration):
+        """Starts recording writes against `iteration`."""
+        self.manifest["current"] = iteration
+        self.manifest["iterations"].setdefault(str(iteration), {"status": "open", "files": {}, "outcome": None})
+        self._save()
+        self._save(iteration)
+        return iteration
+
+    def capture(self, path):
+        """Saves the pre-image of `path` the first time it is touched in the current iteration."""
+        files = self._entry()["files"]
+        key = self._key(path)
+        if key in files:
+            return
+        full_path = os.path.join(self.root, key)
+        before = None
+        if os.path.exists(full_path):
+            with open(full_path, "rb") as f:
+                before = self._store(f.read())
+        files[key] = {"before": before, "after": before}
+        self._save(self.manifest["current"])
+
+    def record(self, path):
+        """Records the current content of `path` as the iteration's result for it."""
+        key = self._key(path)
+        full_path = os.path.join(self.root, key)
+        after = None
+        if os.path.exists(full_path):
+            with open(full_path, "rb") as f:
+                after = self._store(f.read())
+        self._entry()["files"].setdefault(key, {"before": None, "after": None})["after"] = after
+        self._save(self.manifest["current"])
+
+    # --- Iteration operations ---
+
+    def changed_files(self, iteration):
+        files = self.manifest["iterations"].get(str(iteration), {}).get("files", {})
+        return {path: change for path, change in files.items() if change["before"] != change["after"]}
+
+    def commit(self, iteration=None):
+        """Commits `iteration`, and the uncommitted iterations before it whose changes it builds on."""
+        entry = self._entry(iteration)
+        entry["status"] = "committed"
+        number = int(iteration if iteration is not None else self.manifest["current"])
+        for i, earlier in self.manifest["iterations"].items():
+            if int(i) < number and earlier["status"] in ("open", "abandoned"):
+                earlier["status"] = "committed"
+        self._save()
+
+    def abandon(self, iteration):
+        """Marks `iteration` as abandoned (e.g. it failed the static checks); its files stay until a commit or rollback."""
+        self._entry(iteration)["status"] = "abandoned"
+        self._save()
+
+    def rollback(self, iteration):
+        """
+        Restores every file changed since the last committed iteration before `iteration` to its state then:
+        `iteration`, later iterations, and the abandoned or open ones between them.
+        """
+        restored = set()
+        committed = self.last_committed(iteration)
+        start = committed + 1 if committed is not None else iteration
+        later = sorted((int(i) for i in self.manifest["iterations"] if int(i) >= start), reverse=True)
+        for number in later:
+            entry = self.manifest["iterations"][str(number)]
+            if entry["status"] == "rolled_back":
+                continue
+            for path, change in entry["files"].items():
+                self._write(path, change["before"])
+                restored.add(path)
+            entry["status"] = "rolled_back"
+        self._save()
+        return sorted(restored)
+
+    def checkpoint(self):
+        """The current iteration's file states, so the writes after this point can be undone with `restore`."""
+        entry = self.manifest["iterations"].get(str(self.manifest["current"]), {"files": {}})
+        return {path: change["after"] for path, change in entry["files"].items()}
+
+    def restore(self, checkpoint):
+        """Undoes the current iteration's writes made since `checkpoint` (e.g. a model turn that is retried). Returns the restored paths."""
+        entry = self.manifest["iterations"].get(str(self.manifest["current"]))
+        if entry is None:
+            return []
+        files = entry["files"]
+        restored = []
+        for path, change in list(files.items()):
+            content = checkpoint.get(path, change["before"])
+            if change["after"] != content:
+                self._write(path, content)
+                restored.append(path)
+            if path in checkpoint:
+                change["after"] = content
+            else:
+                del files[path]
+        self._save(self.manifest["current"])
+        return sorted(restored)
+
+    def _write(self, path, digest):
+        """Sets `path` to the blob `digest`, or deletes it if `digest` is None."""
+        full_path = os.path.join(self.root, path)
+        content = self._load(digest)
+        if content is None:
+            if os.path.exists(full_path):
+                os.remove(full_path)
+        else:
+            os.makedirs(os.path.dirname(full_path) or ".", exist_ok=True)
+            with open(full_path, "wb") as f:
+                f.write(content)
+
+    def diff(self, iteration):
+        """Unified diff of everything `iteration` changed."""
+        chunks = []
+        for path, change in sorted(self.changed_files(iteration).items()):
+            before = (self._load(change["before"]) or b"").decode(errors="replace").splitlines(keepends=True)
+            after = (self._load(change["after"]) or b"").decode(errors="replace").splitlines(keepends=True)
+            chunks.extend(difflib.unified_diff(
+                before, after,
+                fromfile=f"a/{path}" if change["before"] else "/dev/null",
+                tofile=f"b/{path}" if change["after"] else "/dev/null",
+            ))
+        return "".join(chunks)
+
+    def diff_size(self, iteration):
+        """Number of added plus removed lines in `iteration`."""
+        return sum(1 for line in self.diff(iteration).splitlines()
+                   if line[:1] in "+-" and not line.startswith(("+++", "---")))
+
+    # --- Outcomes ---
+
+    def record_outcome(self, iteration, test_report):
+        self._entry(iteration)["outcome"] = test_report
+        self._save(iteration)
+
+    def outcome(self, iteration):
+        return self.manifest["iterations"].get(str(iteration), {}).get("outcome")
+
+    def compare(self, a, b):
+        """Compares the recorded test outcomes of iterations `a` and `b`."""
+        statuses_a = _test_statuses(self.outcome(a))
+        statuses_b = _test_statuses(self.outcome(b))
+        return {
+            "iterations": [a, b],
+            "passed": [sum(s == "passed" for s in statuses_a.values()), sum(s == "passed" for s in statuses_b.values())],
+            "fixed": sorted(t for t, s in statuses_b.items() if s == "passed" and statuses_a.get(t, "passed") != "passed"),
+            "regressed": sorted(t for t, s in statuses_b.items() if s != "passed" and statuses_a.get(t) == "passed"),
+            "removed": sorted(set(statuses_a) - set(statuses_b)),
+        }
+
+    def last_committed(self, before):
+        committed = [int(i) for i, e in self.manifest["iterations"].items() if e["status"] == "committed" and int(i) < before]
+        return max(committed) if committed else None
+
+def _test_statuses(test_report):
+    report = (test_report or {}).get("report", test_report or {})
+    tests = report.get("tests", []) if isinstance(report, dict) else []
+    return {t.get("name"): t.get("status") for t in tests if isinstance(t, dict) and t.get("name")}
+
+_journals = {}
+
+def get_journal(root=None):
+    """Returns the journal for `root` (the current workspace root by default)."""
+    root = os.path.abspath(root or get_workspace_root())
+    if root not in _journals:
+        _journals[root] = Journal(root)
+    return _journals[root]
+
+def release_journal(root=None):
+    """Forgets the cached journal for `root` once its session or candidate is done; it is reloaded from disk if needed again."""
+    _journals.pop(os.path.abspath(root or get_workspace_root()), None)
@@ -1,25 +1,155 @@
 #!/usr/bin/env python3
+import json
+import os
+import queue
+import socket
+import statistics
+import struct
 import subprocess
+import sys
 import threading
 import time
-import os
-import sys
+
+HEADER = struct.Struct("!I")
+
+# --- Channel framing ---
+# Every message on the channel is a 4-byte big-endian length followed by a JSON
+# object: {"type": "input", "data": "..."} from responders, {"type": "output",
+# "data": "..."} for each line the supervised program prints, {"type": "exit",
+# "returncode": N} when it finishes.
+
+def send_frame(sock, message):
+    payload = json.dumps(message).encode()
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+def _recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+def recv_frame(sock):
+    """Returns the next message, or None when the peer closes the channel."""
+    header = _recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+    payload = _recv_exact(sock, HEADER.unpack(header)[0])
+    if payload is None:
+        return None
+    return json.loads(payload)
+
+class BatchedLogWriter:
+    """Appends lines to the session log from a background thread, flushing in batches."""
+    def __init__(self, path, flush_interval=0.05, max_batch=256):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._lines = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, line):
+        self._lines.put(line)
+
+    def close(self):
+        self._lines.put(None)
+        self._thread.join()
+
+    def _run(self):
+        with open(self.path, "w") as log:
+            while True:
+                batch = [self._lines.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while batch[-1] is not None and len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._lines.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                done = batch[-1] is None
+                log.write("".join(line for line in batch if line is not None))
+                log.flush()
+                if done:
+                    return
 
 class InteractiveRunner:
-    def __init__(self, command):
+    def __init__(self, command, socket_path="ai_channel.sock"):
         self.command = command
         self.session_log = "ai_complete_session.log"
-        self.ai_response_file = "ai_response.txt"
+        self.socket_path = os.path.abspath(socket_path)
         self.process = None
-        
-    def run(self):
-        # Clear previous session
-        open(self.session_log, 'w').close()
-        
+        self.log = None
+        self._clients = []
+        self._clients_lock = threading.Lock()
+        self._stdin_lock = threading.Lock()
+        self._listener = None
+        self.echo = True
+        self.ready = threading.Event()
+
+    def _broadcast(self, message):
+        with self._clients_lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                send_frame(client, message)
+            except OSError:
+                self._drop(client)
+
+    def _drop(self, client):
+        with self._clients_lock:
+            if client in self._clients:
+                self._clients.remove(client)
+        client.close()
+
+    def _feed(self, response):
+        if self.echo:
+            print(f"🤖 AI responds: {response}")
+        with self._stdin_lock:
+            self.process.stdin.write(response + '\n')
+            self.process.stdin.flush()
+        self.log.write(f"[AI INPUT]: {response}\n")
+
+    def _serve_client(self, client):
+        try:
+            while True:
+                message = recv_frame(client)
+                if message is None:
+                    break
+                if message.get("type") == "input" and self.process.poll() is None:
+                    self._feed(message.get("data", ""))
+        except OSError:
+            pass
+        finally:
+            self._drop(client)
+
+    def _accept_clients(self):
+        while True:
+            try:
+                client, _ = self._listener.accept()
+            except OSError:
+                return
+            with self._clients_lock:
+                self._clients.append(client)
+            threading.Thread(target=self._serve_client, args=(client,), daemon=True).start()
+
+    def run(self, echo=True):
+        self.echo = echo
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.socket_path)
+        self._listener.listen()
+        self.log = BatchedLogWriter(self.session_log)
+
         print("🚀 Starting AI-monitored program...")
         print(f"📄 AI can monitor: {self.session_log}")
-        print(f"📝 AI should respond in: {self.ai_response_file}")
-        
+        print(f"🔌 AI channel: {self.socket_path} (respond with: python interactive_runner.py --send TEXT)")
+
         # Start the subprocess
         self.process = subprocess.Popen(
             self.command,
@@ -29,60 +159,87 @@ class InteractiveRunner:
             universal_newlines=True,
             bufsize=1
         )
-        
-        # Thread 1: Capture ALL output for AI
-        def log_everything():
-            with open(self.session_log, 'w') as log:
-                for line in self.process.stdout:
-                    # Show to human too
-                    print(line, end='')
-                    # Log for AI
-                    log.write(line)
-                    log.flush()
-        
-        # Thread 2: Watch for AI responses and feed them back
-        def handle_ai_input():
-            while self.process.poll() is None:
-                if os.path.exists(self.ai_response_file):
-                    try:
-                        with open(self.ai_response_file, 'r') as f:
-                            response = f.read().strip()
-                        
-                        if response:
-                            print(f"🤖 AI responds: {response}")
-                            # Feed to program
-                            self.process.stdin.write(response + '\n')
-                            self.process.stdin.flush()
-                            
-                            # Log AI's response too
-                            with open(self.session_log, 'a') as log:
-                                log.write(f"[AI INPUT]: {response}\n")
-                                log.flush()
-                            
-                            # Remove response file
-                            os.remove(self.ai_response_file)
-                    
-                    except Exception as e:
-                        print(f"Error reading AI response: {e}")
-                
-                time.sleep(0.2)  # Check every 200ms
-        
-        # Start both threads
-        output_thread = threading.Thread(target=log_everything, daemon=True)
-        input_thread = threading.Thread(target=handle_ai_input, daemon=True)
-        
-        output_thread.start()
-        input_thread.start()
-        
-        # Wait for program to finish
-        self.process.wait()
+        threading.Thread(target=self._accept_clients, daemon=True).start()
+        self.ready.set()
+
+        # Capture ALL output: show it to the human, log it and push it to every responder
+        for line in self.process.stdout:
+            if self.echo:
+                print(line, end='')
+            self.log.write(line)
+            self._broadcast({"type": "output", "data": line})
+
+        returncode = self.process.wait()
+        self._broadcast({"type": "exit", "returncode": returncode})
+        self._listener.close()
+        os.remove(self.socket_path)
+        self.log.close()
         print("\n✅ Program finished")
+        return returncode
+
+class ChannelClient:
+    """A responder connected to a running InteractiveRunner."""
+    def __init__(self, socket_path="ai_channel.sock"):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(os.path.abspath(socket_path))
+
+    def send(self, text):
+        send_frame(self.sock, {"type": "input", "data": text})
+
+    def receive(self):
+        return recv_frame(self.sock)
+
+    def close(self):
+        self.sock.close()
+
+ECHO_PROGRAM = "import sys\nfor line in sys.stdin:\n    print('echo:' + line.strip(), flush=True)\n"
+
+def benchmark(rounds=200, socket_path="ai_bench.sock"):
+    """Measures responder -> program -> responder round trips through the channel."""
+    runner = InteractiveRunner([sys.executable, "-u", "-c", ECHO_PROGRAM], socket_path=socket_path)
+    runner.session_log = "ai_bench_session.log"
+    thread = threading.Thread(target=runner.run, kwargs={"echo": False}, daemon=True)
+    thread.start()
+    runner.ready.wait()
+    client = ChannelClient(socket_path)
+    samples = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        client.send(f"ping {i}")
+        while True:
+            message = client.receive()
+            if message["type"] == "output" and message["data"].strip() == f"echo:ping {i}":
+                break
+        samples.append((time.perf_counter() - start) * 1000)
+    client.close()
+    runner.process.stdin.close()
+    thread.join()
+    os.remove(runner.session_log)
+    samples.sort()
+    print(f"Round trips: {rounds}")
+    print(f"  mean   {statistics.mean(samples):.3f} ms")
+    print(f"  median {statistics.median(samples):.3f} ms")
+    print(f"  p95    {samples[int(len(samples) * 0.95) - 1]:.3f} ms")
+    print(f"  max    {samples[-1]:.3f} ms")
+    return samples
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python interactive_runner.py your_program [args...]")
+        print("       python interactive_runner.py --send TEXT")
+        print("       python interactive_runner.py --bench [ROUNDS]")
         sys.exit(1)
-    
+
+    if sys.argv[1] == "--send":
+        client = ChannelClient()
+        client.send(" ".join(sys.argv[2:]))
+        client.close()
+        sys.exit(0)
+
+    if sys.argv[1] == "--bench":
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 200)
+        sys.exit(0)
+
     # Add the project root to the PYTHONPATH
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__)))
     env = os.environ.copy()
@@ -0,0 +1,60 @@
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+from interactive_runner import ECHO_PROGRAM, BatchedLogWriter, ChannelClient, InteractiveRunner, recv_frame, send_frame
+
+class TestFraming(unittest.TestCase):
+
+    def test_round_trip(self):
+        """Frames arrive whole and in order, whatever their size; a closed peer reads as None."""
+        a, b = socket.socketpair()
+        messages = [{"type": "input", "data": "y"}, {"type": "output", "data": "x" * 200000 + "\n"}, {"type": "exit", "returncode": 0}]
+        sender = threading.Thread(target=lambda: [send_frame(a, m) for m in messages])
+        sender.start()
+        self.assertEqual([recv_frame(b) for _ in messages], messages)
+        sender.join()
+        a.close()
+        self.assertIsNone(recv_frame(b))
+        b.close()
+
+class TestBatchedLogWriter(unittest.TestCase):
+
+    def test_close_flushes_every_line(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, "session.log")
+        log = BatchedLogWriter(path, flush_interval=10, max_batch=4)
+        lines = [f"line {i}\n" for i in range(10)]
+        for line in lines:
+            log.write(line)
+        log.close()
+        with open(path) as f:
+            self.assertEqual(f.read(), "".join(lines))
+
+class TestInteractiveRunner(unittest.TestCase):
+
+    def test_responder_round_trip(self):
+        """A responder's input reaches the program, and its output and exit code come back over the channel."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        runner = InteractiveRunner([sys.executable, "-u", "-c", ECHO_PROGRAM], socket_path=os.path.join(directory, "channel.sock"))
+        runner.session_log = os.path.join(directory, "session.log")
+        thread = threading.Thread(target=runner.run, kwargs={"echo": False}, daemon=True)
+        thread.start()
+        self.assertTrue(runner.ready.wait(10))
+        client = ChannelClient(runner.socket_path)
+        client.send("ping")
+        self.assertEqual(client.receive(), {"type": "output", "data": "echo:ping\n"})
+        runner.process.stdin.close()
+        self.assertEqual(client.receive(), {"type": "exit", "returncode": 0})
+        client.close()
+        thread.join(10)
+        with open(runner.session_log) as f:
+            self.assertEqual(sorted(f.read().splitlines()), ["[AI INPUT]: ping", "echo:ping"])
+
+if __name__ == '__main__':
+    unittest.main()